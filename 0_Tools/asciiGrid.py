@@ -0,0 +1,129 @@
+## Name: asciiGrid.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Streaming reader of ESRI ASCII grids (e.g. the global 30 arc-second elevation GloElev_30as.asc)
+##              1. Parse the header of the grid (ncols, nrows, xllcorner/xllcenter, yllcorner/yllcenter, cellsize,
+##                 NODATA_value)
+##              2. Skip the rows above a window without parsing them (newlines counted in large chunks)
+##              3. Parse only the rows of the window (NumPy tokenizer) and keep the columns of the window
+##              4. Clip the grid to an extent and write the clipped raster directly (instead of ASCII to Raster
+##                 of the whole grid)
+## Usage:
+##      asciiGrid.clipToRaster("GloElev_30as.asc", (xmin, ymin, xmax, ymax), "elev", arcpy.SpatialReference(4326))
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import math
+import numpy as np
+
+import rasterBlocks
+
+
+## ---------------------------------------------------------------------------
+## 1. Header
+## Description: The header lines start with a keyword, the first line starting with a number is the first row
+## of the grid (top row). The lower left corner is given by its corner or by the center of its cell.
+
+KEYWORDS = ("ncols", "nrows", "xllcorner", "yllcorner", "xllcenter", "yllcenter", "cellsize", "nodata_value")
+
+
+# Create a Function that reads the header of an ASCII grid opened in binary mode. The file is left at the first row.
+def readHeader(f):
+    header = {}
+    while True:
+        position = f.tell()
+        line = f.readline()
+        fields = line.split()
+        if not fields or fields[0].lower() not in KEYWORDS:
+            f.seek(position)
+            break
+        header[fields[0].lower()] = float(fields[1])
+    cellSize = header["cellsize"]
+    if "xllcenter" in header:
+        header["xllcorner"] = header["xllcenter"] - cellSize / 2.0
+    if "yllcenter" in header:
+        header["yllcorner"] = header["yllcenter"] - cellSize / 2.0
+    return header
+
+
+# Create a Function that returns the grid of an ASCII grid (crs of the coordinates)
+def headerGrid(header, crs):
+    nrows = int(header["nrows"])
+    cellSize = header["cellsize"]
+    return rasterBlocks.Grid(header["xllcorner"], header["yllcorner"] + nrows * cellSize, cellSize,
+                             nrows, int(header["ncols"]), crs)
+
+
+## ---------------------------------------------------------------------------
+## 2. Read a window
+## Description: Each row of the grid is one line of the file. The rows above the window are skipped by counting
+## the newlines of chunks of the file, the rows of the window are parsed with np.fromstring.
+
+# Create a Function that skips n lines of a file opened in binary mode
+def skipLines(f, n, chunkSize=1 << 24):
+    while n > 0:
+        position = f.tell()
+        chunk = f.read(chunkSize)
+        if not chunk:
+            raise Exception("End of file {0} reached, {1} lines missing".format(f.name, n))
+        count = chunk.count(b"\n")
+        if count < n:
+            n -= count
+            continue
+        end = -1
+        for k in range(n):
+            end = chunk.index(b"\n", end + 1)
+        f.seek(position + end + 1)
+        n = 0
+
+
+# Create a Function that reads nrows x ncols cells starting at (row0, col0) of an ASCII grid (float64 array)
+def readWindow(path, row0, col0, nrows, ncols):
+    array = np.empty((nrows, ncols), dtype=np.float64)
+    with open(path, "rb") as f:
+        header = readHeader(f)
+        if row0 < 0 or col0 < 0 or row0 + nrows > header["nrows"] or col0 + ncols > header["ncols"]:
+            raise Exception("Window ({0}, {1}, {2}, {3}) outside of {4}".format(row0, col0, nrows, ncols, path))
+        skipLines(f, row0)
+        for i in range(nrows):
+            values = np.fromstring(f.readline(), dtype=np.float64, sep=" ")
+            if len(values) != header["ncols"]:
+                raise Exception("Row {0} of {1} has {2} values instead of {3} (one row per line expected)".format(
+                                row0 + i, path, len(values), int(header["ncols"])))
+            array[i] = values[col0:col0 + ncols]
+    return header, array
+
+
+## ---------------------------------------------------------------------------
+## 3. Clip to a raster
+## Description: The window covers the cells of the grid intersecting the extent (given in the coordinates of the
+## grid). The clipped raster is integer when all the values are integers (as ASCII to Raster, INTEGER), float
+## otherwise, and the NODATA_value of the grid is kept as NoData. Returns the grid of the clipped raster.
+
+def clipToRaster(inASCII, extent, outRaster, spatialReference):
+    with open(inASCII, "rb") as f:
+        header = readHeader(f)
+    grid = headerGrid(header, spatialReference)
+    col0 = max(int(math.floor((extent[0] - grid.xmin) / grid.cellSize)), 0)
+    col1 = min(int(math.ceil((extent[2] - grid.xmin) / grid.cellSize)), grid.ncols)
+    row0 = max(int(math.floor((grid.ymax - extent[3]) / grid.cellSize)), 0)
+    row1 = min(int(math.ceil((grid.ymax - extent[1]) / grid.cellSize)), grid.nrows)
+    if row1 <= row0 or col1 <= col0:
+        raise Exception("Extent {0} outside of {1}".format(extent, inASCII))
+
+    header, array = readWindow(inASCII, row0, col0, row1 - row0, col1 - col0)
+    nodata = header.get("nodata_value", -9999)
+    if (np.mod(array, 1) == 0).all() and np.abs(array).max() < 2 ** 31:
+        array = array.astype(np.int32)
+        nodata = int(nodata)
+    else:
+        array = array.astype(np.float32)
+
+    window = grid.window(row0, col0, row1 - row0, col1 - col0)
+    outClip = arcpy.NumPyArrayToRaster(array, arcpy.Point(window.xmin, window.ymin),
+                                       window.cellSize, window.cellSize, nodata)
+    outClip.save(outRaster)
+    arcpy.DefineProjection_management(outRaster, spatialReference)
+    return window
@@ -0,0 +1,175 @@
+## Name: attributeTable.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Columnar updates of the attribute tables of the Rio Grande/Bravo basin (RGB) geodatabase
+##              1. Load the fields of a table into NumPy arrays (one read of the table)
+##              2. Apply rules to whole columns: map values, zero-pad codes, replace values where a condition
+##                 is true, compute a field from other fields
+##              3. Write all the changed fields with a single update of the table
+## Usage:
+##      table = attributeTable.Table(fc, ["STATE", "ABV"])
+##      table.apply([["map", "STATE", "ABV", {5: "COA", 8: "CHI"}],
+##                   ["replace", "STATE", table["STATE"] == 0, -99]])
+##      table.save()
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import numpy as np
+
+
+## ---------------------------------------------------------------------------
+## 1. Columns
+## Description: Numeric fields without null values are loaded as int64 or float64 arrays, numeric fields with
+## null values as float64 arrays (null = NaN), the other fields as object arrays (null = None).
+
+NUMERIC = ("SmallInteger", "Integer", "Single", "Double", "OID")
+
+
+def _column(values, fieldType):
+    if fieldType in NUMERIC:
+        if None in values:
+            return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        if fieldType in ("SmallInteger", "Integer", "OID"):
+            return np.array(values, dtype=np.int64)
+        return np.array(values, dtype=np.float64)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+# Value written in the table (Python types, None for NaN)
+def toPython(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+# Null values of a column
+def isNull(column):
+    if column.dtype == object:
+        return np.array([v is None for v in column], dtype=bool)
+    if column.dtype.kind == "f":
+        return np.isnan(column)
+    return np.zeros(len(column), dtype=bool)
+
+
+## ---------------------------------------------------------------------------
+## 2. Table
+
+class Table(object):
+
+    def __init__(self, table, fields, where=None):
+        self.table = table
+        types = dict((f.name.lower(), f) for f in arcpy.ListFields(table))
+        missing = [name for name in fields if name.lower() not in types]
+        if missing:
+            raise Exception("Fields {0} not found in {1}".format(missing, table))
+        self.fields = [types[name.lower()].name for name in fields]
+        self.types = dict((name, types[name.lower()].type) for name in self.fields)
+        self.where = where
+        values = dict((name, []) for name in self.fields)
+        oids = []
+        with arcpy.da.SearchCursor(table, ["OID@"] + self.fields, where) as rows:
+            for row in rows:
+                oids.append(row[0])
+                for name, value in zip(self.fields, row[1:]):
+                    values[name].append(value)
+        self.oids = np.array(oids, dtype=np.int64)
+        self.columns = dict((name, _column(values[name], self.types[name])) for name in self.fields)
+        self.changed = []
+
+    def __len__(self):
+        return len(self.oids)
+
+    def _name(self, field):
+        for name in self.fields:
+            if name.lower() == field.lower():
+                return name
+        raise Exception("Field {0} not loaded from {1}".format(field, self.table))
+
+    def __getitem__(self, field):
+        return self.columns[self._name(field)]
+
+    def __setitem__(self, field, values):
+        name = self._name(field)
+        numeric = self.types[name] in NUMERIC and not (isinstance(values, np.ndarray) and values.dtype == object)
+        column = np.empty(len(self), dtype=np.float64 if numeric else object)
+        column[:] = values
+        self.columns[name] = column
+        if name not in self.changed:
+            self.changed.append(name)
+
+    ## Rules
+
+    # Map the values of a field (codes) to the values of another field (dictionary {code: value}).
+    # The codes not in the mapping get the default value (None keeps the current value of the target).
+    def mapValues(self, source, target, mapping, default=None):
+        codes = self[source]
+        column = self[target].copy()
+        if default is not None:
+            column[:] = default
+        for code, value in mapping.items():
+            column[codes == code] = value
+        self[target] = column
+
+    # Zero-pad the integer codes of a field to a given width, with an optional prefix (a string or the values
+    # of a text field), where a condition is true. The rows with null codes keep the current value of the target.
+    def pad(self, source, target, width, prefix="", where=None):
+        codes = self[source]
+        valid = ~isNull(codes)
+        if where is not None:
+            valid &= np.asarray(where, dtype=bool)
+        column = self[target].astype(object)
+        digits = np.char.zfill(codes[valid].astype(np.int64).astype(str), width)
+        if not isinstance(prefix, basestring):
+            digits = np.char.add(np.asarray(prefix)[valid].astype(str), digits)
+        elif prefix:
+            digits = np.char.add(prefix, digits)
+        column[valid] = digits.tolist()
+        self[target] = column
+
+    # Replace the values of a field where a condition (boolean array) is true
+    def replaceWhere(self, field, condition, value):
+        column = self[field].copy()
+        if self.types[self._name(field)] in NUMERIC and isinstance(value, basestring):
+            value = float(value)
+        elif self.types[self._name(field)] not in NUMERIC and value is not None:
+            value = str(value)
+        column[np.asarray(condition, dtype=bool)] = value
+        self[field] = column
+
+    # Compute a field from the other fields (a value, an array, or a function of the table)
+    def compute(self, target, expression):
+        if callable(expression):
+            expression = expression(self)
+        self[target] = expression
+
+    # Apply a list of rules: ["map", source, target, mapping(, default)], ["pad", source, target, width(, prefix, where)],
+    # ["replace", field, condition, value], ["compute", target, expression]
+    def apply(self, rules):
+        methods = {"map": self.mapValues, "pad": self.pad, "replace": self.replaceWhere, "compute": self.compute}
+        for rule in rules:
+            methods[rule[0]](*rule[1:])
+
+    ## Write
+
+    # Write the changed fields with a single update cursor (rows matched by OID)
+    def save(self):
+        if not self.changed:
+            return 0
+        index = dict((oid, i) for i, oid in enumerate(self.oids))
+        columns = [self.columns[name] for name in self.changed]
+        count = 0
+        with arcpy.da.UpdateCursor(self.table, ["OID@"] + self.changed, self.where) as rows:
+            for row in rows:
+                i = index.get(row[0])
+                if i is None:
+                    continue
+                rows.updateRow([row[0]] + [toPython(column[i]) for column in columns])
+                count += 1
+        self.changed = []
+        return count
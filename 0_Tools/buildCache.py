@@ -0,0 +1,199 @@
+## Name: buildCache.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Incremental rebuilds of the Rio Grande/Bravo basin (RGB) geodatabase
+##              1. Fingerprint the content of the input datasets (files, GRID folders, geodatabase datasets)
+##              2. Fingerprint a step: input datasets, parameters and code
+##              3. Skip the steps whose fingerprint is unchanged and whose declared outputs still exist
+##              4. Record in a manifest (json) why each step was executed
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import datetime
+import hashlib
+import json
+import os
+import re
+
+
+## ---------------------------------------------------------------------------
+## 1. Fingerprint of a dataset
+## Description: The content hash (sha1) of a file is kept in the manifest with its size and modification
+## time, so a file is read again only when it changed. A folder (GRID, coverage) is hashed file by file.
+## A dataset inside a geodatabase gets the fingerprint of the step that wrote it (or, when it was not written
+## by a step, a signature of its fields, count of rows and extent read with arcpy).
+
+def fileHash(path, hashes):
+    stat = os.stat(path)
+    key = os.path.normcase(os.path.abspath(path))
+    if key in hashes and hashes[key][0] == stat.st_size and hashes[key][1] == stat.st_mtime:
+        return hashes[key][2]
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    hashes[key] = [stat.st_size, stat.st_mtime, sha.hexdigest()]
+    return hashes[key][2]
+
+
+# Files of a shapefile (same root, different extensions)
+def _datasetFiles(path):
+    if os.path.isdir(path):
+        files = []
+        for dirpath, dirs, names in os.walk(path):
+            files.extend(os.path.join(dirpath, name) for name in names if not name.endswith(".lock"))
+        return sorted(files)
+    root, ext = os.path.splitext(path)
+    if ext.lower() == ".shp":
+        folder, name = os.path.split(root)
+        return sorted(os.path.join(folder, f) for f in os.listdir(folder or ".")
+                      if os.path.splitext(f)[0] == name and not f.endswith(".lock"))
+    return [path]
+
+
+def _gdbSignature(path):
+    import arcpy
+    desc = arcpy.Describe(path)
+    fields = [(f.name, f.type, f.length) for f in arcpy.ListFields(path)]
+    count = arcpy.GetCount_management(path)[0] if hasattr(desc, "fields") else ""
+    extent = str(desc.extent) if hasattr(desc, "extent") else ""
+    return hashlib.sha1(repr((fields, count, extent))).hexdigest()
+
+
+def datasetHash(path, manifest):
+    key = os.path.normcase(os.path.abspath(path))
+    if ".gdb" in key:
+        if key in manifest["datasets"]:
+            return manifest["datasets"][key]
+        return _gdbSignature(path)
+    if not os.path.exists(path):
+        return None
+    sha = hashlib.sha1()
+    for f in _datasetFiles(path):
+        sha.update(os.path.basename(f))
+        sha.update(fileHash(f, manifest["files"]))
+    return sha.hexdigest()
+
+
+def datasetExists(path):
+    if ".gdb" in path.lower():
+        import arcpy
+        return arcpy.Exists(path)
+    return os.path.exists(path)
+
+
+## ---------------------------------------------------------------------------
+## 2. Manifest
+## Description: One json file per script (or per pipeline), next to the intermediate outputs.
+
+def loadManifest(path):
+    manifest = {"steps": {}, "datasets": {}, "files": {}}
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest.update(json.load(f))
+    manifest["path"] = path
+    return manifest
+
+
+def saveManifest(manifest):
+    data = dict((k, v) for k, v in manifest.items() if k != "path")
+    with open(manifest["path"], "w") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+
+
+# Create a Function that returns the code of a numbered step of a script
+# (from the line "## N. Title" to the next line "## -----")
+def stepSource(script, number):
+    with open(script) as f:
+        text = f.read()
+    match = re.search(r"^## {0}\. .*?(?=^## -{{10,}}|\Z)".format(number), text, re.M | re.S)
+    if match is None:
+        raise Exception("Step {0} not found in {1}".format(number, script))
+    return match.group(0)
+
+
+def codeHash(text):
+    return hashlib.sha1(text).hexdigest()
+
+
+## ---------------------------------------------------------------------------
+## 3. Step
+## Description: A step is executed when it is new, when its code, its parameters or one of its inputs changed,
+## or when one of its outputs is missing or was modified since the step wrote it. A step that declares no outputs
+## is always executed (a deleted output could not be detected).
+## Each execution gives a new version to the geodatabase datasets it writes, so the steps reading them run again.
+## A dataset both read and written by a step (updated in place) is compared with its version before the update.
+## Usage:
+##      step = buildCache.Step(manifest, "Step 3 Project", inputs, outputs, params, code)
+##      if step.run:
+##          ...
+##          step.done()
+
+class Step(object):
+
+    def __init__(self, manifest, name, inputs=(), outputs=(), params=(), code=""):
+        self.manifest = manifest
+        self.name = name
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = repr(list(params))
+        self.code = codeHash(code)
+        previous = manifest["steps"].get(name)
+        self.inputHashes = {}
+        for i in self.inputs:
+            h = datasetHash(i, manifest)
+            if i in self.outputs and previous is not None and h == previous["outputs"].get(i):
+                h = previous["inputs"].get(i)
+            self.inputHashes[i] = h
+        self.fingerprint = hashlib.sha1(repr((self.code, self.params, sorted(self.inputHashes.items())))).hexdigest()
+        self.reasons = self._reasons()
+        self.run = bool(self.reasons)
+        if self.run:
+            print self.name, "executed:", "; ".join(self.reasons)
+        else:
+            print self.name, "unchanged: outputs reused"
+
+    def _reasons(self):
+        previous = self.manifest["steps"].get(self.name)
+        if previous is None:
+            return ["new step"]
+        reasons = []
+        if not self.outputs:
+            reasons.append("no declared outputs")
+        if previous["code"] != self.code:
+            reasons.append("code changed")
+        if previous["params"] != self.params:
+            reasons.append("parameters changed")
+        for i, h in sorted(self.inputHashes.items()):
+            if h is None:
+                reasons.append("input missing: " + i)
+            elif previous["inputs"].get(i) != h:
+                reasons.append("input changed: " + i)
+        for o in self.outputs:
+            if not datasetExists(o):
+                reasons.append("output missing: " + o)
+            elif ".gdb" not in o.lower() and previous["outputs"].get(o) != datasetHash(o, self.manifest):
+                reasons.append("output modified: " + o)
+        return reasons
+
+    def done(self):
+        executed = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        outputs = {}
+        for o in self.outputs:
+            key = os.path.normcase(os.path.abspath(o))
+            if ".gdb" in key:
+                # The datasets of a geodatabase are identified by the version written by the step
+                version = hashlib.sha1(self.fingerprint + executed).hexdigest()
+                self.manifest["datasets"][key] = version
+                outputs[o] = version
+            else:
+                outputs[o] = datasetHash(o, self.manifest)
+        self.manifest["steps"][self.name] = {"code": self.code,
+                                             "params": self.params,
+                                             "inputs": self.inputHashes,
+                                             "outputs": outputs,
+                                             "fingerprint": self.fingerprint,
+                                             "reasons": self.reasons,
+                                             "executed": executed}
+        saveManifest(self.manifest)
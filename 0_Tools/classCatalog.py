@@ -0,0 +1,292 @@
+## Name: classCatalog.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Catalog of the land-use and land-cover classes of the Rio Grande/Bravo basin (RGB)
+##              1. Versioned code tables: CDL (NASS), NALCMS Level 2 and INEGI Uso de Suelo y Vegetacion
+##              2. O(1) lookup of the name of a class (dictionary)
+##              3. Write the names in the attribute table of a raster or a feature class in one pass
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+
+
+## ---------------------------------------------------------------------------
+## 1. Code tables
+## Description: Names of the classes by code.
+
+## Cropland Data Layer (CDL)
+## https://www.nass.usda.gov/Research_and_Science/Cropland/metadata/2014_cultivated_layer_metadata.php
+CDL_2014 = {1: "Corn",
+            2: "Cotton",
+            3: "Rice",
+            4: "Sorghum",
+            5: "Soybeans",
+            6: "Sunflower",
+            10: "Peanuts",
+            11: "Tobacco",
+            12: "Sweet Corn",
+            13: "Pop or Orn Corn",
+            14: "Mint",
+            21: "Barley",
+            22: "Durum Wheat",
+            23: "Spring Wheat",
+            24: "Winter Wheat",
+            25: "Other Small Grains",
+            26: "Dbl Crop WinWht/Soybeans",
+            27: "Rye",
+            28: "Oats",
+            29: "Millet",
+            30: "Speltz",
+            31: "Canola",
+            32: "Flaxseed",
+            33: "Safflower",
+            34: "Rape Seed",
+            35: "Mustard",
+            36: "Alfalfa",
+            37: "Other Hay/Non Alfalfa",
+            38: "Camelina",
+            39: "Buckwheat",
+            41: "Sugarbeets",
+            42: "Dry Beans",
+            43: "Potatoes",
+            44: "Other Crops",
+            45: "Sugarcane",
+            46: "Sweet Potatoes",
+            47: "Misc Vegs & Fruits",
+            48: "Watermelons",
+            49: "Onions",
+            50: "Cucumbers",
+            51: "Chick Peas",
+            52: "Lentils",
+            53: "Peas",
+            54: "Tomatoes",
+            55: "Caneberries",
+            56: "Hops",
+            57: "Herbs",
+            58: "Clover/Wildflowers",
+            59: "Sod/Grass Seed",
+            60: "Switchgrass",
+            61: "Fallow/Idle Cropland",
+            63: "Forest",
+            64: "Shrubland",
+            65: "Barren",
+            66: "Cherries",
+            67: "Peaches",
+            68: "Apples",
+            69: "Grapes",
+            70: "Christmas Trees",
+            71: "Other Tree Crops",
+            72: "Citrus",
+            74: "Pecans",
+            75: "Almonds",
+            76: "Walnuts",
+            77: "Pears",
+            81: "Clouds/No Data",
+            82: "Developed",
+            83: "Water",
+            87: "Wetlands",
+            88: "Nonag/Undefined",
+            92: "Aquaculture",
+            111: "Open Water",
+            112: "Perennial Ice/Snow",
+            121: "Developed/Open Space",
+            122: "Developed/Low Intensity",
+            123: "Developed/Med Intensity",
+            124: "Developed/High Intensity",
+            131: "Barren",
+            141: "Deciduous Forest",
+            142: "Evergreen Forest",
+            143: "Mixed Forest",
+            152: "Shrubland",
+            176: "Grass/Pasture",
+            181: "Pasture/Hay",
+            190: "Woody Wetland",
+            195: "Herbaceous Wetland",
+            204: "Pistachios",
+            205: "Triticale",
+            206: "Carrots",
+            207: "Asparagus",
+            208: "Garlic",
+            209: "Cantaloupes",
+            210: "Prunes",
+            211: "Olives",
+            212: "Oranges",
+            213: "Honeydew Melons",
+            214: "Broccoli",
+            216: "Peppers",
+            217: "Pomegranates",
+            218: "Nectarines",
+            219: "Greens",
+            220: "Plums",
+            221: "Strawberries",
+            222: "Squash",
+            223: "Apricots",
+            224: "Vetch",
+            225: "Dbl Crop WinWht/Corn",
+            226: "Dbl Crop Oats/Corn",
+            227: "Lettuce",
+            229: "Pumpkins",
+            230: "Dbl Crop Lettuce/Durum Wht",
+            231: "Dbl Crop Lettuce/Cantaloupe",
+            232: "Dbl Crop Lettuce/Cotton",
+            233: "Dbl Crop Lettuce/Barley",
+            234: "Dbl Crop Durum Wht/Sorghum",
+            235: "Dbl Crop Barley/Sorghum",
+            236: "Dbl Crop WinWht/Sorghum",
+            237: "Dbl Crop Barley/Corn",
+            238: "Dbl Crop WinWht/Cotton",
+            239: "Dbl Crop Soybeans/Cotton",
+            240: "Dbl Crop Soybeans/Oats",
+            241: "Dbl Crop Corn/Soybeans",
+            242: "Blueberries",
+            243: "Cabbage",
+            244: "Cauliflower",
+            245: "Celery",
+            246: "Radishes",
+            247: "Turnips",
+            248: "Eggplants",
+            249: "Gourds",
+            250: "Cranberries",
+            254: "Dbl Crop Barley/Soybeans"}
+
+## North American Land Change Monitoring System (NALCMS)
+## Land Cover Class Definition Level 2 Classifications
+NALCMS_2010 = {1: "Temperate or sub-polar needleleaf forest",
+               2: "Sub-polar taiga needleleaf forest",
+               3: "Tropical or sub-tropical broadleaf evergreen forest",
+               4: "Tropical or sub-tropical broadleaf deciduous forest",
+               5: "Temperate or sub-polar broadleaf deciduous forest",
+               6: "Mixed Forest",
+               7: "Tropical or sub-tropical shrubland",
+               8: "Temperate or sub-polar shrubland",
+               9: "Tropical or sub-tropical grassland",
+               10: "Temperate or sub-polar grassland",
+               11: "Sub-polar or polar shrubland-lichen-moss",
+               12: "Sub-polar or polar grassland-lichen-moss",
+               13: "Sub-polar or polar barren-lichen-moss",
+               14: "Wetland",
+               15: "Cropland",
+               16: "Barren Lands",
+               17: "Urban and Built-up",
+               18: "Water",
+               19: "Snow and Ice"}
+
+## INEGI Uso de Suelo y Vegetacion, Serie V and VI (field CVE_UNION), translated from Spanish to English
+INEGI_SERIE5_6 = {"ADV": "Unvegetated Land",
+                  "AH": "Human Settlements",
+                  "BA": "Boreal Forest",
+                  "BG": "Gallery Forest",
+                  "BJ": "Juniperus Forest",
+                  "BP": "Pine Forest",
+                  "BPQ": "Pine-Oak Forest",
+                  "BQ": "Oak Forest",
+                  "BQP": "Oak-Pine Forest",
+                  "BS": "Douglas-Fir and Spruce Forest",
+                  "DV": "Without Vegetation",
+                  "H2O": "Water Body",
+                  "HA": "Wetland Agriculture",
+                  "MC": "Pachycaulous Shrubland/Pachycaulous Scrub",
+                  "MDM": "Desertic Microphyllous Shrubland/Desertic Microphyllous Scrub",
+                  "MDR": "Desertic Rosetophyllous Shrubland/Desertic Rosetophyllous Scrub",
+                  "MET": "Tamaulipan Thorn Shrubland/Tamaulipan Thorn Scrub",
+                  "MK": "Thorn Forest",
+                  "MKX": "Desertic Thorn Forest",
+                  "ML": "Chaparral",
+                  "MSM": "Piedmont Shrubland/Piedmont Scrub",
+                  "PC": "Cultivated Grassland",
+                  "PH": "Halophilous Grassland",
+                  "PI": "Induced Grassland",
+                  "PN": "Natural Grassland",
+                  "RA": "Annual Irrigated Crop",
+                  "RAP": "Annual and Perennial Irrigated Crop",
+                  "RAS": "Annual and Semi-Perennial Irrigated Crop",
+                  "RP": "Perennial Irrigated Crop",
+                  "RS": "Semi-Perennial Irrigated Crop",
+                  "RSP": "Perennial and Semi-Perennial Irrigated Crop",
+                  "TA": "Annual Rainfed Crop",
+                  "TAP": "Annual and Perennial Rainfed Crop",
+                  "TAS": "Annual and Semi-Perennial Rainfed Crop",
+                  "TP": "Perennial Rainfed Crop",
+                  "VD": "Sand Desertic Vegetation",
+                  "VG": "Gallery Vegetation",
+                  "VH": "Halophilous Vegetation",
+                  "VHH": "Halophilous Hydrophilous Vegetation",
+                  "VPI": "Induced Palms",
+                  "VSa/BA": "Secondary Shrub Vegetation derived from Boreal Forest",
+                  "VSa/BB": "Secondary Shrub Vegetation derived from Cypressus Forest",
+                  "VSa/BG": "Secondary Shrub Vegetation derived from Galley Forest",
+                  "VSa/BJ": "Secondary Shrub Vegetation derived from Juniperus Forest",
+                  "VSA/BP": "Secondary Arboreal Vegetation derived from Pine Forest",
+                  "VSa/BP": "Secondary Shrub Vegetation derived from Pine Forest",
+                  "VSA/BPQ": "Secondary Arboreal Vegetation derived from Pine-Oak Forest",
+                  "VSa/BPQ": "Secondary Shrub Vegetation derived from Pine-Oak Forest",
+                  "VSA/BQ": "Secondary Arboreal Vegetation derived from Oak Forest",
+                  "VSa/BQ": "Secondary Shrub Vegetation derived from Oak Forest",
+                  "VSA/BQP": "Secondary Arboreal Vegetation derived from Oak-Pine Forest",
+                  "VSa/BQP": "Secondary Shrub Vegetation derived from Oak-Pine Forest",
+                  "VSa/BS": "Secondary Shrub Vegetation derived from Douglas-Fir and Spruce Forest",
+                  "VSa/MDM": "Secondary Shrub Vegetation derived from Desertic Microphyllous Scrub",
+                  "VSa/MDR": "Secondary Shrub Vegetation derived from Desertic Rosetophyllous Scrub",
+                  "VSa/MET": "Secondary Shrub Vegetation derived from Tamaulipan Thorn Scrub",
+                  "VSA/MK": "Secondary Arboreal Vegetation derived from Thorn Forest",
+                  "VSa/MK": "Secondary Shrub Vegetation derived from Thorn Forest",
+                  "VSa/MKX": "Secondary Shrub Vegetation derived from Desertic Thorn Forest",
+                  "VSa/ML": "Secondary Shrub Vegetation derived from Chaparral",
+                  "VSa/MSM": "Secondary Shrub Vegetation derived from Piedmont Scrub",
+                  "VSa/PH": "Secondary Shrub Vegetation derived from Halophilous Grassland",
+                  "VSa/PN": "Secondary Shrub Vegetation derived from Natural Grassland",
+                  "VSa/VG": "Secondary Shrub Vegetation derived from Gallery Vegetation",
+                  "VSa/VH": "Secondary Shrub Vegetation derived from Halophilous Xerophilous Vegetation",
+                  "VSh/BP": "Secondary Herbaceous Vegetation derived from Pine Forest",
+                  "VSh/MET": "Secondary Herbaceous Vegetation derived from Tamaulipan Thorn Scrub",
+                  "VSh/PN": "Secondary Herbaceous Vegetation derived from Natural Grassland",
+                  "VT": "Marsh Grasses",
+                  "VU": "Coastal Dune Vegetation",
+                  "VY": "Gypsophilous Vegetation",
+                  "ZU": "Urban Area"}
+
+
+# Catalogs by name and version
+CATALOGS = {"CDL":      {"2014": CDL_2014},
+            "NALCMS":   {"2010": NALCMS_2010},
+            "INEGI":    {"serie5-6": INEGI_SERIE5_6}}
+
+
+## ---------------------------------------------------------------------------
+## 2. Lookup
+## Description: The catalog is a dictionary {code: name}.
+
+# Create a Function that returns a catalog (the last version by default)
+def getCatalog(name, version=None):
+    versions = CATALOGS[name]
+    if version is None:
+        version = sorted(versions)[-1]
+    return versions[version]
+
+
+## ---------------------------------------------------------------------------
+## 3. Write the names
+## Description: Add the field of the names and fill it in a single pass of an arcpy.da.UpdateCursor
+## on the attribute table of the raster (VAT) or of the feature class. The raster is not copied. The cursor
+## writes the names in place: a join of a table of the names (Join Field) would write a copy of the table
+## and the join for a VAT of at most a few hundred rows.
+
+def addNames(table, catalog, codeField="VALUE", nameField="NAME", length=None):
+    if length is None:
+        length = max(len(name) for name in catalog.values())
+    fieldNames = [field.name.upper() for field in arcpy.ListFields(table)]
+    if nameField.upper() not in fieldNames:
+        arcpy.AddField_management(table, nameField, "TEXT", "", "", length)
+    missing = set()
+    with arcpy.da.UpdateCursor(table, [codeField, nameField]) as cursor:
+        for row in cursor:
+            name = catalog.get(row[0])
+            if name is None:
+                missing.add(row[0])
+                continue
+            cursor.updateRow([row[0], name])
+    if missing:
+        print "WARNING:", table, "codes without name", sorted(missing)
+    return missing
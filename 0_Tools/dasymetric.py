@@ -0,0 +1,190 @@
+## Name: dasymetric.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Gridded population of the Rio Grande/Bravo basin (RGB) consistent with the census tables
+##              1. Rasterize the census polygons (Population.shp, ADM2_GEOID) once on the grid of the population
+##                 density raster (zonalStats), on the window of the raster covering the polygons
+##              2. Weight of a cell: density x area of the cell (people of the raster), 0 on the excluded
+##                 land-cover classes (e.g. water), sampled from the land-cover raster through a warp map
+##              3. Redistribute the census population of each zone on its cells in proportion to the weights: the
+##                 sum of the weights per zone is computed with one bincount per block, so the cells of a zone sum
+##                 to its census population
+##              4. Report the census and gridded population of the zones
+## Usage:
+##      dasymetric.populationGrid("popdens10", "Population.shp", "ADM2_GEOID", "Pop_10", "pop10", interFolder,
+##                                interFolder, "lc10ses", [18, 19])
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import numpy as np
+
+import maskCache
+import projection
+import rasterBlocks
+import warpMap
+import zonalStats
+
+
+## ---------------------------------------------------------------------------
+## 1. Census and cells
+## Description: The census population is read from a field of the zone polygons (None is 0). The area of the
+## cells of a geographic grid depends on the latitude (area of the band of the row on the ellipsoid).
+
+NODATA = -9999.0
+
+
+# Create a Function that reads the census population of the zones: {zone: population}
+def censusTotals(shapefile, field, popField):
+    totals = {}
+    with arcpy.da.SearchCursor(shapefile, [field, popField]) as rows:
+        for zone, population in rows:
+            totals[zone] = totals.get(zone, 0.0) + float(population or 0)
+    return totals
+
+
+# Create a Function that returns the area (km2) of the cells of each row of a grid
+def cellAreas(grid):
+    if grid.crs[0] != "geographic":
+        return np.full(grid.nrows, grid.cellSize * grid.cellSize / 1e6)
+    tops = grid.ymax - np.arange(grid.nrows) * grid.cellSize
+    return projection.bandArea(tops, tops - grid.cellSize, grid.crs) * np.radians(grid.cellSize) / 1e6
+
+
+# Create a Function that returns the cell of the centroid of the zones without any cell (zones smaller than a
+# cell): {zone: (row, col)}
+def centroidCells(shapefile, field, grid, zones):
+    transform = projection.getTransformer(arcpy.Describe(shapefile).spatialReference, grid.crs)
+    cells = {}
+    with arcpy.da.SearchCursor(shapefile, [field, "SHAPE@XY"]) as rows:
+        for zone, xy in rows:
+            if zone in zones and xy is not None and xy[0] is not None:
+                x, y = transform(np.array([xy[0]]), np.array([xy[1]]))
+                row, col = grid.cellIndex(x, y)
+                if row[0] >= 0:
+                    cells[zone] = (int(row[0]), int(col[0]))
+    return cells
+
+
+## ---------------------------------------------------------------------------
+## 2. Weights
+## Description: The density is read on the window of the raster covering the zones. NoData and negative
+## densities have no weight. The land-cover class of a cell is the class of the land-cover cell at its center.
+
+class Weights(object):
+
+    def __init__(self, inRaster, grid, cacheFolder=None, landCover=None, excluded=None):
+        self.inRaster = inRaster
+        self.src = rasterBlocks.describeGrid(inRaster)
+        self.grid = grid
+        self.offset = self.src.offsetOf(grid)
+        self.areas = cellAreas(grid)
+        self.landCover = landCover
+        if landCover is not None:
+            self.lcGrid = rasterBlocks.describeGrid(landCover)
+            self.lcMap = warpMap.getWarpMap(self.lcGrid, grid, cacheFolder)
+            self.excluded = np.array(excluded or [])
+
+    def block(self, row0, col0, nrows, ncols):
+        density = rasterBlocks.readWindow(self.inRaster, self.src, self.offset[0] + row0, self.offset[1] + col0,
+                                          nrows, ncols, 0, np.float64)
+        density[~np.isfinite(density) | (density < 0)] = 0
+        weights = density * self.areas[row0:row0 + nrows, np.newaxis]
+        if self.landCover is not None:
+            classes = warpMap.gather(self.landCover, self.lcGrid, self.lcMap, row0, col0, nrows, ncols, 0, np.uint8)
+            if classes is not None:
+                weights[np.in1d(classes, self.excluded).reshape(classes.shape)] = 0
+        return weights
+
+    def cellAreas(self, row0, nrows, ncols):
+        return np.repeat(self.areas[row0:row0 + nrows, np.newaxis], ncols, axis=1)
+
+
+## ---------------------------------------------------------------------------
+## 3. Population grid
+## Description: The polygons with the same zone name (e.g. parts of a county) form one zone. Pass 1 sums the
+## weights and the area of each zone. Pass 2 writes the population of each cell: weight x census / sum of the
+## weights of the zone. The census population of a zone without weight (e.g. all its cells excluded) is spread
+## uniformly on its area, and the population of a zone without any cell is put in the cell of its centroid.
+## The cells outside the zones are NoData. Returns {zone: (census, gridded)}.
+
+def populationGrid(inRaster, zoneShapefile, zoneField, popField, outRaster, scratchFolder, cacheFolder=None,
+                   landCover=None, excluded=None, blockSize=2048):
+    src = rasterBlocks.describeGrid(inRaster)
+    edges = maskCache.maskEdges(zoneShapefile, src.crs)
+    grid = maskCache.clipGrid(maskCache.coveringGrid(src, rasterBlocks.edgesExtent(edges)), src)
+    if grid is None:
+        raise Exception("The zones {0} are outside of {1}".format(zoneShapefile, inRaster))
+    zones = zonalStats.rasterizeZones(zoneShapefile, zoneField, grid, cacheFolder)
+    weights = Weights(inRaster, grid, cacheFolder, landCover, excluded)
+    totals = censusTotals(zoneShapefile, zoneField, popField)
+
+    # Zone of each polygon index (0: outside the polygons)
+    names = []
+    index = {}
+    group = np.zeros(len(zones) + 1, dtype=np.int64)
+    for k, name in enumerate(zones.names):
+        if name not in index:
+            names.append(name)
+            index[name] = len(names)
+        group[k + 1] = index[name]
+    n = len(names) + 1
+    census = np.array([0.0] + [totals.get(name, 0.0) for name in names])
+
+    # Pass 1: weight and area of each zone
+    sumWeights = np.zeros(n)
+    sumAreas = np.zeros(n)
+    for row0, col0, nrows, ncols in grid.blocks(blockSize):
+        ids = group[np.asarray(zones.ids[row0:row0 + nrows, col0:col0 + ncols])].ravel()
+        if not ids.any():
+            continue
+        sumWeights += np.bincount(ids, weights.block(row0, col0, nrows, ncols).ravel(), n)
+        sumAreas += np.bincount(ids, weights.cellAreas(row0, nrows, ncols).ravel(), n)
+
+    factor = np.where(sumWeights > 0, census / np.where(sumWeights > 0, sumWeights, 1), 0)
+    uniform = np.where((sumWeights == 0) & (sumAreas > 0), census / np.where(sumAreas > 0, sumAreas, 1), 0)
+    missing = [k for k in range(1, n) if sumAreas[k] == 0 and census[k] > 0]
+    points = centroidCells(zoneShapefile, zoneField, grid, set(names[k - 1] for k in missing))
+
+    # Pass 2: population of the cells
+    gridded = np.zeros(n)
+    writer = rasterBlocks.BlockWriter(outRaster, grid, arcpy.Describe(inRaster).spatialReference, NODATA,
+                                      "32_BIT_FLOAT", scratchFolder)
+    for row0, col0, nrows, ncols in grid.blocks(blockSize):
+        ids = group[np.asarray(zones.ids[row0:row0 + nrows, col0:col0 + ncols])]
+        population = np.zeros((nrows, ncols))
+        if ids.any():
+            population = (weights.block(row0, col0, nrows, ncols) * factor[ids]
+                          + weights.cellAreas(row0, nrows, ncols) * uniform[ids])
+            gridded += np.bincount(ids.ravel(), population.ravel(), n)
+        inside = ids > 0
+        for k in missing:
+            cell = points.get(names[k - 1])
+            if cell is not None and row0 <= cell[0] < row0 + nrows and col0 <= cell[1] < col0 + ncols:
+                population[cell[0] - row0, cell[1] - col0] += census[k]
+                inside[cell[0] - row0, cell[1] - col0] = True
+                gridded[k] += census[k]
+        if inside.any():
+            writer.write(row0, col0, np.where(inside, population, NODATA).astype(np.float32))
+    writer.close()
+    return populationReport(names, census, gridded, totals, outRaster)
+
+
+## ---------------------------------------------------------------------------
+## 4. Report
+## Description: The gridded population of a zone is computed before the cast to float32 of the output. The zones
+## of the census without population on the grid (outside the raster) are listed.
+
+def populationReport(names, census, gridded, totals, outRaster):
+    report = dict((name, (census[k + 1], gridded[k + 1])) for k, name in enumerate(names))
+    difference = max([abs(g - c) / c for c, g in report.values() if c > 0] + [0.0])
+    print outRaster, ":", len(report), "zones - census", round(sum(totals.values()), 1), "- gridded", \
+        round(float(gridded.sum()), 1), "- max difference per zone", "{0:.2e}".format(difference)
+    lost = sorted(name for name, (c, g) in report.items() if c > 0 and g == 0)
+    if lost:
+        print "WARNING: population of", len(lost), "zones not gridded:", lost
+    outside = sorted(name for name in totals if name not in report and totals[name] > 0)
+    if outside:
+        print "WARNING:", len(outside), "zones outside of the raster:", outside
+    return report
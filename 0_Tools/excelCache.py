@@ -0,0 +1,192 @@
+## Name: excelCache.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Cached conversion of the Excel workbooks of the Rio Grande/Bravo basin (RGB) to tables
+##              1. Parse a sheet once (Excel To Table) into a typed columnar snapshot (NumPy structured array, .npy)
+##                 keyed by the content hash of the workbook, the sheet and the GEOID of the ingest
+##              2. Add the GEOID during the ingest: prefix of the country ('840' or '484') + code of the county or
+##                 municipio, in the snapshot instead of Add Field and Calculate Field on the output table
+##              3. Write the output table from the snapshot: the next runs load the snapshot memory-mapped and do
+##                 not parse the workbook again while its content is unchanged. The null values are kept (null
+##                 masks saved with the snapshot and written back as null)
+## Usage:
+##      excelCache.excelToTable("US\\Demo_cleaned.xlsx", output_tab_us, "Population", ["ISO_GEOID", "840", "ID"],
+##                              interFolder)
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import hashlib
+import os
+import re
+import numpy as np
+
+import buildCache
+
+
+## ---------------------------------------------------------------------------
+## 1. Snapshot
+## Description: The snapshot of a sheet is saved in the cache folder as excel_<workbook>_<sheet>_<key>.npy (temporary
+## file renamed when complete), with the null masks of its fields in excel_<workbook>_<sheet>_<key>.nulls.npy when
+## the sheet has null values. The older snapshots of the sheet are removed (same workbook and sheet, other key). In
+## the snapshot, the null values are stored as NaN, 0 or empty text and the masks give the null cells.
+
+SNAPSHOT_FORMAT = 2
+NULL_VALUES = {"Double": np.nan, "Single": np.nan, "Integer": 0, "SmallInteger": 0, "String": ""}
+
+
+# Create a Function that returns the full path of a dataset relative to the workspace
+def fullPath(path):
+    if os.path.splitdrive(path)[0] or path.startswith("\\\\") or arcpy.env.workspace is None:
+        return path
+    return os.path.join(arcpy.env.workspace, path.lstrip("\\/"))
+
+
+def snapshotPath(in_excel, sheet, geoid, cacheFolder):
+    key = "{0}|{1}|{2}|{3}".format(buildCache.fileHash(in_excel, {}), sheet, geoid, SNAPSHOT_FORMAT)
+    name = os.path.splitext(os.path.split(in_excel)[1])[0]
+    prefix = "excel_{0}_{1}_".format(name, sheet or "first")
+    return os.path.join(cacheFolder, prefix + hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".npy")
+
+
+def nullsPath(path):
+    return os.path.splitext(path)[0] + ".nulls.npy"
+
+
+# Create a Function that parses a sheet with Excel To Table and returns its fields as a structured array and
+# the null masks of the fields with null values (structured array of booleans, None without null values)
+def parseSheet(in_excel, sheet=None):
+    temp = "in_memory\\excelSnapshot"
+    if sheet is None:
+        arcpy.ExcelToTable_conversion(in_excel, temp)
+    else:
+        arcpy.ExcelToTable_conversion(in_excel, temp, sheet)
+    fields = [f for f in arcpy.ListFields(temp) if f.type not in ("OID", "Geometry")]
+    names = [f.name for f in fields]
+    nulls = dict((f.name, NULL_VALUES[f.type]) for f in fields if f.type in NULL_VALUES)
+    array = arcpy.da.TableToNumPyArray(temp, names, null_value=nulls)
+    masks = np.zeros(len(array), dtype=[(name, np.bool_) for name in names])
+    with arcpy.da.SearchCursor(temp, names) as rows:
+        for i, row in enumerate(rows):
+            for name, value in zip(names, row):
+                if value is None:
+                    masks[name][i] = True
+    arcpy.Delete_management(temp)
+    return array, nullMasks(masks)
+
+
+# Create a Function that keeps the masks of the fields with null values (None when no field has a null value)
+def nullMasks(masks):
+    names = [name for name in masks.dtype.names if masks[name].any()]
+    if not names:
+        return None
+    out = np.empty(len(masks), dtype=[(name, np.bool_) for name in names])
+    for name in names:
+        out[name] = masks[name]
+    return out
+
+
+def saveSnapshot(array, masks, path):
+    folder, name = os.path.split(path)
+    pattern = re.compile(re.escape(name.rsplit("_", 1)[0]) + r"_[0-9a-f]{16}(\.nulls)?\.npy$")
+    for old in os.listdir(folder):
+        if pattern.match(old):
+            os.remove(os.path.join(folder, old))
+    # The masks are saved first: the snapshot is complete when its .npy exists
+    if masks is not None:
+        np.save(nullsPath(path) + ".tmp.npy", masks)
+        os.rename(nullsPath(path) + ".tmp.npy", nullsPath(path))
+    temp = path + ".tmp.npy"
+    np.save(temp, array)
+    os.rename(temp, path)
+
+
+## ---------------------------------------------------------------------------
+## 2. GEOID
+## Description: geoid is [field, prefix, source field] (e.g. ["ISO_GEOID", "840", "FIPS"]). The numeric codes
+## are written without decimals (a code with decimals raises an error). The rows without a code get a null GEOID.
+## The GEOID is a text of 8 characters (as the field ADM2_GEOID of the counties and municipios), or the length of
+## the longest GEOID: the codes are never truncated.
+
+GEOID_LENGTH = 8
+
+
+# Create a Function that returns the GEOID of the codes of a column (empty text for the rows without a code)
+def prefixCodes(prefix, codes, missing):
+    valid = ~missing
+    if codes.dtype.kind == "f":
+        valid &= ~np.isnan(codes)
+        decimals = np.unique(codes[valid & (codes != np.floor(codes))])
+        if len(decimals):
+            raise Exception("Codes with decimals: {0}".format(", ".join(map(str, decimals[:10]))))
+    if codes.dtype.kind in "fiu":
+        text = codes.astype(np.int64).astype(np.unicode_)
+    else:
+        text = np.char.strip(codes.astype(np.unicode_))
+    valid &= text != u""
+    geoid = np.where(valid, np.char.add(unicode(prefix), text), u"")
+    length = max([GEOID_LENGTH] + np.char.str_len(geoid).tolist())
+    return geoid.astype("U{0}".format(length)), ~valid
+
+
+# Create a Function that adds (or replaces) the GEOID field of a structured array and of its null masks
+def addGeoid(array, masks, geoid):
+    field, prefix, source = geoid
+    missing = masks[source] if masks is not None and source in masks.dtype.names else np.zeros(len(array), bool)
+    values, nullGeoid = prefixCodes(prefix, array[source], missing)
+    names = [name for name in array.dtype.names if name.lower() != field.lower()]
+    out = np.empty(len(array), dtype=[(name, array.dtype[name]) for name in names] +
+                   [(field, values.dtype)])
+    for name in names:
+        out[name] = array[name]
+    out[field] = values
+
+    maskNames = [name for name in (masks.dtype.names if masks is not None else ()) if name.lower() != field.lower()]
+    outMasks = np.zeros(len(array), dtype=[(name, np.bool_) for name in maskNames] + [(field, np.bool_)])
+    for name in maskNames:
+        outMasks[name] = masks[name]
+    outMasks[field] = nullGeoid
+    return out, nullMasks(outMasks)
+
+
+## ---------------------------------------------------------------------------
+## 3. Excel To Table
+## Description: Same output as Excel To Table (followed by Add Field and Calculate Field of the GEOID). The
+## cache folder is by default the folder of the output table (the folder of its geodatabase). The cells null in
+## the workbook are written as null.
+
+# Create a Function that writes the null values of the fields of a table with null masks
+def writeNulls(table, masks):
+    names = list(masks.dtype.names)
+    anyNull = np.any([masks[name] for name in names], axis=0)
+    with arcpy.da.UpdateCursor(table, names) as cursor:
+        for i, row in enumerate(cursor):
+            if anyNull[i]:
+                cursor.updateRow([None if masks[name][i] else value for name, value in zip(names, row)])
+
+
+def excelToTable(in_excel, out_table, sheet=None, geoid=None, cacheFolder=None):
+    in_excel = fullPath(in_excel)
+    out_table = fullPath(out_table)
+    if cacheFolder is None:
+        cacheFolder = os.path.dirname(out_table)
+        while ".gdb" in cacheFolder.lower():
+            cacheFolder = os.path.dirname(cacheFolder)
+    path = snapshotPath(in_excel, sheet, geoid, cacheFolder)
+    if os.path.exists(path):
+        array = np.load(path, mmap_mode="r")
+        masks = np.load(nullsPath(path)) if os.path.exists(nullsPath(path)) else None
+        print "Excel", os.path.split(in_excel)[1], sheet or "", ": snapshot", os.path.split(path)[1]
+    else:
+        array, masks = parseSheet(in_excel, sheet)
+        if geoid is not None:
+            array, masks = addGeoid(array, masks, geoid)
+        saveSnapshot(array, masks, path)
+        print "Excel", os.path.split(in_excel)[1], sheet or "", ":", len(array), "rows parsed"
+    if arcpy.Exists(out_table):
+        arcpy.Delete_management(out_table)
+    arcpy.da.NumPyArrayToTable(np.asarray(array), out_table)
+    if masks is not None:
+        writeNulls(out_table, masks)
+    return out_table
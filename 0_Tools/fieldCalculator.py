@@ -0,0 +1,108 @@
+## Name: fieldCalculator.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Calculate several fields of a table in a single pass (replaces a series of CalculateField_management)
+##              1. Compile the field expressions (Python syntax of CalculateField, fields as !FIELD!)
+##              2. Order the expressions: an expression is evaluated after the expressions computing the fields
+##                 it reads
+##              3. Evaluate all the expressions on the columns of the table (NumPy arrays) and write the results
+##                 with one update of the table (attributeTable)
+## Usage:
+##      fieldCalculator.calculate(fc, [["DAM_HGT_m", "!DAM_HGT_f! * 0.3048"],
+##                                     ["DAM_HGT_m", "where(!DAM_HGT_m! < 0, -99, !DAM_HGT_m!)"]])
+## The expressions are evaluated on whole columns; an expression that cannot be (e.g. "!USE!.title()")
+## is evaluated row by row on the loaded columns, without reading the table again.
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import re
+import numpy as np
+
+import attributeTable
+
+
+## ---------------------------------------------------------------------------
+## 1. Compile
+
+FIELD = re.compile(r"!(\w+)!")
+
+
+class Expression(object):
+
+    def __init__(self, target, expression):
+        self.target = target
+        self.expression = expression
+        self.reads = [name for name in FIELD.findall(expression)]
+        source = FIELD.sub(lambda m: "_field({0!r})".format(m.group(1)), expression)
+        self.code = compile(source, "<{0}>".format(target), "eval")
+
+    def __repr__(self):
+        return "{0} = {1}".format(self.target, self.expression)
+
+
+## ---------------------------------------------------------------------------
+## 2. Order
+## Description: An expression reading a field depends on the expressions computing this field before it in the list
+## (or, when there is none before, after it), and on the previous expressions computing its own field.
+## The expressions are ordered topologically, keeping the order of the list when there is no dependency.
+
+def dependencyOrder(expressions):
+    depends = []
+    for i, e in enumerate(expressions):
+        deps = set(j for j in range(i) if expressions[j].target.lower() == e.target.lower())
+        for name in set(name.lower() for name in e.reads):
+            writers = [j for j, other in enumerate(expressions) if j != i and other.target.lower() == name]
+            before = [j for j in writers if j < i]
+            deps.update(before if before else writers)
+        depends.append(deps)
+    ordered = []
+    done = set()
+    while len(ordered) < len(expressions):
+        ready = [i for i in range(len(expressions)) if i not in done and depends[i] <= done]
+        if not ready:
+            raise Exception("Circular field expressions: {0}".format(expressions))
+        done.add(ready[0])
+        ordered.append(expressions[ready[0]])
+    return ordered
+
+
+## ---------------------------------------------------------------------------
+## 3. Evaluate
+
+# Functions available in the expressions
+NAMESPACE = {"where": np.where,
+             "isnull": attributeTable.isNull,
+             "np": np}
+
+
+def _evaluate(e, table):
+    namespace = dict(NAMESPACE)
+    namespace["_field"] = lambda name: table[name]
+    try:
+        # Comparisons with null values (NaN) are False
+        with np.errstate(invalid="ignore"):
+            return eval(e.code, namespace)
+    except (AttributeError, TypeError, ValueError):
+        pass
+    # Row by row (string methods, Python functions)
+    result = np.empty(len(table), dtype=object)
+    columns = dict((name, table[name]) for name in e.reads)
+    for i in range(len(table)):
+        namespace["_field"] = lambda name: attributeTable.toPython(columns[name][i])
+        result[i] = eval(e.code, namespace)
+    return result
+
+
+# Create a Function that calculates a list of [field, expression] on a table with one read and one write
+def calculate(table, expressions, where=None):
+    expressions = dependencyOrder([Expression(target, expression) for target, expression in expressions])
+    fields = []
+    for e in expressions:
+        for name in e.reads + [e.target]:
+            if name.lower() not in [f.lower() for f in fields]:
+                fields.append(name)
+    columns = attributeTable.Table(table, fields, where)
+    for e in expressions:
+        columns[e.target] = _evaluate(e, columns)
+    return columns.save()
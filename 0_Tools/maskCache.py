@@ -0,0 +1,236 @@
+## Name: maskCache.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Cache of the rasterized study area masks of the Rio Grande/Bravo basin (RGB) and windowed Extract by Mask
+##              1. Rasterize the polygons of a mask shapefile once per grid definition (coordinate system,
+##                 cell size and cell alignment of the origin) and store the cells as a bit-packed array
+##                 (.npy, 1 bit per cell) in a cache folder
+##              2. Read the mask cells of any window of a grid with the same definition (memory-mapped file)
+##              3. Extract by Mask block by block: the blocks outside the outer mask are neither read nor written,
+##                 each block inside is read once for all the outputs (_ses, _bas)
+## Usage:
+##      mask = maskCache.getMask("RGB_Ses.shp", rasterBlocks.describeGrid(raster), cacheFolder)
+##      hists = maskCache.extractByMask(raster, [["RGB_Ses.shp", "elev_ses"], ["RGB_Basin.shp", "elev_bas"]],
+##                                      scratchFolder, cacheFolder)
+## The cached masks are reused by all the rasters sharing the grid definition (e.g. the years of a dataset).
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import hashlib
+import math
+import os
+import numpy as np
+
+import projection
+import rasterBlocks
+
+
+## ---------------------------------------------------------------------------
+## 1. Cached mask
+## Description: The mask grid covers the extent of the mask polygons, aligned on the cells of the grid it was
+## built for. Cell (row, col) of the mask grid is bit (col % 8) of byte (row, col / 8) of the packed array.
+
+class Mask(object):
+
+    def __init__(self, grid, packed):
+        self.grid = grid
+        self.packed = packed
+
+    # Offset (row, col) of a grid in the mask grid (same coordinate system, cell size and cell alignment)
+    def _offset(self, grid):
+        if grid.crs != self.grid.crs or abs(grid.cellSize - self.grid.cellSize) > 1e-9 * grid.cellSize:
+            raise Exception("Grid {0} does not match the mask grid {1}".format(grid.key(), self.grid.key()))
+        return self.grid.offsetOf(grid)
+
+    # Part of the packed array covering the rows and columns of a grid (None when the grid is outside the mask)
+    def _bytes(self, grid):
+        row0, col0 = self._offset(grid)
+        r0 = max(row0, 0)
+        c0 = max(col0, 0)
+        r1 = min(row0 + grid.nrows, self.grid.nrows)
+        c1 = min(col0 + grid.ncols, self.grid.ncols)
+        if r1 <= r0 or c1 <= c0:
+            return None
+        return row0, col0, r0, c0, r1, c1
+
+    # True when some cells of a grid may be inside the mask (checked on the packed bytes, without unpacking)
+    def touches(self, grid):
+        window = self._bytes(grid)
+        if window is None:
+            return False
+        row0, col0, r0, c0, r1, c1 = window
+        return bool(self.packed[r0:r1, c0 // 8:(c1 + 7) // 8].any())
+
+    # Cells of a grid inside the mask (boolean array nrows x ncols)
+    def cells(self, grid):
+        cells = np.zeros((grid.nrows, grid.ncols), dtype=bool)
+        window = self._bytes(grid)
+        if window is None:
+            return cells
+        row0, col0, r0, c0, r1, c1 = window
+        b0 = c0 // 8
+        bits = np.unpackbits(self.packed[r0:r1, b0:(c1 + 7) // 8], axis=1)
+        cells[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = bits[:, c0 - b0 * 8:c1 - b0 * 8]
+        return cells
+
+    def extent(self):
+        return self.grid.xmin, self.grid.ymin, self.grid.xmax, self.grid.ymax
+
+
+## ---------------------------------------------------------------------------
+## 2. Cache
+## Description: The key of a cached mask is the shapefile (path, size, modification time) and the mask grid
+## (coordinate system, cell size, origin). A mask is rasterized once, by blocks of rows, in a temporary file
+## renamed when complete (an interrupted run does not leave a partial mask in the cache).
+
+_masks = {}
+
+
+# Create a Function that transforms edges (x0, y0, x1, y1) to another coordinate system
+def transformEdges(edges, srcCrs, dstCrs):
+    if projection.getCrs(srcCrs) == projection.getCrs(dstCrs):
+        return edges
+    transform = projection.getTransformer(srcCrs, dstCrs)
+    x0, y0 = transform(edges[:, 0], edges[:, 1])
+    x1, y1 = transform(edges[:, 2], edges[:, 3])
+    return np.column_stack([x0, y0, x1, y1])
+
+
+# Create a Function that reads the edges of the polygons of a shapefile in the coordinate system of a grid
+def maskEdges(shapefile, crs):
+    edges = rasterBlocks.ringEdges(rasterBlocks.readRings(shapefile))
+    return transformEdges(edges, arcpy.Describe(shapefile).spatialReference, crs)
+
+
+# Create a Function that returns the window of a grid covering an extent (xmin, ymin, xmax, ymax)
+def coveringGrid(grid, extent):
+    col0 = int(math.floor((extent[0] - grid.xmin) / grid.cellSize))
+    col1 = int(math.ceil((extent[2] - grid.xmin) / grid.cellSize))
+    row0 = int(math.floor((grid.ymax - extent[3]) / grid.cellSize))
+    row1 = int(math.ceil((grid.ymax - extent[1]) / grid.cellSize))
+    return grid.window(row0, col0, row1 - row0, col1 - col0)
+
+
+def cacheKey(shapefile, maskGrid):
+    stat = os.stat(shapefile)
+    key = "{0}|{1}|{2}|{3:.6f}|{4:.6f}|{5:.9f}|{6}|{7}|{8}".format(
+        os.path.normcase(os.path.abspath(shapefile)), stat.st_size, int(stat.st_mtime),
+        maskGrid.xmin, maskGrid.ymax, maskGrid.cellSize, maskGrid.nrows, maskGrid.ncols, maskGrid.crs)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def buildMask(edges, maskGrid, path, blockRows=1024):
+    temp = path + ".tmp.npy"
+    packed = np.lib.format.open_memmap(temp, mode="w+", dtype=np.uint8,
+                                       shape=(maskGrid.nrows, (maskGrid.ncols + 7) // 8))
+    for row0 in range(0, maskGrid.nrows, blockRows):
+        nrows = min(blockRows, maskGrid.nrows - row0)
+        cells = rasterBlocks.rasterize(edges, maskGrid.window(row0, 0, nrows, maskGrid.ncols))
+        packed[row0:row0 + nrows] = np.packbits(cells, axis=1)
+    packed.flush()
+    del packed
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(temp, path)
+
+
+# Create a Function that returns the mask of a shapefile on a grid, rasterized once and cached in a folder
+# (None keeps the mask in memory only)
+def getMask(shapefile, grid, cacheFolder=None):
+    edges = maskEdges(shapefile, grid.crs)
+    maskGrid = coveringGrid(grid, rasterBlocks.edgesExtent(edges))
+    key = cacheKey(shapefile, maskGrid)
+    if key not in _masks:
+        if cacheFolder is None:
+            packed = np.packbits(rasterBlocks.rasterize(edges, maskGrid), axis=1)
+        else:
+            name = os.path.splitext(os.path.split(shapefile)[1])[0]
+            path = os.path.join(cacheFolder, "mask_{0}_{1}.npy".format(name, key))
+            if not os.path.exists(path):
+                print "Rasterize", shapefile, "on", maskGrid.nrows, "x", maskGrid.ncols, "cells"
+                buildMask(edges, maskGrid, path)
+            packed = np.load(path, mmap_mode="r")
+        _masks[key] = Mask(maskGrid, packed)
+    return _masks[key]
+
+
+## ---------------------------------------------------------------------------
+## 3. Extract by Mask
+## Description: outputs is a list of [mask shapefile, output raster], the first mask must contain all the others
+## (e.g. RGB_Ses and RGB_Basin). The outputs keep the coordinate system, cell size and cell alignment of the
+## input raster, and cover the extent of their mask (as the tool Extract by Mask). The cells outside the mask
+## get the value nodata (by default the NoData value of the input raster).
+## Returns the histogram of each output for integer rasters (see pixelCount.store), None for float rasters.
+
+# Data type of the arrays read from a raster (pixel type of arcpy.Raster)
+DTYPES = {"U1": np.uint8, "U2": np.uint8, "U4": np.uint8, "U8": np.uint8, "S8": np.int8,
+          "U16": np.uint16, "S16": np.int16, "U32": np.uint32, "S32": np.int32,
+          "F32": np.float32, "F64": np.float64}
+
+
+# Create a Function that clips a grid to the extent of another grid with the same cell alignment
+def clipGrid(grid, extentGrid):
+    row0, col0 = extentGrid.offsetOf(grid)
+    r0 = max(row0, 0)
+    c0 = max(col0, 0)
+    r1 = min(row0 + grid.nrows, extentGrid.nrows)
+    c1 = min(col0 + grid.ncols, extentGrid.ncols)
+    if r1 <= r0 or c1 <= c0:
+        return None
+    return extentGrid.window(r0, c0, r1 - r0, c1 - c0)
+
+
+def extractByMask(inRaster, outputs, scratchFolder, cacheFolder=None, blockSize=2048, nodata=None):
+    src = rasterBlocks.describeGrid(inRaster)
+    raster = arcpy.Raster(inRaster)
+    dtype = DTYPES[raster.pixelType]
+    if nodata is None:
+        nodata = raster.noDataValue if raster.noDataValue is not None else 0
+    pixelType = rasterBlocks.PIXEL_TYPES[np.dtype(dtype).name]
+    histograms = np.dtype(dtype).kind in "ui"
+
+    writers = []
+    for shapefile, outRaster in outputs:
+        mask = getMask(shapefile, src, cacheFolder)
+        outGrid = clipGrid(mask.grid, src)
+        if outGrid is None:
+            print "WARNING:", shapefile, "is outside of", inRaster
+            outGrid = mask.grid
+        writers.append((mask, outGrid, rasterBlocks.BlockWriter(outRaster, outGrid, raster.spatialReference,
+                                                                 nodata, pixelType, scratchFolder)))
+
+    hists = [np.zeros(1, dtype=np.uint64) for w in writers]
+    outer, outerGrid, writer = writers[0]
+    if clipGrid(outer.grid, src) is not None:
+        for row0, col0, nrows, ncols in outerGrid.blocks(blockSize):
+            block = outerGrid.window(row0, col0, nrows, ncols)
+            # Skip the blocks outside the outer mask without reading the raster
+            if not outer.touches(block):
+                continue
+            inside = outer.cells(block)
+            if not inside.any():
+                continue
+            sRow0, sCol0 = src.offsetOf(block)
+            array = rasterBlocks.readWindow(inRaster, src, sRow0, sCol0, nrows, ncols, nodata, dtype)
+
+            for i, (mask, outGrid, writer) in enumerate(writers):
+                sub = clipGrid(block, outGrid)
+                if sub is None:
+                    continue
+                r0, c0 = block.offsetOf(sub)
+                cells = inside if i == 0 else mask.cells(sub)
+                if not cells.any():
+                    continue
+                values = array[r0:r0 + sub.nrows, c0:c0 + sub.ncols]
+                out = np.where(cells, values, nodata).astype(dtype)
+                if histograms:
+                    # The NoData cells of the input are not counted (nodata may be a class value, e.g. 255)
+                    hists[i] = rasterBlocks.addHistogram(hists[i], np.where(cells & (values != nodata), values, 0))
+                oRow0, oCol0 = outGrid.offsetOf(sub)
+                writer.write(oRow0, oCol0, out)
+
+    for mask, outGrid, writer in writers:
+        writer.close()
+    return hists if histograms else None
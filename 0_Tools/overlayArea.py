@@ -0,0 +1,250 @@
+## Name: overlayArea.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Area of the intersection of zone polygons with a class polygon of the Rio Grande/Bravo basin (RGB)
+##              (e.g. the counties/municipios or the SWCD with RGB_Ses), instead of Tabulate Intersection + Add Join +
+##              Copy Features + Select Layer By Attribute
+##              1. Area of the intersection of a polygon with the class polygon without building the intersection:
+##                 sum (Green's theorem) of the parts of the edges of the zone inside the class polygon and of the
+##                 edges of the class polygon inside the zone, from the candidate edges of the STR-tree only
+##              2. Fast path: a zone whose extent is in the cells of the class polygon without edge (spatialSelect)
+##                 is entirely inside (area of the zone) or outside (0), without any edge test
+##              3. Write the zones with the fields AREA (km2) and PERCENTAGE (of the area of the zone) in a single
+##                 write, the zones under an area threshold are not written
+## Usage:
+##      overlayArea.tabulateIntersection("Counties_intersect", "ADM2_GEOID", "RGB_Ses_na_albers.shp",
+##                                       "Counties_rgb", 15)
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import numpy as np
+
+import rasterBlocks
+import spatialSelect
+import studyArea
+
+
+## ---------------------------------------------------------------------------
+## 1. Area of the intersection
+## Description: The rings are oriented as arcpy (spatialSelect.clockwise), so the boundary of the intersection is
+## made of the parts of the edges of the zone inside the class polygon and of the parts of the edges of the class
+## polygon inside the zone, with their own orientation. Each edge is split at its crossings with the edges of the
+## other polygon, and a part is kept when its midpoint is inside the other polygon. The parts on a common boundary
+## (shared edges) are counted once, when both polygons run in the same direction.
+
+# Tolerance (units of the coordinate system) of the midpoints on the boundary of the other polygon
+TOLERANCE = 1e-6
+
+# Number of cells per side of the index of a zone
+ZONE_TILES = 16
+
+
+# Create a Function that returns the sum of x0 y1 - x1 y0 of segments (twice their signed area)
+def _cross(segments):
+    return float(np.sum(segments[:, 0] * segments[:, 3] - segments[:, 2] * segments[:, 1]))
+
+
+# Create a Function that returns the parameters (0 to 1) of the crossings of the segments a with the segments b of
+# the pairs (ia, ib): on a and on b. The ends of the overlaps of collinear segments are crossings.
+def _crossings(a, b):
+    ax, ay = a[:, 0], a[:, 1]
+    adx, ady = a[:, 2] - ax, a[:, 3] - ay
+    bx, by = b[:, 0], b[:, 1]
+    bdx, bdy = b[:, 2] - bx, b[:, 3] - by
+    denominator = adx * bdy - ady * bdx
+    ex, ey = bx - ax, by - ay
+    regular = denominator != 0
+    d = np.where(regular, denominator, 1)
+    t = (ex * bdy - ey * bdx) / d
+    u = (ex * ady - ey * adx) / d
+    hit = regular & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+    ta = [np.nonzero(hit)[0], t[hit]]
+    ub = [np.nonzero(hit)[0], u[hit]]
+
+    # Collinear segments: projection of the ends of each segment on the other one
+    collinear = ~regular & (np.abs(ex * ady - ey * adx) <= TOLERANCE * np.hypot(adx, ady))
+    if collinear.any():
+        k = np.nonzero(collinear)[0]
+        la = np.where(adx[k] ** 2 + ady[k] ** 2 > 0, adx[k] ** 2 + ady[k] ** 2, 1)
+        lb = np.where(bdx[k] ** 2 + bdy[k] ** 2 > 0, bdx[k] ** 2 + bdy[k] ** 2, 1)
+        for px, py in [(b[k, 0], b[k, 1]), (b[k, 2], b[k, 3])]:
+            ta.append(k)
+            ta.append(((px - ax[k]) * adx[k] + (py - ay[k]) * ady[k]) / la)
+        for px, py in [(a[k, 0], a[k, 1]), (a[k, 2], a[k, 3])]:
+            ub.append(k)
+            ub.append(((px - bx[k]) * bdx[k] + (py - by[k]) * bdy[k]) / lb)
+    return ([np.concatenate(ta[0::2]), np.concatenate(ta[1::2])],
+            [np.concatenate(ub[0::2]), np.concatenate(ub[1::2])])
+
+
+# Create a Function that splits segments at parameters (index of the segment, parameter in 0 to 1)
+def _split(segments, index, params):
+    keep = (params > 0) & (params < 1)
+    index = np.concatenate([np.arange(len(segments)), np.arange(len(segments)), index[keep]])
+    params = np.concatenate([np.zeros(len(segments)), np.ones(len(segments)), params[keep]])
+    order = np.lexsort((params, index))
+    index = index[order]
+    params = params[order]
+    same = (index[1:] == index[:-1]) & (params[1:] > params[:-1])
+    k = index[:-1][same]
+    t0 = params[:-1][same]
+    t1 = params[1:][same]
+    s = segments[k]
+    dx = s[:, 2] - s[:, 0]
+    dy = s[:, 3] - s[:, 1]
+    return np.column_stack([s[:, 0] + t0 * dx, s[:, 1] + t0 * dy, s[:, 0] + t1 * dx, s[:, 1] + t1 * dy])
+
+
+# Create a Function that tells which parts are on the boundary of a polygon (edges), and which of them run in the
+# same direction as the boundary
+def _onBoundary(parts, edges, tree):
+    mx = (parts[:, 0] + parts[:, 2]) / 2
+    my = (parts[:, 1] + parts[:, 3]) / 2
+    on = np.zeros(len(parts), dtype=bool)
+    same = np.zeros(len(parts), dtype=bool)
+    for start in range(0, len(parts), spatialSelect.BATCH):
+        x = mx[start:start + spatialSelect.BATCH]
+        y = my[start:start + spatialSelect.BATCH]
+        q, items = tree.query(np.column_stack([x - TOLERANCE, y - TOLERANCE, x + TOLERANCE, y + TOLERANCE]))
+        e = edges[items]
+        close = spatialSelect.pointSegmentDistance(x[q], y[q], e[:, 0], e[:, 1], e[:, 2], e[:, 3]) <= TOLERANCE
+        p = parts[start + q]
+        forward = ((p[:, 2] - p[:, 0]) * (e[:, 2] - e[:, 0]) + (p[:, 3] - p[:, 1]) * (e[:, 3] - e[:, 1])) > 0
+        on[start + q[close]] = True
+        same[start + q[close & forward]] = True
+    return on, same
+
+
+# Create a Function that returns the area of a polygon (rings oriented as arcpy) and the area of its intersection
+# with a target (spatialSelect.Target)
+def overlapArea(rings, target):
+    edges = rasterBlocks.ringEdges(rings)
+    area = abs(_cross(edges)) / 2
+    xmin, ymin, xmax, ymax = rasterBlocks.edgesExtent(edges)
+    if xmin > target.xmax or xmax < target.xmin or ymin > target.ymax or ymax < target.ymin:
+        return area, 0.0
+
+    # Fast path: extent of the zone in cells of the target without edge
+    j0, i0 = target.cellIndex(np.array([xmin]), np.array([ymin]))
+    j1, i1 = target.cellIndex(np.array([xmax]), np.array([ymax]))
+    if i0[0] >= 0 and i1[0] >= 0:
+        window = np.s_[j0[0]:j1[0] + 1, i0[0]:i1[0] + 1]
+        if not target.edgeCells(0.0)[window].any():
+            return area, area if (target.states[window] == spatialSelect.INSIDE).all() else 0.0
+
+    # Edges of the target in the extent of the zone
+    q, candidates = target.tree.query(np.array([[xmin, ymin, xmax, ymax]]))
+    if not len(candidates):
+        inside = target.contains(edges[:1, 0], edges[:1, 1])[0]
+        return area, area if inside else 0.0
+    targetEdges = target.edges[candidates]
+
+    # Crossings of the edges of the zone with the edges of the target (the zone is prepared as a small target)
+    zone = spatialSelect.Target(rings, ZONE_TILES)
+    zoneTree = zone.tree
+    targetBoxes = target.boxes[candidates]
+    qa = []
+    qb = []
+    for start in range(0, len(targetBoxes), spatialSelect.BATCH):
+        q, items = zoneTree.query(targetBoxes[start:start + spatialSelect.BATCH])
+        qb.append(q + start)
+        qa.append(items)
+    qa = np.concatenate(qa)
+    qb = np.concatenate(qb)
+    (ka, ta), (kb, ub) = _crossings(edges[qa], targetEdges[qb])
+    zoneParts = _split(edges, qa[ka], ta)
+    targetParts = _split(targetEdges, qb[kb], ub)
+
+    # Parts of the zone inside the target, or on its boundary in the same direction
+    on, same = _onBoundary(zoneParts, target.edges, target.tree)
+    mx = (zoneParts[:, 0] + zoneParts[:, 2]) / 2
+    my = (zoneParts[:, 1] + zoneParts[:, 3]) / 2
+    keep = np.where(on, same, target.contains(mx, my))
+    total = _cross(zoneParts[keep])
+
+    # Parts of the target inside the zone (the common boundary is already counted)
+    on, same = _onBoundary(targetParts, edges, zoneTree)
+    mx = (targetParts[:, 0] + targetParts[:, 2]) / 2
+    my = (targetParts[:, 1] + targetParts[:, 3]) / 2
+    keep = ~on & zone.contains(mx, my)
+    total += _cross(targetParts[keep])
+    return area, min(abs(total) / 2, area)
+
+
+## ---------------------------------------------------------------------------
+## 2. Tabulate intersection
+## Description: The areas are computed in the coordinate system of the zones (North America Albers Equal Area
+## Conic for geographic coordinates), in square kilometers. The features with the same zone value form one zone
+## (as Tabulate Intersection): AREA and PERCENTAGE are the values of the zone. A zone without intersection has
+## no row in the table of Tabulate Intersection, so its AREA and PERCENTAGE are null. The zones of the list
+## exclude are not written. The area threshold follows the selections of the former scripts (a null AREA is
+## neither under nor over the threshold): with strict, only the zones with AREA > minArea are written (the zones
+## without intersection are removed); otherwise the zones with AREA < minArea are removed (the zones without
+## intersection are written). Returns {zone: (AREA, PERCENTAGE)}.
+
+def zoneAreas(zoneFeatures, zoneField, classFeatures, classWhere=None):
+    spatialReference = arcpy.Describe(zoneFeatures).spatialReference
+    if spatialReference.type == "Geographic":
+        spatialReference = arcpy.SpatialReference(studyArea.ALBERS)
+    km2 = spatialReference.metersPerUnit ** 2 / 1e6
+    target = spatialSelect.getTarget(classFeatures, spatialReference, classWhere)
+    areas = {}
+    with arcpy.da.SearchCursor(zoneFeatures, [zoneField, "SHAPE@"], spatial_reference=spatialReference) as rows:
+        for zone, shape in rows:
+            if shape is None:
+                continue
+            area, overlap = overlapArea(spatialSelect.clockwise(rasterBlocks.shapeRings(shape)), target)
+            total, intersection = areas.get(zone, (0.0, 0.0))
+            areas[zone] = (total + area * km2, intersection + overlap * km2)
+    return dict((zone, (intersection, 100.0 * intersection / total if total > 0 else 0.0))
+                for zone, (total, intersection) in areas.items())
+
+
+# Create a Function that returns True when a zone is removed by the area threshold
+def underThreshold(area, minArea, strict):
+    if minArea is None:
+        return False
+    if strict:
+        return area is None or area <= minArea
+    return area is not None and area < minArea
+
+
+def tabulateIntersection(zoneFeatures, zoneField, classFeatures, outFeatures, minArea=None, exclude=None,
+                         classWhere=None, strict=False):
+    areas = zoneAreas(zoneFeatures, zoneField, classFeatures, classWhere)
+    exclude = set(exclude or [])
+    desc = arcpy.Describe(zoneFeatures)
+    inFields, outFields = studyArea.createOutput(outFeatures, zoneFeatures, desc.shapeType, desc.spatialReference)
+    upper = [field.upper() for field in outFields]
+    for field in ["AREA", "PERCENTAGE"]:
+        if field not in upper:
+            arcpy.AddField_management(outFeatures, field, "DOUBLE")
+            outFields.append(field)
+            upper.append(field)
+
+    written = 0
+    removed = set()
+    cursor = arcpy.da.InsertCursor(outFeatures, ["SHAPE@"] + outFields)
+    try:
+        with arcpy.da.SearchCursor(zoneFeatures, ["SHAPE@", zoneField] + inFields) as rows:
+            for row in rows:
+                zone = row[1]
+                area, percentage = areas.get(zone, (0.0, 0.0))
+                if area <= 0:
+                    area, percentage = None, None
+                if zone in exclude or underThreshold(area, minArea, strict):
+                    removed.add(zone)
+                    continue
+                values = list(row[2:])
+                values += [None] * (len(outFields) - len(values))
+                values[upper.index("AREA")] = area
+                values[upper.index("PERCENTAGE")] = percentage
+                cursor.insertRow([row[0]] + values)
+                written += 1
+    finally:
+        del cursor
+    print "Tabulate intersection", zoneFeatures, "with", classFeatures, ":", len(areas), "zones,", written, \
+        "features written,", len(removed), "zones removed", sorted(removed)
+    return areas
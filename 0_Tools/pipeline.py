@@ -0,0 +1,233 @@
+## Name: pipeline.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Task graph and scheduler of the preparation scripts of the Rio Grande/Bravo basin (RGB) geodatabase
+##              1. Declare a task: a preparation script with the datasets it reads (inputs) and writes (outputs)
+##              2. Build the graph: a task depends on the tasks writing its inputs
+##              3. Order the tasks topologically
+##              4. Run the tasks on a process pool: the independent tasks run in parallel, a task starts
+##                 as soon as all the tasks it depends on are completed
+##              5. Skip the tasks whose fingerprint (code, inputs, parameters) is unchanged (buildCache)
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import datetime
+import os
+import subprocess
+import sys
+import time
+import re
+import multiprocessing
+import Queue
+
+import buildCache
+
+
+## ---------------------------------------------------------------------------
+## 1. Task
+## Description: The script is a path relative to the root of the repository. The inputs and outputs are
+## paths of datasets relative to the geodatabase folder (C:\GIS_RGB\Geodatabase\).
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+GEODATABASE = "C:\\GIS_RGB\\Geodatabase\\"
+
+
+class Task(object):
+
+    def __init__(self, script, inputs=(), outputs=()):
+        self.script = script
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+
+    @property
+    def name(self):
+        return self.script
+
+    def __repr__(self):
+        return "Task({0})".format(self.script)
+
+
+## ---------------------------------------------------------------------------
+## 2. Graph
+## Description: Returns a dictionary {task name: set of the names of the tasks it depends on}.
+## The inputs written by no task are original inputs (e.g. rgb_bound).
+
+def buildGraph(tasks):
+    producers = {}
+    for task in tasks:
+        for output in task.outputs:
+            key = output.lower()
+            if key in producers:
+                raise Exception("Output {0} written by {1} and {2}".format(output, producers[key], task.name))
+            producers[key] = task.name
+    graph = {}
+    for task in tasks:
+        graph[task.name] = set(producers[i.lower()] for i in task.inputs
+                               if i.lower() in producers and producers[i.lower()] != task.name)
+    return graph
+
+
+## ---------------------------------------------------------------------------
+## 3. Topological order
+## Description: Kahn algorithm. Returns the list of the waves of tasks: all the tasks of a wave can run
+## in parallel once the previous waves are completed.
+
+def topologicalOrder(tasks):
+    graph = buildGraph(tasks)
+    remaining = dict((name, set(deps)) for name, deps in graph.items())
+    waves = []
+    while remaining:
+        wave = sorted(name for name, deps in remaining.items() if not deps)
+        if not wave:
+            raise Exception("Cycle in the task graph: {0}".format(sorted(remaining)))
+        for name in wave:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(wave)
+        waves.append(wave)
+    return waves
+
+
+# Create a Function that returns the tasks and all the tasks they depend on
+def withDependencies(tasks, names):
+    graph = buildGraph(tasks)
+    selected = set()
+    stack = list(names)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(graph[name])
+    return [task for task in tasks if task.name in selected]
+
+
+## ---------------------------------------------------------------------------
+## 4. Run
+## Description: Each task runs its script in a new Python process (the ArcGIS Python by default).
+## The output of each script is written in a log file. When a task fails, the tasks depending on it are skipped.
+## When a task cannot be run (e.g. the log file or the Python executable cannot be opened), the error is returned
+## with the task and the run stops: no new task is started and the remaining tasks are skipped.
+
+def runScript(script, python, logFolder):
+    start = time.time()
+    try:
+        path = os.path.join(ROOT, script)
+        logFile = os.path.join(logFolder, os.path.splitext(script.replace("/", "_").replace("\\", "_"))[0] + ".log")
+        with open(logFile, "w") as log:
+            returnCode = subprocess.call([python, path], cwd=os.path.dirname(path), stdout=log,
+                                         stderr=subprocess.STDOUT)
+    except Exception as e:
+        return script, None, time.time() - start, "{0}: {1}".format(type(e).__name__, e)
+    return script, returnCode, time.time() - start, None
+
+
+## ---------------------------------------------------------------------------
+## 5. Fingerprint of a task
+## Description: The code of a task is the script and the shared tools it imports. The inputs are the declared
+## inputs and the original_input folders read by the script.
+
+def taskStep(task, manifest, python, geodatabase):
+    with open(os.path.join(ROOT, task.script)) as f:
+        code = f.read()
+    for module in sorted(set(re.findall(r"^import (\w+)", code, re.M))):
+        path = os.path.join(TOOLS, module + ".py")
+        if os.path.exists(path):
+            with open(path) as f:
+                code += f.read()
+    sources = sorted(set(p.replace("\\\\", "\\") for p in re.findall(r'"([A-Z]:\\\\GIS_RGB\\\\[^"]*original_input[^"]*)"', code)))
+    inputs = [os.path.join(geodatabase, i) for i in task.inputs] + sources
+    outputs = [os.path.join(geodatabase, o) for o in task.outputs]
+    return buildCache.Step(manifest, task.name, inputs, outputs, [python], code)
+
+
+def run(tasks, processes=None, python=sys.executable, logFolder=None, manifestFile=None, geodatabase=GEODATABASE):
+    graph = buildGraph(tasks)
+    byName = dict((task.name, task) for task in tasks)
+    # Check the graph before running anything
+    topologicalOrder(tasks)
+    if logFolder is None:
+        logFolder = os.path.join(ROOT, "logs")
+    if not os.path.exists(logFolder):
+        os.makedirs(logFolder)
+
+    remaining = dict((name, set(deps)) for name, deps in graph.items())
+    dependents = dict((name, set()) for name in graph)
+    for name, deps in graph.items():
+        for dep in deps:
+            dependents[dep].add(name)
+
+    done = Queue.Queue()
+    pool = multiprocessing.Pool(processes)
+    running = set()
+    status = {}
+    steps = {}
+    manifest = buildCache.loadManifest(manifestFile) if manifestFile else None
+    stopped = []
+
+    def release(name):
+        del remaining[name]
+        for child in dependents[name]:
+            if child in remaining:
+                remaining[child].discard(name)
+
+    def submit():
+        if stopped:
+            return
+        ready = True
+        while ready:
+            ready = False
+            for name in sorted(remaining):
+                if remaining[name] or name in running:
+                    continue
+                if manifest is not None:
+                    steps[name] = taskStep(byName[name], manifest, python, geodatabase)
+                    if not steps[name].run:
+                        # Unchanged: the outputs of the previous run are reused
+                        status[name] = "CACHED"
+                        release(name)
+                        ready = True
+                        continue
+                running.add(name)
+                print "Start", name, "at", datetime.datetime.now().strftime("%I:%M:%S%p")
+                pool.apply_async(runScript, (name, python, logFolder), callback=done.put)
+
+    def skip(name):
+        for child in dependents[name]:
+            if child in remaining:
+                del remaining[child]
+                status[child] = "SKIPPED"
+                print "Skip", child, "(depends on", name + ")"
+                skip(child)
+
+    submit()
+    while running:
+        name, returnCode, seconds, error = done.get()
+        running.discard(name)
+        if error is not None:
+            del remaining[name]
+            status[name] = "FAILED"
+            print "ERROR: task", name, "could not be run (" + error + "), the run stops"
+            stopped.append(name)
+            for child in sorted(remaining):
+                if child not in running:
+                    del remaining[child]
+                    status[child] = "SKIPPED"
+                    print "Skip", child, "(run stopped by", name + ")"
+        elif returnCode == 0:
+            status[name] = "OK"
+            print "Task", name, "completed in", int(seconds), "s at", datetime.datetime.now().strftime("%I:%M:%S%p")
+            if name in steps:
+                steps[name].done()
+            release(name)
+        else:
+            del remaining[name]
+            status[name] = "FAILED"
+            print "ERROR: task", name, "failed (return code", str(returnCode) + "), see", logFolder
+            skip(name)
+        submit()
+
+    pool.close()
+    pool.join()
+    return status
@@ -0,0 +1,285 @@
+## Name: pipelineTasks.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Task graph of the preparation scripts of the Rio Grande/Bravo basin (RGB) geodatabase
+## Each script declares the datasets it reads from the other scripts (inputs) and the final datasets it writes
+## (outputs). The study area boundaries (rgb_bound) and the original_input folders are not written by any script.
+## The scripts whose outputs are named after a listing of their inputs (ListFeatureClasses, Split By Attributes)
+## declare no outputs: they are executed at each run of the pipeline (buildCache).
+## Paths are relative to the geodatabase folder (C:\GIS_RGB\Geodatabase\).
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+from pipeline import Task
+
+
+## ---------------------------------------------------------------------------
+## Datasets shared between the scripts
+
+# Political jurisdictions
+COUNTIES = "Water_Governance\\1_political_jurisdictions\\final_output\\Census\\Counties_and_Municipios.shp"
+COUNTIES_RGB = "Water_Governance\\1_political_jurisdictions\\final_output\\Census\\Counties_and_Municipios_rgb.shp"
+NATIONS = "Water_Governance\\1_political_jurisdictions\\final_output\\Census\\Nations.shp"
+STATES = "Water_Governance\\1_political_jurisdictions\\final_output\\Census\\States.shp"
+PLACES = "Water_Governance\\1_political_jurisdictions\\final_output\\Census\\Places.shp"
+PLACES_RGB = "Water_Governance\\1_political_jurisdictions\\final_output\\Census\\Places_rgb.shp"
+# 2_SJCP.py reads Places.shp from final_output (not from final_output\Census)
+PLACES_SJCP = "Water_Governance\\1_political_jurisdictions\\final_output\\Places.shp"
+
+# Irrigation districts
+NM_IRRIGATION_SES = "Water_Governance\\7_irrigation_organization\\final_output\\NM_Irrigation_Districts_ses.shp"
+TX_WATER_DISTRICTS_SES = "Water_Governance\\7_irrigation_organization\\final_output\\TX_Water_Districts_ses.shp"
+MX_DISTRITOS_SES = "Water_Governance\\7_irrigation_organization\\final_output\\MX_Distritos_Riego_ses.shp"
+
+# Hydrology
+SUB_BASINS = "Hydrology\\1_basin\\final_output\\Sub_Basins.shp"
+RGB_BASIN = "Hydrology\\1_basin\\final_output\\RGB_Basin.shp"
+GAUGES_USGS_SES = "Hydrology\\6_gauges\\final_output\\Gauges_usgs_ses.shp"
+
+# Water rights and dams
+CO_WATER_RIGHTS = "Hydrau_WaterUse\\3_waterRights\\final_output\\CO_WaterRights.shp"
+NM_WATER_RIGHTS = "Hydrau_WaterUse\\3_waterRights\\final_output\\NM_WaterRights.shp"
+DAMS_US_BAS = "Hydrau_WaterUse\\4_dams\\final_output\\Dams_us_bas.shp"
+DAMS_US_SES = "Hydrau_WaterUse\\4_dams\\final_output\\Dams_us_ses.shp"
+DAMS_MX_BAS = "Hydrau_WaterUse\\4_dams\\final_output\\Dams_mx_bas.shp"
+DAMS_MX_SES = "Hydrau_WaterUse\\4_dams\\final_output\\Dams_mx_ses.shp"
+
+# Population
+POPULATION = "Socio_Economics\\1_Population\\final_output\\Census\\Population.shp"
+
+# Elevation and land cover
+ELEVATION_BAS = "Biophysical\\4_elevation\\final_output\\elev_bas"
+ELEVATION_SES = "Biophysical\\4_elevation\\final_output\\elev_ses"
+LAND_COVER_SES = "Biophysical\\6_landcover\\final_output\\lc10ses"
+
+
+## ---------------------------------------------------------------------------
+## Folders of the final outputs
+
+GOVERNANCE = "Water_Governance\\"
+JURISDICTIONS = GOVERNANCE + "1_political_jurisdictions\\final_output\\"
+BINATIONAL = GOVERNANCE + "2_binational_agency\\final_output\\"
+FEDERAL = GOVERNANCE + "3_federal_agency\\final_output\\"
+STATE_AGENCY = GOVERNANCE + "4_state_agency\\final_output\\"
+PLATFORMS = GOVERNANCE + "5_multi_stakeholders_platforms\\final_output\\"
+GROUNDWATER = GOVERNANCE + "6_groundwater_agency\\final_output\\"
+LAND_MANAGEMENT = GOVERNANCE + "8_land_management\\final_output\\"
+PROTECTED_AREAS = GOVERNANCE + "9_protected_areas\\final_output\\"
+BORDER = GOVERNANCE + "10_border_control\\final_output\\"
+SWCD = GOVERNANCE + "11_SWCD\\final_output\\"
+CONSERVATION = GOVERNANCE + "12_conservation_projects\\final_output\\"
+HYDROLOGY = "Hydrology\\"
+WATER_USE = "Hydrau_WaterUse\\"
+WATER_RIGHTS = WATER_USE + "3_waterRights\\final_output\\"
+DIVERSION = WATER_USE + "5_Diversion\\final_output\\"
+WELLS = WATER_USE + "6_Wells\\final_output\\"
+SOCIO_ECONOMICS = "Socio_Economics\\"
+INCOME = SOCIO_ECONOMICS + "3_income\\final_output\\Census\\"
+FARM_SIZE = SOCIO_ECONOMICS + "4_farmSize\\final_output\\Census\\"
+BIOPHYSICAL = "Biophysical\\"
+HABITAT = BIOPHYSICAL + "2_Habitat\\final_output\\"
+CROPLAND = BIOPHYSICAL + "7_landuse\\US_nass\\final_output\\"
+LAND_USE_MX = BIOPHYSICAL + "7_landuse\\MX_Census\\final_output\\Census\\"
+
+
+# Create a Function that returns the outputs of a folder
+def finalFiles(folder, names, extension=".shp"):
+    return [folder + name + extension for name in names]
+
+
+# Create a Function that returns the outputs of the basin (_bas) and of the socio-economic study area (_ses)
+def studyAreaFiles(folder, names, extension=".shp"):
+    return [folder + name + suffix + extension for name in names for suffix in ("_bas", "_ses")]
+
+
+## ---------------------------------------------------------------------------
+## Tasks
+
+TASKS = [
+    # 1. Water Management
+    Task("1_WaterManagement/1_PoliticalJuridisctions/1_PoliticalJurisdictions_Counties.py",
+         outputs=[COUNTIES, COUNTIES_RGB]),
+    Task("1_WaterManagement/1_PoliticalJuridisctions/1_PoliticalJurisdictions_Nation.py",
+         outputs=[NATIONS]),
+    Task("1_WaterManagement/1_PoliticalJuridisctions/1_PoliticalJurisdictions_States.py",
+         outputs=[STATES]),
+    Task("1_WaterManagement/1_PoliticalJuridisctions/2_Places.py",
+         inputs=[COUNTIES_RGB],
+         outputs=[PLACES, PLACES_RGB]),
+    Task("1_WaterManagement/1_PoliticalJuridisctions/3_Cities.py",
+         outputs=studyAreaFiles(JURISDICTIONS, ["Populated_Places"])),
+    Task("1_WaterManagement/2_BinationalWaterAgency/1_BinationalDams.py",
+         inputs=[DAMS_US_BAS, DAMS_US_SES],
+         outputs=studyAreaFiles(BINATIONAL, ["Binational_Dams"])),
+    Task("1_WaterManagement/2_BinationalWaterAgency/2_IBWC_Offices.py",
+         outputs=studyAreaFiles(BINATIONAL, ["IBWC_Offices"])),
+    Task("1_WaterManagement/2_BinationalWaterAgency/3_IBWC_Levees.py",
+         outputs=studyAreaFiles(BINATIONAL, ["US_Canals", "US_Culverts", "US_DrainageDitches", "US_Gates",
+                                              "US_Laterals", "US_Levees", "US_MowAreas", "US_Ramps", "US_Riprap",
+                                              "US_ToeDrains", "US_Wasteways"])),
+    Task("1_WaterManagement/3_FederalWaterAgency/1_FederalDams.py",
+         inputs=[DAMS_US_BAS, DAMS_US_SES, DAMS_MX_BAS, DAMS_MX_SES],
+         outputs=studyAreaFiles(FEDERAL, ["Federal_Dams_us", "Federal_Dams_mx"])),
+    Task("1_WaterManagement/4_StateWaterAgency/1_Colorado.py",
+         outputs=[STATE_AGENCY + "CDWR_div3_districts.shp", STATE_AGENCY + "CDWR_divisions.shp",
+                  STATE_AGENCY + "CDWR_div3.shp"]),
+    Task("1_WaterManagement/4_StateWaterAgency/2_NewMexico_OSE.py",
+         outputs=[STATE_AGENCY + "NMOSE_WaterMasters.shp", STATE_AGENCY + "NMOSE_WaterMasters_RG.shp"]),
+    Task("1_WaterManagement/4_StateWaterAgency/2_NewMexico_WaterPlanning.py",
+         outputs=[STATE_AGENCY + "NMOSE_WaterPlanningRegions.shp",
+                  STATE_AGENCY + "NMOSE_WaterPlanningRegions_RG.shp"]),
+    Task("1_WaterManagement/4_StateWaterAgency/3_Texas_TCEQ.py",
+         outputs=[STATE_AGENCY + "TCEQ_service_regions.shp", STATE_AGENCY + "TCEQ_service_regions_RG.shp"]),
+    Task("1_WaterManagement/4_StateWaterAgency/3_Texas_TWDB.py"),
+    Task("1_WaterManagement/4_StateWaterAgency/4_MX_States_Conagua_Offices.py",
+         inputs=[STATES],
+         outputs=[STATE_AGENCY + "MX_State_Conagua_Offices.shp"]),
+    Task("1_WaterManagement/4_StateWaterAgency/4_MX_Water_Sewerage_Agencies.py",
+         inputs=[STATES]),
+    Task("1_WaterManagement/5_MultiStakeholderPlatforms/1_CompactBasin.py",
+         outputs=[PLATFORMS + "Interstate_Compacts.shp"]),
+    Task("1_WaterManagement/5_MultiStakeholderPlatforms/1_CompactDams.py",
+         inputs=[DAMS_US_SES],
+         outputs=[PLATFORMS + "RG_Compact_Dams.shp"]),
+    Task("1_WaterManagement/5_MultiStakeholderPlatforms/1_CompactGages.py",
+         inputs=[GAUGES_USGS_SES],
+         outputs=[PLATFORMS + "RG_Compact_Gauges.shp"]),
+    Task("1_WaterManagement/5_MultiStakeholderPlatforms/2_SJCP.py",
+         inputs=[COUNTIES, PLACES_SJCP, NM_IRRIGATION_SES],
+         outputs=[PLATFORMS + "SJCP_Tunnel.shp", PLATFORMS + "SJCP_Reservoirs.shp", PLATFORMS + "SJCP_Users.shp"]),
+    Task("1_WaterManagement/5_MultiStakeholderPlatforms/3_RGProjectDams.py",
+         inputs=[DAMS_US_SES],
+         outputs=[PLATFORMS + "RG_Project_Dams.shp"]),
+    Task("1_WaterManagement/5_MultiStakeholderPlatforms/3_RGProjectIrrigationDistricts.py",
+         inputs=[TX_WATER_DISTRICTS_SES, NM_IRRIGATION_SES, MX_DISTRITOS_SES],
+         outputs=[PLATFORMS + "RG_Project_Irrigation_Districts.shp"]),
+    Task("1_WaterManagement/5_MultiStakeholderPlatforms/4_ConsejoCuenca.py",
+         outputs=[PLATFORMS + "MX_Consejo_Cuenca.shp"]),
+    Task("1_WaterManagement/5_MultiStakeholderPlatforms/5_CO_Roundtable.py",
+         inputs=[STATES],
+         outputs=[PLATFORMS + "CO_RGRoundtable.shp"]),
+    Task("1_WaterManagement/6_GroundwaterAgency/1_CO_Augmentation_Replacement_plans.py",
+         inputs=[CO_WATER_RIGHTS],
+         outputs=[GROUNDWATER + "CO_Augment_replacement_plans.shp"]),
+    Task("1_WaterManagement/6_GroundwaterAgency/1_CO_Subdistricts.py",
+         outputs=[GROUNDWATER + "CO_RGWCD_bound.shp", GROUNDWATER + "CO_ClosedBasin_bound.shp",
+                  GROUNDWATER + "CO_Subdistricts_bound.shp"]),
+    Task("1_WaterManagement/6_GroundwaterAgency/1_RGWCD_Wells.py",
+         outputs=[GROUNDWATER + "CO_RGWCD_Wells.shp"]),
+    Task("1_WaterManagement/6_GroundwaterAgency/2_NewMexico_DeclaredBasins.py",
+         outputs=[GROUNDWATER + "NM_declared_GW_basins.shp"]),
+    Task("1_WaterManagement/6_GroundwaterAgency/3_TX_GW.py",
+         outputs=studyAreaFiles(GROUNDWATER, ["TX_GMA", "TX_GCD", "TX_PGMA"])),
+    Task("1_WaterManagement/6_GroundwaterAgency/4_Transboundary_TAAP.py",
+         outputs=[GROUNDWATER + "TAAP_Aquifers.shp"]),
+    Task("1_WaterManagement/7_IrrigationDistricts/1_IrrigationOrganizations.py",
+         outputs=[NM_IRRIGATION_SES, TX_WATER_DISTRICTS_SES, MX_DISTRITOS_SES]),
+    Task("1_WaterManagement/8_LandManagement/1_LandManagement.py",
+         outputs=studyAreaFiles(LAND_MANAGEMENT, ["Land_Management"])),
+    Task("1_WaterManagement/9_ProtectedAreas/1_ProtectedAreas.py",
+         outputs=studyAreaFiles(PROTECTED_AREAS, ["CEC_Protected_Areas"])),
+    Task("1_WaterManagement/10_BorderControl/1_BorderFenceCrossingSectors.py",
+         outputs=studyAreaFiles(BORDER, ["Border_Fences", "Border_Crossings"]) + [BORDER + "Border_Sectors.shp"]),
+    Task("1_WaterManagement/11_SWCD/1_SWCD.py",
+         outputs=[SWCD + "SWCD.shp"]),
+    Task("1_WaterManagement/12_ConservationProjects/1_CO_ISF.py",
+         outputs=finalFiles(CONSERVATION, ["CO_ISF_Reaches", "CO_ISF_Termini", "CO_Lakes"])),
+    Task("1_WaterManagement/12_ConservationProjects/1_TransboundaryProjects.py",
+         outputs=finalFiles(CONSERVATION, ["LCC_networks", "Bird_Conservation_JoinVentures"])),
+
+    # 2. Hydrology
+    Task("2_Hydrology/1_Basin.py",
+         outputs=[SUB_BASINS, RGB_BASIN]),
+    Task("2_Hydrology/2_River.py",
+         outputs=[HYDROLOGY + "2_river\\final_output\\Rivers.shp"]),
+    Task("2_Hydrology/3_Aquifer.py",
+         outputs=[HYDROLOGY + "5_aquifer\\final_output\\Aquifer.shp"]),
+    Task("2_Hydrology/4_Gauges.py",
+         outputs=[GAUGES_USGS_SES]),
+    Task("2_Hydrology/5_Quality_Stations.py",
+         outputs=studyAreaFiles(HYDROLOGY + "7_quality_stations\\final_output\\", ["Quality_Stations"])),
+
+    # 3. Hydraulic infrastructure and Water Use
+    Task("3_Hydrau_WaterUse/1_WaterUse.py",
+         inputs=[COUNTIES_RGB],
+         outputs=[WATER_USE + "1_waterUse\\final_output\\Census\\Withdrawals_2015.shp"]),
+    Task("3_Hydrau_WaterUse/2_Irrigation.py",
+         inputs=[COUNTIES_RGB],
+         outputs=finalFiles(WATER_USE + "2_Irrigation\\final_output\\Census\\", ["Irrigation_MX", "Irrigation_US"])),
+    Task("3_Hydrau_WaterUse/3_WaterRights_CO.py",
+         outputs=[CO_WATER_RIGHTS]),
+    Task("3_Hydrau_WaterUse/3_WaterRights_MX.py",
+         inputs=[NATIONS],
+         outputs=finalFiles(WATER_RIGHTS, ["COA_WaterRights", "CHI_WaterRights", "DUR_WaterRights", "NVL_WaterRights",
+                                   "TAM_WaterRights"])),
+    Task("3_Hydrau_WaterUse/3_WaterRights_NM.py",
+         outputs=[NM_WATER_RIGHTS]),
+    Task("3_Hydrau_WaterUse/3_WaterRights_TX.py",
+         outputs=[WATER_RIGHTS + "TX_WaterRights.shp"]),
+    Task("3_Hydrau_WaterUse/4_DamsMXCenapred.py",
+         outputs=[DAMS_MX_BAS, DAMS_MX_SES]),
+    Task("3_Hydrau_WaterUse/4_DamsUSNID.py",
+         outputs=[DAMS_US_BAS, DAMS_US_SES]),
+    Task("3_Hydrau_WaterUse/5_Diversion_co.py",
+         outputs=[DIVERSION + "Diversion_CO.shp"]),
+    Task("3_Hydrau_WaterUse/5_Diversion_mx.py",
+         outputs=studyAreaFiles(DIVERSION, ["Diversion_MX"])),
+    Task("3_Hydrau_WaterUse/5_Diversion_us.py",
+         outputs=studyAreaFiles(DIVERSION, ["Diversion_US"])),
+    Task("3_Hydrau_WaterUse/6_Wells_co_cdss.py",
+         outputs=[WELLS + "Wells_co_cdss.shp"]),
+    Task("3_Hydrau_WaterUse/6_Wells_nm_ose.py",
+         inputs=[NM_WATER_RIGHTS],
+         outputs=[WELLS + "Wells_nm_nmose.shp"]),
+    Task("3_Hydrau_WaterUse/6_Wells_tx_twbd.py",
+         outputs=studyAreaFiles(WELLS, ["Wells_tx_twdb"])),
+    Task("3_Hydrau_WaterUse/6_Wells_us_nhd.py",
+         outputs=studyAreaFiles(WELLS, ["Wells_us_nhd"])),
+
+    # 4. Socio-economic
+    Task("4_Socio_economic/1_Population.py",
+         inputs=[COUNTIES_RGB],
+         outputs=[POPULATION]),
+    Task("4_Socio_economic/2_PopDensityWGS84.py",
+         inputs=[POPULATION, LAND_COVER_SES]),
+    Task("4_Socio_economic/3_Income.py",
+         inputs=[COUNTIES_RGB],
+         outputs=finalFiles(INCOME, ["Income_US", "DistributionIncome_MX90", "DistributionIncome_MX00",
+                                     "DistributionIncome_MX10"])),
+    Task("4_Socio_economic/4_farmSize.py",
+         inputs=[COUNTIES_RGB],
+         outputs=finalFiles(FARM_SIZE, ["Farms_US2007", "Farms_US2012", "Farms_MX2007"])),
+    Task("4_Socio_economic/5_Roads.py",
+         outputs=studyAreaFiles(SOCIO_ECONOMICS + "5_Road\\final_output\\", ["Roads"])),
+    Task("4_Socio_economic/6_Railroads.py",
+         outputs=studyAreaFiles(SOCIO_ECONOMICS + "6_Railroad\\final_output\\", ["Railroads"])),
+
+    # 5. Biophysical
+    Task("5_Biophysical/1_Ecoregion.py"),
+    Task("5_Biophysical/2_Habitat_MX_1_SAP_SPR.py",
+         outputs=[HABITAT + "MX_SAP.shp", HABITAT + "MX_SPR.shp"]),
+    Task("5_Biophysical/2_Habitat_MX_2_Ramsar.py",
+         outputs=[HABITAT + "MX_Ramsar_Site.shp"]),
+    Task("5_Biophysical/2_Habitat_US.py"),
+    Task("5_Biophysical/3_Soil.py",
+         outputs=studyAreaFiles(BIOPHYSICAL + "3_soil\\final_output\\", ["soil"])),
+    Task("5_Biophysical/4_Elevation.py",
+         outputs=[ELEVATION_BAS, ELEVATION_SES]),
+    Task("5_Biophysical/5_Slope.py",
+         inputs=[ELEVATION_BAS, ELEVATION_SES],
+         outputs=finalFiles(BIOPHYSICAL + "5_slope\\final_output\\", ["slopedegbas", "slopedegses", "slopepctbas",
+                                                                      "slopepctses"], "")),
+    Task("5_Biophysical/6_LandCover.py",
+         outputs=[LAND_COVER_SES]),
+    Task("5_Biophysical/7_RasterUSCropLand.py",
+         inputs=[COUNTIES_RGB, NM_IRRIGATION_SES, TX_WATER_DISTRICTS_SES],
+         outputs=[CROPLAND + "cdl" + str(year) + suffix for year in range(2008, 2019) for suffix in ["ses", "bas"]] +
+                 [CROPLAND + "cdl_" + zone + "_" + suffix + ".dbf"
+                  for zone in ["counties", "nm_irrig", "tx_water"] for suffix in ["ses", "bas"]]),
+    Task("5_Biophysical/7_ShapeLandUseMXCensus.py",
+         inputs=[COUNTIES_RGB],
+         outputs=finalFiles(LAND_USE_MX, ["MX_percrop07", "MX_ancrop_winter07", "MX_ancrop_spring07"])),
+    Task("5_Biophysical/7_ShapeLandUseMXINEGI.py",
+         outputs=finalFiles(BIOPHYSICAL + "7_landuse\\MX_inegi\\final_output\\", ["MX_LU_2011", "MX_LU_2014"])),
+]
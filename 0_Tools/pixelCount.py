@@ -0,0 +1,122 @@
+## Name: pixelCount.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Pixel accounting of the raster datasets for the Rio Grande/Bravo basin (RGB)
+##              1. Compute the histogram of the values of a raster once (uint64 bincount over blocks)
+##              2. Cache the histograms by path and modification time (in memory and in a json file)
+##              3. Count the pixels (total, per class) and compare two rasters in O(classes)
+## NoData cells are read as 0, so they are counted in the class 0 and never in the total.
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import json
+import os
+import numpy as np
+
+import rasterBlocks
+
+
+## ---------------------------------------------------------------------------
+## 1. Cache
+## Description: The histograms are stored by absolute path with the modification time of the raster.
+## Set cacheFile to a json file to keep the histograms between two runs.
+
+cacheFile = None
+_cache = {}
+_loaded = [False]
+
+
+# Create a Function that returns the absolute path of a raster (relative to the workspace)
+def rasterPath(raster):
+    raster = str(raster)
+    if not os.path.isabs(raster) and arcpy.env.workspace:
+        raster = os.path.join(arcpy.env.workspace, raster)
+    return os.path.normcase(os.path.abspath(raster))
+
+
+# Create a Function that returns the modification time of a raster (a GRID is a folder)
+def rasterTime(path):
+    if os.path.isdir(path):
+        times = [os.path.getmtime(os.path.join(path, f)) for f in os.listdir(path)]
+        return max(times + [os.path.getmtime(path)])
+    return os.path.getmtime(path)
+
+
+def _load():
+    if _loaded[0]:
+        return
+    _loaded[0] = True
+    if cacheFile and os.path.exists(cacheFile):
+        with open(cacheFile) as f:
+            for path, (mtime, hist) in json.load(f).items():
+                _cache[path] = (mtime, np.array(hist, dtype=np.uint64))
+
+
+def _save():
+    if not cacheFile:
+        return
+    data = dict((path, (mtime, [int(c) for c in hist])) for path, (mtime, hist) in _cache.items())
+    with open(cacheFile, "w") as f:
+        json.dump(data, f)
+
+
+# Create a Function that stores the histogram of a raster computed by another tool (e.g. rasterBlocks)
+def store(raster, hist):
+    _load()
+    path = rasterPath(raster)
+    _cache[path] = (rasterTime(path), np.asarray(hist, dtype=np.uint64))
+    _save()
+
+
+## ---------------------------------------------------------------------------
+## 2. Histogram
+## Description: The histogram is a uint64 array indexed by the value of the cells (integer rasters).
+
+def histogram(raster, blockSize=4096):
+    _load()
+    path = rasterPath(raster)
+    mtime = rasterTime(path)
+    if path in _cache and _cache[path][0] == mtime:
+        return _cache[path][1]
+    grid = rasterBlocks.describeGrid(path)
+    hist = np.zeros(1, dtype=np.uint64)
+    for row0, col0, nrows, ncols in grid.blocks(blockSize):
+        hist = rasterBlocks.addHistogram(hist, rasterBlocks.readWindow(path, grid, row0, col0, nrows, ncols, 0))
+    _cache[path] = (mtime, hist)
+    _save()
+    return hist
+
+
+## ---------------------------------------------------------------------------
+## 3. Count the pixels
+## Description: All the counts are computed from the cached histograms.
+
+# Total number of pixels, without the excluded classes (0 is always excluded)
+def totalPixels(raster, exclude=(0,)):
+    hist = histogram(raster)
+    total = int(hist.sum())
+    for value in set(exclude) | set([0]):
+        if value < len(hist):
+            total -= int(hist[value])
+    return total
+
+
+# Number of pixels per class
+def classPixels(raster):
+    hist = histogram(raster)
+    values = np.nonzero(hist)[0]
+    return dict((int(v), int(hist[v])) for v in values if v > 0)
+
+
+# Difference of the number of pixels per class between the stage A and the stage B
+def delta(rasterA, rasterB):
+    a = histogram(rasterA).astype(np.int64)
+    b = histogram(rasterB).astype(np.int64)
+    size = max(len(a), len(b))
+    diff = np.zeros(size, dtype=np.int64)
+    diff[:len(a)] += a
+    diff[:len(b)] -= b
+    diff[0] = 0
+    return dict((int(v), int(diff[v])) for v in np.nonzero(diff)[0])
@@ -0,0 +1,219 @@
+## Name: projection.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Vectorized coordinate transformations used by the raster and vector tools
+##              1. Define the coordinate systems used in the Rio Grande/Bravo basin (RGB) geodatabase
+##              2. Albers Equal Area Conic (ellipsoidal) forward and inverse projections with NumPy
+##              3. Lambert Azimuthal Equal Area (ellipsoidal or spherical, e.g. NALCMS land cover) forward and
+##                 inverse projections with NumPy
+##              4. Cached transformer between two coordinate systems
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import numpy as np
+
+
+## ---------------------------------------------------------------------------
+## 1. Coordinate systems
+## Description: A coordinate system is a tuple (type, a, f, lat0, lon0, lat1, lat2, false_easting, false_northing).
+## The standard parallels (lat1, lat2) of the Lambert Azimuthal Equal Area are 0.
+## NAD 1983 and WGS 1984 are treated as the same datum (no geographic transformation), as in the ArcGIS
+## tools run by the preparation scripts.
+
+GRS80_A = 6378137.0
+GRS80_F = 1 / 298.257222101
+WGS84_F = 1 / 298.257223563
+
+CRS = {"GCS_WGS_1984":                                  ("geographic", GRS80_A, WGS84_F, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+       "GCS_North_American_1983":                       ("geographic", GRS80_A, GRS80_F, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+       "North America Albers Equal Area Conic":         ("albers", GRS80_A, GRS80_F, 40.0, -96.0, 20.0, 60.0, 0.0, 0.0),
+       "USA Contiguous Albers Equal Area Conic":        ("albers", GRS80_A, GRS80_F, 37.5, -96.0, 29.5, 45.5, 0.0, 0.0),
+       "USA Contiguous Albers Equal Area Conic USGS":   ("albers", GRS80_A, GRS80_F, 23.0, -96.0, 29.5, 45.5, 0.0, 0.0),
+       "Sphere ARC INFO Lambert Azimuthal Equal Area":  ("laea", 6370997.0, 0.0, 45.0, -100.0, 0.0, 0.0, 0.0, 0.0)}
+
+
+# Create a Function that returns the coordinate system tuple of an arcpy SpatialReference
+def crsFromSpatialReference(sr):
+    gcs = sr.GCS
+    a = gcs.semiMajorAxis
+    f = gcs.flattening
+    if sr.type == "Geographic":
+        return ("geographic", a, f, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    if sr.projectionName == "Albers":
+        return ("albers", a, f, sr.latitudeOfOrigin, sr.centralMeridian,
+                sr.standardParallel1, sr.standardParallel2, sr.falseEasting, sr.falseNorthing)
+    if sr.projectionName == "Lambert_Azimuthal_Equal_Area":
+        return ("laea", a, f, sr.latitudeOfOrigin, sr.centralMeridian, 0.0, 0.0, sr.falseEasting, sr.falseNorthing)
+    raise Exception("Projection {0} of {1} is not supported".format(sr.projectionName, sr.name))
+
+
+# Create a Function that returns a coordinate system from a name of CRS or an arcpy SpatialReference
+def getCrs(crs):
+    if isinstance(crs, tuple):
+        return crs
+    if isinstance(crs, basestring):
+        return CRS[crs]
+    return crsFromSpatialReference(crs)
+
+
+## ---------------------------------------------------------------------------
+## 2. Albers Equal Area Conic
+## Description: Snyder (1987), Map Projections - A Working Manual, p. 101-102.
+
+def _q(sinPhi, e):
+    if e == 0:
+        return 2 * sinPhi
+    e2 = e * e
+    return (1 - e2) * (sinPhi / (1 - e2 * sinPhi * sinPhi)
+                       - (1 / (2 * e)) * np.log((1 - e * sinPhi) / (1 + e * sinPhi)))
+
+
+# Latitude (radians) of a value of q (Snyder 3-16, converges in 3-4 iterations for the conterminous US and Mexico)
+def _latitude(q, e, iterations=6):
+    phi = np.arcsin(np.clip(q / 2, -1, 1))
+    if e == 0:
+        return phi
+    e2 = e * e
+    for i in range(iterations):
+        sinPhi = np.sin(phi)
+        t = 1 - e2 * sinPhi * sinPhi
+        phi = phi + (t * t / (2 * np.cos(phi))) * (q / (1 - e2) - sinPhi / t
+                                                   + (1 / (2 * e)) * np.log((1 - e * sinPhi) / (1 + e * sinPhi)))
+    return phi
+
+
+# Create a Function that returns the area of the band between two latitudes (degrees) for one radian of longitude
+# on the ellipsoid of a coordinate system (square units of the semi-major axis)
+def bandArea(lat1, lat2, crs):
+    kind, a, f = getCrs(crs)[:3]
+    e = np.sqrt(2 * f - f * f)
+    q1 = _q(np.sin(np.radians(lat1)), e)
+    q2 = _q(np.sin(np.radians(lat2)), e)
+    return np.abs(a * a * (q2 - q1) / 2)
+
+
+def _albersConstants(crs):
+    kind, a, f, lat0, lon0, lat1, lat2, fe, fn = crs
+    e2 = 2 * f - f * f
+    e = np.sqrt(e2)
+    phi0, phi1, phi2 = np.radians([lat0, lat1, lat2])
+    m1 = np.cos(phi1) / np.sqrt(1 - e2 * np.sin(phi1) ** 2)
+    m2 = np.cos(phi2) / np.sqrt(1 - e2 * np.sin(phi2) ** 2)
+    q0 = _q(np.sin(phi0), e)
+    q1 = _q(np.sin(phi1), e)
+    q2 = _q(np.sin(phi2), e)
+    if lat1 == lat2:
+        n = np.sin(phi1)
+    else:
+        n = (m1 * m1 - m2 * m2) / (q2 - q1)
+    C = m1 * m1 + n * q1
+    rho0 = a * np.sqrt(C - n * q0) / n
+    return a, e, np.radians(lon0), n, C, rho0, fe, fn
+
+
+# Geographic coordinates (degrees) to Albers coordinates
+def albersForward(lon, lat, crs):
+    a, e, lam0, n, C, rho0, fe, fn = _albersConstants(crs)
+    lam = np.radians(np.asarray(lon, dtype=np.float64))
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    rho = a * np.sqrt(C - n * _q(np.sin(phi), e)) / n
+    theta = n * (lam - lam0)
+    x = rho * np.sin(theta) + fe
+    y = rho0 - rho * np.cos(theta) + fn
+    return x, y
+
+
+# Albers coordinates to geographic coordinates (degrees)
+def albersInverse(x, y, crs, iterations=6):
+    a, e, lam0, n, C, rho0, fe, fn = _albersConstants(crs)
+    x = np.asarray(x, dtype=np.float64) - fe
+    dy = rho0 - (np.asarray(y, dtype=np.float64) - fn)
+    rho = np.hypot(x, dy)
+    theta = np.arctan2(np.sign(n) * x, np.sign(n) * dy)
+    q = (C - (rho * n / a) ** 2) / n
+    lam = lam0 + theta / n
+    return np.degrees(lam), np.degrees(_latitude(q, e, iterations))
+
+
+## ---------------------------------------------------------------------------
+## 3. Lambert Azimuthal Equal Area
+## Description: Snyder (1987), Map Projections - A Working Manual, p. 187-190 (oblique aspect, the sphere is the
+## ellipsoid with f = 0).
+
+def _laeaConstants(crs):
+    kind, a, f, lat0, lon0, lat1, lat2, fe, fn = crs
+    e2 = 2 * f - f * f
+    e = np.sqrt(e2)
+    phi1 = np.radians(lat0)
+    qp = _q(1.0, e)
+    Rq = a * np.sqrt(qp / 2)
+    beta1 = np.arcsin(_q(np.sin(phi1), e) / qp)
+    D = a * (np.cos(phi1) / np.sqrt(1 - e2 * np.sin(phi1) ** 2)) / (Rq * np.cos(beta1))
+    return e, np.radians(lon0), qp, Rq, beta1, D, fe, fn
+
+
+# Geographic coordinates (degrees) to Lambert Azimuthal Equal Area coordinates
+def laeaForward(lon, lat, crs):
+    e, lam0, qp, Rq, beta1, D, fe, fn = _laeaConstants(crs)
+    dlam = np.radians(np.asarray(lon, dtype=np.float64)) - lam0
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    beta = np.arcsin(np.clip(_q(np.sin(phi), e) / qp, -1, 1))
+    B = Rq * np.sqrt(2 / (1 + np.sin(beta1) * np.sin(beta) + np.cos(beta1) * np.cos(beta) * np.cos(dlam)))
+    x = B * D * np.cos(beta) * np.sin(dlam) + fe
+    y = (B / D) * (np.cos(beta1) * np.sin(beta) - np.sin(beta1) * np.cos(beta) * np.cos(dlam)) + fn
+    return x, y
+
+
+# Lambert Azimuthal Equal Area coordinates to geographic coordinates (degrees)
+def laeaInverse(x, y, crs, iterations=6):
+    e, lam0, qp, Rq, beta1, D, fe, fn = _laeaConstants(crs)
+    x = np.asarray(x, dtype=np.float64) - fe
+    y = np.asarray(y, dtype=np.float64) - fn
+    rho = np.hypot(x / D, D * y)
+    ce = 2 * np.arcsin(np.clip(rho / (2 * Rq), -1, 1))
+    # At the center of the projection (rho = 0), the latitude is lat0
+    rho = np.where(rho == 0, 1e-12, rho)
+    q = qp * (np.cos(ce) * np.sin(beta1) + D * y * np.sin(ce) * np.cos(beta1) / rho)
+    lam = lam0 + np.arctan2(x * np.sin(ce),
+                            D * rho * np.cos(beta1) * np.cos(ce) - D * D * y * np.sin(beta1) * np.sin(ce))
+    return np.degrees(lam), np.degrees(_latitude(q, e, iterations))
+
+
+## ---------------------------------------------------------------------------
+## 4. Transformer
+## Description: Returns a function (x, y) -> (x, y) from a source to a target coordinate system.
+## The transformers are cached by pair of coordinate systems.
+
+_transformers = {}
+
+
+def _toGeographic(crs):
+    if crs[0] == "geographic":
+        return lambda x, y: (np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    if crs[0] == "laea":
+        return lambda x, y: laeaInverse(x, y, crs)
+    return lambda x, y: albersInverse(x, y, crs)
+
+
+def _fromGeographic(crs):
+    if crs[0] == "geographic":
+        return lambda lon, lat: (lon, lat)
+    if crs[0] == "laea":
+        return lambda lon, lat: laeaForward(lon, lat, crs)
+    return lambda lon, lat: albersForward(lon, lat, crs)
+
+
+def getTransformer(srcCrs, dstCrs):
+    srcCrs = getCrs(srcCrs)
+    dstCrs = getCrs(dstCrs)
+    key = (srcCrs, dstCrs)
+    if key not in _transformers:
+        if srcCrs == dstCrs:
+            transform = lambda x, y: (np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        else:
+            inverse = _toGeographic(srcCrs)
+            forward = _fromGeographic(dstCrs)
+            transform = lambda x, y: forward(*inverse(x, y))
+        _transformers[key] = transform
+    return _transformers[key]
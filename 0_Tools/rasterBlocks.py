@@ -0,0 +1,410 @@
+## Name: rasterBlocks.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Block-windowed raster engine for the raster preparation scripts of the Rio Grande/Bravo basin (RGB)
+##              1. Describe the grid of a raster (origin, cell size, number of rows and columns, coordinate system)
+##              2. Read a window of a raster into a NumPy array
+##              3. Rasterize the polygons of the study area (mask) on a block of the output grid
+##              4. Write an output raster block by block
+##              5. Mosaic, Set Null, Extract by Mask and Project the input rasters in a single pass per block
+##                 (the histogram of each output is computed from the written blocks)
+## The peak memory is bounded by the size of the block (blockSize x blockSize cells).
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import math
+import os
+import numpy as np
+
+import projection
+
+
+## ---------------------------------------------------------------------------
+## 1. Grid
+## Description: Definition of a raster grid. Rows are counted from the top (ymax) of the grid.
+
+class Grid(object):
+
+    def __init__(self, xmin, ymax, cellSize, nrows, ncols, crs):
+        self.xmin = float(xmin)
+        self.ymax = float(ymax)
+        self.cellSize = float(cellSize)
+        self.nrows = int(nrows)
+        self.ncols = int(ncols)
+        self.crs = projection.getCrs(crs)
+
+    @property
+    def xmax(self):
+        return self.xmin + self.ncols * self.cellSize
+
+    @property
+    def ymin(self):
+        return self.ymax - self.nrows * self.cellSize
+
+    def key(self):
+        return (self.xmin, self.ymax, self.cellSize, self.nrows, self.ncols, self.crs)
+
+    # Sub-grid of nrows x ncols cells starting at (row0, col0)
+    def window(self, row0, col0, nrows, ncols):
+        return Grid(self.xmin + col0 * self.cellSize,
+                    self.ymax - row0 * self.cellSize,
+                    self.cellSize, nrows, ncols, self.crs)
+
+    # Coordinates of the cell centers (1-D arrays of the columns and of the rows)
+    def centers(self):
+        xs = self.xmin + (np.arange(self.ncols) + 0.5) * self.cellSize
+        ys = self.ymax - (np.arange(self.nrows) + 0.5) * self.cellSize
+        return xs, ys
+
+    # Indices (row, col) of the cells containing the points (x, y). Points outside the grid get -1.
+    def cellIndex(self, x, y):
+        col = np.floor((x - self.xmin) / self.cellSize).astype(np.int64)
+        row = np.floor((self.ymax - y) / self.cellSize).astype(np.int64)
+        outside = (col < 0) | (col >= self.ncols) | (row < 0) | (row >= self.nrows)
+        col[outside] = -1
+        row[outside] = -1
+        return row, col
+
+    # Offset (row, col) of a grid sharing the same cell alignment
+    def offsetOf(self, other):
+        col0 = int(round((other.xmin - self.xmin) / self.cellSize))
+        row0 = int(round((self.ymax - other.ymax) / self.cellSize))
+        return row0, col0
+
+    # List the blocks (row0, col0, nrows, ncols) of the grid
+    def blocks(self, blockSize):
+        for row0 in range(0, self.nrows, blockSize):
+            for col0 in range(0, self.ncols, blockSize):
+                yield row0, col0, min(blockSize, self.nrows - row0), min(blockSize, self.ncols - col0)
+
+
+# Create a Function that describes the grid of a raster
+def describeGrid(raster):
+    r = arcpy.Raster(raster)
+    return Grid(r.extent.XMin, r.extent.YMax, r.meanCellWidth, r.height, r.width,
+                projection.crsFromSpatialReference(r.spatialReference))
+
+
+# Create a Function that snaps an extent (xmin, ymin, xmax, ymax) on multiples of the cell size
+def snapGrid(extent, cellSize, crs):
+    xmin = math.floor(extent[0] / cellSize) * cellSize
+    ymin = math.floor(extent[1] / cellSize) * cellSize
+    xmax = math.ceil(extent[2] / cellSize) * cellSize
+    ymax = math.ceil(extent[3] / cellSize) * cellSize
+    return Grid(xmin, ymax, cellSize,
+                int(round((ymax - ymin) / cellSize)),
+                int(round((xmax - xmin) / cellSize)), crs)
+
+
+# Create a Function that returns the window of a grid with the cells intersecting an extent (xmin, ymin, xmax, ymax)
+# (None when the extent is outside of the grid)
+def clipExtent(grid, extent):
+    col0 = max(int(math.floor((extent[0] - grid.xmin) / grid.cellSize)), 0)
+    col1 = min(int(math.ceil((extent[2] - grid.xmin) / grid.cellSize)), grid.ncols)
+    row0 = max(int(math.floor((grid.ymax - extent[3]) / grid.cellSize)), 0)
+    row1 = min(int(math.ceil((grid.ymax - extent[1]) / grid.cellSize)), grid.nrows)
+    if row1 <= row0 or col1 <= col0:
+        return None
+    return grid.window(row0, col0, row1 - row0, col1 - col0)
+
+
+## ---------------------------------------------------------------------------
+## 2. Read a window
+## Description: Read nrows x ncols cells starting at (row0, col0) of the raster grid.
+## The cells of the window outside the raster get the value nodata.
+
+def readWindow(raster, grid, row0, col0, nrows, ncols, nodata=0, dtype=None):
+    r0 = max(row0, 0)
+    c0 = max(col0, 0)
+    r1 = min(row0 + nrows, grid.nrows)
+    c1 = min(col0 + ncols, grid.ncols)
+    if r1 <= r0 or c1 <= c0:
+        return np.full((nrows, ncols), nodata, dtype=dtype or np.float64)
+    lowerLeft = arcpy.Point(grid.xmin + c0 * grid.cellSize, grid.ymax - r1 * grid.cellSize)
+    array = arcpy.RasterToNumPyArray(raster, lowerLeft, c1 - c0, r1 - r0, nodata)
+    if dtype is not None:
+        array = array.astype(dtype, copy=False)
+    if (r0, c0, r1, c1) == (row0, col0, row0 + nrows, col0 + ncols):
+        return array
+    out = np.full((nrows, ncols), nodata, dtype=array.dtype)
+    out[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = array
+    return out
+
+
+## ---------------------------------------------------------------------------
+## 3. Rasterize the study area
+## Description: A cell is inside the mask when its center is inside the polygons (even-odd rule,
+## so that the holes of the polygons are excluded), like the tool Extract by Mask.
+
+# Create a Function that returns the rings of a polygon as a list of arrays (x, y)
+def shapeRings(shape):
+    rings = []
+    for part in shape:
+        ring = []
+        for pnt in part:
+            # None separates the exterior ring from the interior rings
+            if pnt is None:
+                if ring:
+                    rings.append(np.array(ring))
+                ring = []
+            else:
+                ring.append((pnt.X, pnt.Y))
+        if ring:
+            rings.append(np.array(ring))
+    return rings
+
+
+# Create a Function that reads the rings of the polygons of a shapefile as a list of arrays (x, y)
+def readRings(shapefile):
+    rings = []
+    with arcpy.da.SearchCursor(shapefile, ["SHAPE@"]) as cursor:
+        for row in cursor:
+            rings.extend(shapeRings(row[0]))
+    return rings
+
+
+# Edges of the rings as arrays (x0, y0, x1, y1)
+def ringEdges(rings):
+    edges = []
+    for ring in rings:
+        if not np.array_equal(ring[0], ring[-1]):
+            ring = np.vstack([ring, ring[:1]])
+        edges.append(np.hstack([ring[:-1], ring[1:]]))
+    return np.vstack(edges)
+
+
+def edgesExtent(edges):
+    return (min(edges[:, 0].min(), edges[:, 2].min()), min(edges[:, 1].min(), edges[:, 3].min()),
+            max(edges[:, 0].max(), edges[:, 2].max()), max(edges[:, 1].max(), edges[:, 3].max()))
+
+
+# Create a Function that rasterizes the edges of polygons on a grid (scanline on the cell centers)
+def rasterize(edges, grid):
+    mask = np.zeros((grid.nrows, grid.ncols), dtype=bool)
+    xs, ys = grid.centers()
+    # Keep the edges crossing the rows of the grid
+    ylo = np.minimum(edges[:, 1], edges[:, 3])
+    yhi = np.maximum(edges[:, 1], edges[:, 3])
+    edges = edges[(yhi > ys[-1]) & (ylo <= ys[0])]
+    if len(edges) == 0:
+        return mask
+    x0, y0, x1, y1 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+    for i in range(grid.nrows):
+        y = ys[i]
+        crossing = (y0 > y) != (y1 > y)
+        if not crossing.any():
+            continue
+        xa, ya, xb, yb = x0[crossing], y0[crossing], x1[crossing], y1[crossing]
+        xi = np.sort(xa + (y - ya) * (xb - xa) / (yb - ya))
+        # Columns whose center lies between each pair of intersections
+        start = np.ceil((xi[0::2] - grid.xmin) / grid.cellSize - 0.5).astype(np.int64)
+        stop = np.ceil((xi[1::2] - grid.xmin) / grid.cellSize - 0.5).astype(np.int64)
+        start = np.clip(start, 0, grid.ncols)
+        stop = np.clip(stop, 0, grid.ncols)
+        diff = np.zeros(grid.ncols + 1, dtype=np.int32)
+        np.add.at(diff, start, 1)
+        np.add.at(diff, stop, -1)
+        mask[i] = np.cumsum(diff[:-1]) > 0
+    return mask
+
+
+# Create a Function that returns the cells of a grid inside a mask: the edges of polygons (rasterized on the grid)
+# or a mask rasterized once and cached (maskCache.Mask)
+def maskCells(mask, grid):
+    if isinstance(mask, np.ndarray):
+        return rasterize(mask, grid)
+    return mask.cells(grid)
+
+
+def maskExtent(mask):
+    if isinstance(mask, np.ndarray):
+        return edgesExtent(mask)
+    return mask.extent()
+
+
+# Create a Function that returns the grid of an output: the extent of its mask, aligned on the grid
+def outputGrid(mask, grid):
+    return snapGrid(maskExtent(mask), grid.cellSize, grid.crs)
+
+
+# Create a Function that adds the values (> 0) of a block to a histogram (uint64 array indexed by the values)
+def addHistogram(hist, array):
+    values = array.ravel()
+    if values.dtype.kind not in "ui":
+        values = values.astype(np.int64)
+    counts = np.bincount(values[values > 0]).astype(np.uint64)
+    if len(counts) > len(hist):
+        counts[:len(hist)] += hist
+        return counts
+    hist[:len(counts)] += counts
+    return hist
+
+
+## ---------------------------------------------------------------------------
+## 4. Write an output raster block by block
+## Description: Each block is saved in a scratch folder with NumPyArrayToRaster, then the blocks are
+## assembled in the final raster with Mosaic To New Raster and deleted. The blocks are named after their
+## position in the grid, so they can be saved by several processes. The blocks with no data are not saved: the
+## extent of the final raster is set to the grid of the writer (Extent environment), so it does not shrink to
+## the blocks with data.
+
+PIXEL_TYPES = {"uint8": "8_BIT_UNSIGNED",
+               "int8": "8_BIT_SIGNED",
+               "uint16": "16_BIT_UNSIGNED",
+               "int16": "16_BIT_SIGNED",
+               "uint32": "32_BIT_UNSIGNED",
+               "int32": "32_BIT_SIGNED",
+               "float32": "32_BIT_FLOAT",
+               "float64": "64_BIT"}
+
+
+# Create a Function that saves a block of an output raster in the scratch folder (None when the block has no data)
+def saveBlock(outRaster, grid, row0, col0, array, nodata, scratchFolder):
+    if not (array != nodata).any():
+        return None
+    block = grid.window(row0, col0, array.shape[0], array.shape[1])
+    name = os.path.split(outRaster)[1]
+    blockFile = os.path.join(scratchFolder, "{0}_{1}_{2}.tif".format(name, row0, col0))
+    outBlock = arcpy.NumPyArrayToRaster(array, arcpy.Point(block.xmin, block.ymin),
+                                        block.cellSize, block.cellSize, nodata)
+    outBlock.save(blockFile)
+    return blockFile
+
+
+class BlockWriter(object):
+
+    def __init__(self, outRaster, grid, spatialReference, nodata, pixelType, scratchFolder):
+        self.outRaster = outRaster
+        self.grid = grid
+        self.spatialReference = spatialReference
+        self.nodata = nodata
+        self.pixelType = pixelType
+        self.scratchFolder = scratchFolder
+        self.blockList = []
+
+    def write(self, row0, col0, array):
+        self.add(saveBlock(self.outRaster, self.grid, row0, col0, array, self.nodata, self.scratchFolder))
+
+    # Add a block saved by saveBlock (e.g. in another process)
+    def add(self, blockFile):
+        if blockFile is not None:
+            self.blockList.append(blockFile)
+
+    def close(self):
+        if not self.blockList:
+            print "WARNING: no data in", self.outRaster
+            return
+        path, name = os.path.split(self.outRaster)
+        previous = arcpy.env.extent
+        try:
+            arcpy.env.extent = arcpy.Extent(self.grid.xmin, self.grid.ymin, self.grid.xmax, self.grid.ymax)
+            arcpy.MosaicToNewRaster_management(self.blockList, path, name, self.spatialReference,
+                                               self.pixelType, self.grid.cellSize, "1", "FIRST", "FIRST")
+        finally:
+            arcpy.env.extent = previous
+        for blockFile in self.blockList:
+            arcpy.Delete_management(blockFile)
+        self.blockList = []
+
+
+## ---------------------------------------------------------------------------
+## 5. Mosaic, Set Null, Extract by Mask and Project in a single pass
+## Description: For each block of the output grid:
+##              a. Rasterize the masks on the block and skip the block when it is outside of all the masks
+##              b. Compute the coordinates of the cells inside the mask in the coordinate system of the inputs, or
+##                 look up their source cells in the warp map of each input (warpMap.tileWarpMap, no transformation)
+##              c. Read only the window of each input covering these cells (nearest neighbor resampling)
+##              d. Set Null the cells equal to the null values, and mosaic the inputs (the LAST input with data wins)
+##              e. Write the masked block of each output
+## The masks are given in the coordinate system of the output grid. The outputs are a list of
+## [mask, output raster], the first mask must contain all the others (e.g. RGB_Ses and RGB_Basin). A mask is
+## the edges of the polygons, or a mask cached on the output grid (maskCache.getMask), which is not rasterized
+## again for each block and lets the blocks outside the mask be skipped without unpacking. With an extent
+## (xmin, ymin, xmax, ymax) in the coordinate system of the inputs (e.g. the clip rectangle of the land-cover
+## scenes), only the cells of the inputs intersecting the extent are read.
+## Returns the histogram of each output (see pixelCount.store). With assemble=False (e.g. in a process of a pool),
+## the blocks are only saved: returns the histograms and the list of the block files of each output, assembled
+## by the caller (BlockWriter.add and close). warpMaps is the list of the warp maps of the inputs on the output grid
+## (None for an input whose coordinates are transformed).
+
+def mosaicMaskProject(inRasters, nullValues, outputs, grid, spatialReference, scratchFolder,
+                      blockSize=2048, nodata=0, dtype=np.uint8, extent=None, assemble=True, warpMaps=None):
+    if warpMaps is None:
+        warpMaps = [None] * len(inRasters)
+    sources = [(raster, describeGrid(raster), srcMap) for raster, srcMap in zip(inRasters, warpMaps)]
+    if extent is not None:
+        sources = [(raster, clipExtent(src, extent), srcMap) for raster, src, srcMap in sources]
+        sources = [(raster, src, srcMap) for raster, src, srcMap in sources if src is not None]
+    pixelType = PIXEL_TYPES[np.dtype(dtype).name]
+    nulls = np.array(nullValues)
+
+    # Each output covers the extent of its mask, aligned on the output grid
+    writers = []
+    for edges, outRaster in outputs:
+        outGrid = outputGrid(edges, grid)
+        row0, col0 = grid.offsetOf(outGrid)
+        writers.append((edges, outGrid, row0, col0,
+                        BlockWriter(outRaster, outGrid, spatialReference, nodata, pixelType, scratchFolder)))
+
+    hists = [np.zeros(1, dtype=np.uint64) for w in writers]
+    for row0, col0, nrows, ncols in grid.blocks(blockSize):
+        block = grid.window(row0, col0, nrows, ncols)
+        if not isinstance(writers[0][0], np.ndarray) and not writers[0][0].touches(block):
+            continue
+        outer = maskCells(writers[0][0], block)
+        inside = np.nonzero(outer)
+        if len(inside[0]) == 0:
+            continue
+
+        # Source cells of the cells inside the outer mask
+        xs, ys = block.centers()
+        values = np.full(len(inside[0]), nodata, dtype=dtype)
+        for raster, src, srcMap in sources:
+            if srcMap is not None:
+                rows, cols = srcMap.cells(block, inside[0], inside[1])
+                rowOffset, colOffset = srcMap.src.offsetOf(src)
+                rows -= rowOffset
+                cols -= colOffset
+                hit = (rows >= 0) & (rows < src.nrows) & (cols >= 0) & (cols < src.ncols)
+            else:
+                sx, sy = projection.getTransformer(grid.crs, src.crs)(xs[inside[1]], ys[inside[0]])
+                rows, cols = src.cellIndex(sx, sy)
+                hit = rows >= 0
+            if not hit.any():
+                continue
+            r0, r1 = rows[hit].min(), rows[hit].max() + 1
+            c0, c1 = cols[hit].min(), cols[hit].max() + 1
+            window = readWindow(raster, src, r0, c0, r1 - r0, c1 - c0, nodata)
+            sample = window[rows[hit] - r0, cols[hit] - c0]
+            valid = ~np.in1d(sample, nulls)
+            target = np.nonzero(hit)[0][valid]
+            values[target] = sample[valid]
+
+        full = np.full((nrows, ncols), nodata, dtype=dtype)
+        full[inside] = values
+
+        # Write the block of each output
+        for i, (edges, outGrid, oRow0, oCol0, writer) in enumerate(writers):
+            # Intersection of the block with the grid of the output
+            r0 = max(row0, oRow0)
+            c0 = max(col0, oCol0)
+            r1 = min(row0 + nrows, oRow0 + outGrid.nrows)
+            c1 = min(col0 + ncols, oCol0 + outGrid.ncols)
+            if r1 <= r0 or c1 <= c0:
+                continue
+            sub = full[r0 - row0:r1 - row0, c0 - col0:c1 - col0]
+            if i == 0:
+                mask = outer[r0 - row0:r1 - row0, c0 - col0:c1 - col0]
+            else:
+                mask = maskCells(edges, grid.window(r0, c0, r1 - r0, c1 - c0))
+            out = np.where(mask, sub, nodata).astype(dtype)
+            hists[i] = addHistogram(hists[i], np.where(mask & (sub != nodata), sub, 0))
+            writer.write(r0 - oRow0, c0 - oCol0, out)
+
+    if not assemble:
+        return hists, [writer.blockList for edges, outGrid, oRow0, oCol0, writer in writers]
+    for edges, outGrid, oRow0, oCol0, writer in writers:
+        writer.close()
+    return hists
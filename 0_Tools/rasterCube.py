@@ -0,0 +1,154 @@
+## Name: rasterCube.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Multi-year cube of the categorical rasters of the Rio Grande/Bravo basin (RGB) (e.g. CDL 2008-2018)
+##              1. Align the yearly rasters on one grid and store them in a single chunked uint8 array
+##                 (year x row x col), memory-mapped (.npy) with a description of the grid and of the years (.json)
+##              2. Each chunk holds all the years of chunkSize x chunkSize cells, and the years of a cell are
+##                 contiguous: a temporal query of a cell or of a window reads one chunk
+##              3. Queries: years of a cell, window of the cube, number of years of a class per cell (e.g. fallow
+##                 frequency), class area per year
+## Usage:
+##      rasterCube.build(cubeFolder, ["cdl2008ses", ..., "cdl2018ses"], yearList, grid)
+##      cube = rasterCube.Cube(cubeFolder)
+##      cube.pixel(x, y); cube.classAreas()
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import json
+import os
+import numpy as np
+
+import rasterBlocks
+
+
+## ---------------------------------------------------------------------------
+## 1. Build
+## Description: The cube file has the shape (chunk rows, chunk columns, chunkSize, chunkSize, years). The cube is
+## filled by blocks of chunks: the window of each yearly raster covering the block is read once (the rasters
+## may have different extents, the cells outside a raster get nodata). The cube is written in a temporary file
+## renamed when complete.
+
+CUBE = "cube.npy"
+DESCRIPTION = "cube.json"
+
+
+def build(folder, rasters, years, grid, chunkSize=256, blockChunks=8, nodata=0):
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    chunkRows = (grid.nrows + chunkSize - 1) // chunkSize
+    chunkCols = (grid.ncols + chunkSize - 1) // chunkSize
+    temp = os.path.join(folder, "cube.tmp.npy")
+    cube = np.lib.format.open_memmap(temp, mode="w+", dtype=np.uint8,
+                                     shape=(chunkRows, chunkCols, chunkSize, chunkSize, len(years)))
+    sources = [(raster, rasterBlocks.describeGrid(raster)) for raster in rasters]
+
+    blockSize = chunkSize * blockChunks
+    for row0, col0, nrows, ncols in rasterBlocks.Grid(grid.xmin, grid.ymax, grid.cellSize,
+                                                      chunkRows * chunkSize, chunkCols * chunkSize,
+                                                      grid.crs).blocks(blockSize):
+        block = np.full((nrows, ncols, len(years)), nodata, dtype=np.uint8)
+        window = grid.window(row0, col0, nrows, ncols)
+        for k, (raster, src) in enumerate(sources):
+            sRow0, sCol0 = src.offsetOf(window)
+            block[:, :, k] = rasterBlocks.readWindow(raster, src, sRow0, sCol0, nrows, ncols, nodata, np.uint8)
+        # Split the block in chunks
+        chunks = block.reshape(nrows // chunkSize, chunkSize, ncols // chunkSize, chunkSize, len(years))
+        cube[row0 // chunkSize:(row0 + nrows) // chunkSize,
+             col0 // chunkSize:(col0 + ncols) // chunkSize] = chunks.transpose(0, 2, 1, 3, 4)
+    cube.flush()
+    del cube
+
+    path = os.path.join(folder, CUBE)
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(temp, path)
+    description = {"years": [str(year) for year in years], "rasters": list(rasters), "chunkSize": chunkSize,
+                   "nodata": nodata, "grid": [grid.xmin, grid.ymax, grid.cellSize, grid.nrows, grid.ncols],
+                   "crs": list(grid.crs)}
+    with open(os.path.join(folder, DESCRIPTION), "w") as f:
+        json.dump(description, f, indent=1)
+    return Cube(folder)
+
+
+## ---------------------------------------------------------------------------
+## 2. Queries
+## Description: The cube is opened read-only (memory-mapped): only the chunks of a query are read from disk.
+
+class Cube(object):
+
+    def __init__(self, folder):
+        with open(os.path.join(folder, DESCRIPTION)) as f:
+            description = json.load(f)
+        self.years = description["years"]
+        self.chunkSize = description["chunkSize"]
+        self.nodata = description["nodata"]
+        xmin, ymax, cellSize, nrows, ncols = description["grid"]
+        self.grid = rasterBlocks.Grid(xmin, ymax, cellSize, nrows, ncols, tuple(description["crs"]))
+        self.data = np.load(os.path.join(folder, CUBE), mmap_mode="r")
+
+    # Values of all the years of the cells (row, col), array of len(rows) x years
+    def cells(self, rows, cols):
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        c = self.chunkSize
+        return self.data[rows // c, cols // c, rows % c, cols % c]
+
+    # Values of all the years of a point (x, y) in the coordinates of the grid (None outside the grid)
+    def pixel(self, x, y):
+        row, col = self.grid.cellIndex(np.array([x], dtype=np.float64), np.array([y], dtype=np.float64))
+        if row[0] < 0:
+            return None
+        return dict(zip(self.years, self.cells(row, col)[0].tolist()))
+
+    # Window of the cube, array of years x nrows x ncols
+    def window(self, row0, col0, nrows, ncols):
+        c = self.chunkSize
+        r0, r1 = row0 // c, (row0 + nrows + c - 1) // c
+        c0, c1 = col0 // c, (col0 + ncols + c - 1) // c
+        chunks = self.data[r0:r1, c0:c1]
+        block = chunks.transpose(4, 0, 2, 1, 3).reshape(len(self.years), (r1 - r0) * c, (c1 - c0) * c)
+        return block[:, row0 - r0 * c:row0 - r0 * c + nrows, col0 - c0 * c:col0 - c0 * c + ncols]
+
+    # Iterate over the blocks of chunks of the cube (blockChunks x blockChunks chunks):
+    # (row0, col0, array of chunk rows x chunk columns x chunkSize x chunkSize x years)
+    def blocks(self, blockChunks=8):
+        for i in range(0, self.data.shape[0], blockChunks):
+            for j in range(0, self.data.shape[1], blockChunks):
+                yield i * self.chunkSize, j * self.chunkSize, np.asarray(self.data[i:i + blockChunks,
+                                                                                   j:j + blockChunks])
+
+    # Cells of a block of chunks as an array of rows x columns x years
+    def blockCells(self, chunks):
+        n, m, c = chunks.shape[0], chunks.shape[1], self.chunkSize
+        return chunks.transpose(0, 2, 1, 3, 4).reshape(n * c, m * c, len(self.years))
+
+    # Number of years of the classes (list of values) per cell (e.g. fallow frequency), uint8 array of the grid
+    def frequency(self, values):
+        c = self.chunkSize
+        count = np.zeros((self.data.shape[0] * c, self.data.shape[1] * c), dtype=np.uint8)
+        for row0, col0, chunks in self.blocks():
+            cells = self.blockCells(chunks)
+            n = np.in1d(cells, values).reshape(cells.shape).sum(axis=-1, dtype=np.uint8)
+            count[row0:row0 + n.shape[0], col0:col0 + n.shape[1]] = n
+        return count[:self.grid.nrows, :self.grid.ncols]
+
+    # Number of cells of each class per year, uint64 array of years x 256 (the nodata class is not counted)
+    def classCounts(self):
+        counts = np.zeros((len(self.years), 256), dtype=np.uint64)
+        for row0, col0, chunks in self.blocks():
+            # One year at a time: no int64 copy of the block
+            values = chunks.reshape(-1, len(self.years))
+            for y in range(len(self.years)):
+                counts[y] += np.bincount(values[:, y], minlength=256).astype(np.uint64)
+        counts[:, self.nodata] = 0
+        return counts
+
+    # Area of each class per year (cell size in the units of the grid, e.g. m2): {year: {class: area}}
+    def classAreas(self):
+        cellArea = self.grid.cellSize * self.grid.cellSize
+        areas = {}
+        for year, counts in zip(self.years, self.classCounts()):
+            areas[year] = dict((value, int(count) * cellArea) for value, count in enumerate(counts) if count)
+        return areas
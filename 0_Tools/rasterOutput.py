@@ -0,0 +1,61 @@
+## Name: rasterOutput.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Output stage of the final rasters of the Rio Grande/Bravo basin (RGB)
+##              1. Copy a raster to a tiled, compressed GeoTIFF (tiles of 512 x 512 cells, LZW by default)
+##              2. Build the overviews (pyramids) and the statistics of the GeoTIFF, so that a window or a
+##                 low resolution view is read without decoding the whole raster
+##              3. Optionally write a Cloud Optimized GeoTIFF (header, overviews and tiles ordered for range
+##                 requests, format COG of Copy Raster, ArcGIS Pro)
+## Usage:
+##      rasterOutput.exportTiffs(["elev_bas", "elev_ses"], finalFolder + "tiff\\")
+## The attribute table of the raster (e.g. the land-cover names) is copied with the GeoTIFF.
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import os
+from arcpy import env
+
+
+## ---------------------------------------------------------------------------
+## 1. GeoTIFF
+## Description: The tile size, the compression and the pyramids are set in the environment of Copy Raster
+## and restored after the copy. Nearest neighbor overviews keep the class values of the categorical rasters.
+
+def writeTiff(inRaster, outTiff, compression="LZW", tileSize=512, pyramidLevels=-1, resampling="NEAREST",
+              cloudOptimized=False):
+    previous = (env.tileSize, env.compression, env.pyramid, env.rasterStatistics)
+    try:
+        env.tileSize = "{0} {0}".format(tileSize)
+        env.compression = compression
+        env.pyramid = "PYRAMIDS {0} {1} DEFAULT 75 NO_SKIP".format(pyramidLevels, resampling)
+        env.rasterStatistics = "STATISTICS 1 1"
+        if arcpy.Exists(outTiff):
+            arcpy.Delete_management(outTiff)
+        arcpy.CopyRaster_management(inRaster, outTiff, "", "", "", "NONE", "NONE", "", "NONE", "NONE",
+                                    "COG" if cloudOptimized else "TIFF")
+        if not cloudOptimized:
+            # Overviews of the GeoTIFF (the COG format writes them in the file)
+            arcpy.BuildPyramids_management(outTiff, pyramidLevels, "NONE", resampling, "DEFAULT", "",
+                                           "SKIP_EXISTING")
+    finally:
+        env.tileSize, env.compression, env.pyramid, env.rasterStatistics = previous
+    return outTiff
+
+
+## ---------------------------------------------------------------------------
+## 2. Export the final rasters
+## Description: Each raster is written as <folder>\<name>.tif. The GRID rasters are kept (inputs of the other
+## scripts). Returns the list of the GeoTIFFs.
+
+def exportTiffs(rasters, folder, **options):
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    outTiffs = []
+    for raster in rasters:
+        name = os.path.splitext(os.path.split(raster)[1])[0]
+        outTiffs.append(writeTiff(raster, os.path.join(folder, name + ".tif"), **options))
+        print "GeoTIFF", name, "completed"
+    return outTiffs
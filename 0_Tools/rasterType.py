@@ -0,0 +1,139 @@
+## Name: rasterType.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Lossless pixel type of the rasters of the Rio Grande/Bravo basin (RGB)
+##              1. Select the smallest pixel type holding a range of values and a NoData value outside of the
+##                 values (8, 16, 32 bit integers, or 32/64 bit float)
+##              2. Block statistics of a raster in a first pass (min, max, integer values, exact in 32 bit float)
+##              3. Convert a raster to the selected type in a single streamed copy, optionally with a scale and an
+##                 offset for the float rasters (value = offset + scale x integer), instead of Copy Raster to a
+##                 fixed type (8_BIT_UNSIGNED truncates the values above 255)
+##              4. Pixel type of a mosaic from the pixel types of its inputs (no read)
+## Usage:
+##      dtype, nodata = rasterType.convert("popdens_2010.tif", "popdens10", scratchFolder)
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import json
+import numpy as np
+
+import maskCache
+import rasterBlocks
+
+
+## ---------------------------------------------------------------------------
+## 1. Select a type
+## Description: The integer types are tried from the smallest. The NoData value is the given value (e.g. a null
+## value of the inputs, never a valid value), or the largest (or smallest) value of the type outside of the range.
+
+INTEGER_TYPES = [np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32]
+
+
+# Create a Function that returns the smallest pixel type (numpy dtype) and the NoData value of a range of values
+def selectType(vmin, vmax, integral, float32=True, nodata=None):
+    if integral:
+        for dtype in INTEGER_TYPES:
+            info = np.iinfo(dtype)
+            if vmin < info.min or vmax > info.max:
+                continue
+            if nodata is not None:
+                if info.min <= nodata <= info.max:
+                    return dtype, nodata
+            elif vmax < info.max:
+                return dtype, int(info.max)
+            elif vmin > info.min:
+                return dtype, int(info.min)
+    dtype = np.float32 if float32 else np.float64
+    return dtype, float(np.finfo(dtype).min) if nodata is None else nodata
+
+
+## ---------------------------------------------------------------------------
+## 2. Block statistics
+## Description: The raster is read block by block in its own type (NoData value cast to the type). The NoData cells
+## (and NaN) are not counted.
+## The integer and float32 tests stop being evaluated as soon as they fail.
+
+def blockStats(inRaster, blockSize=4096):
+    src = rasterBlocks.describeGrid(inRaster)
+    raster = arcpy.Raster(inRaster)
+    dtype = maskCache.DTYPES[raster.pixelType]
+    nodata = None if raster.noDataValue is None else dtype(raster.noDataValue)
+    isFloat = np.dtype(dtype).kind == "f"
+    # The 8 and 16 bit integers and the 32 bit floats are exact in 32 bit float
+    exact32 = dtype == np.float32 or (not isFloat and np.dtype(dtype).itemsize <= 2)
+    stats = {"min": np.inf, "max": -np.inf, "integral": True, "float32": True, "count": 0}
+    for row0, col0, nrows, ncols in src.blocks(blockSize):
+        values = rasterBlocks.readWindow(inRaster, src, row0, col0, nrows, ncols,
+                                         nodata if nodata is not None else 0, dtype).ravel()
+        if nodata is not None:
+            values = values[values != nodata]
+        if isFloat:
+            values = values[np.isfinite(values)]
+        if not len(values):
+            continue
+        stats["count"] += len(values)
+        stats["min"] = min(stats["min"], float(values.min()))
+        stats["max"] = max(stats["max"], float(values.max()))
+        if isFloat and stats["integral"]:
+            stats["integral"] = bool((np.mod(values, 1) == 0).all())
+        if stats["float32"] and not exact32:
+            stats["float32"] = bool((values.astype(np.float32) == values).all())
+    if not stats["count"]:
+        stats["min"] = stats["max"] = 0
+    return stats
+
+
+## ---------------------------------------------------------------------------
+## 3. Convert
+## Description: The output keeps the grid and the coordinate system of the input. With a scale (e.g. 0.01), the
+## values of a float raster are stored as round((value - offset) / scale) in the smallest integer type, and the
+## scale and the offset are written next to the output (<outRaster>.json). Returns the type and the NoData value.
+
+def convert(inRaster, outRaster, scratchFolder, scale=None, offset=0.0, blockSize=4096):
+    stats = blockStats(inRaster, blockSize)
+    if scale is not None and stats["integral"]:
+        scale = None
+    if scale is not None:
+        dtype, outNodata = selectType(np.round((stats["min"] - offset) / scale),
+                                      np.round((stats["max"] - offset) / scale), True)
+    else:
+        dtype, outNodata = selectType(stats["min"], stats["max"], stats["integral"], stats["float32"])
+    pixelType = rasterBlocks.PIXEL_TYPES[np.dtype(dtype).name]
+    print inRaster, ": values", stats["min"], "to", stats["max"], "-", pixelType, "NoData", outNodata, \
+        "" if scale is None else "scale {0} offset {1}".format(scale, offset)
+
+    src = rasterBlocks.describeGrid(inRaster)
+    raster = arcpy.Raster(inRaster)
+    inType = maskCache.DTYPES[raster.pixelType]
+    nodata = None if raster.noDataValue is None else inType(raster.noDataValue)
+    writer = rasterBlocks.BlockWriter(outRaster, src, raster.spatialReference, outNodata, pixelType, scratchFolder)
+    for row0, col0, nrows, ncols in src.blocks(blockSize):
+        values = rasterBlocks.readWindow(inRaster, src, row0, col0, nrows, ncols,
+                                         nodata if nodata is not None else 0, inType)
+        invalid = values == nodata if nodata is not None else np.zeros(values.shape, dtype=bool)
+        if np.dtype(inType).kind == "f":
+            invalid |= ~np.isfinite(values)
+        if scale is not None:
+            values = np.round((np.where(invalid, offset, values).astype(np.float64) - offset) / scale)
+        writer.write(row0, col0, np.where(invalid, outNodata, values).astype(dtype))
+    writer.close()
+    if scale is not None:
+        with open(outRaster + ".json", "w") as f:
+            json.dump({"scale": scale, "offset": offset, "nodata": outNodata}, f)
+    return dtype, outNodata
+
+
+## ---------------------------------------------------------------------------
+## 4. Type of a mosaic
+## Description: The values of the mosaic are values of the inputs, so the range of the pixel types of the inputs
+## is enough (no read). The first null value of the inputs is the NoData value of the mosaic.
+
+def mosaicType(inRasters, nullValues=None):
+    dtypes = [np.dtype(maskCache.DTYPES[arcpy.Raster(raster).pixelType]) for raster in inRasters]
+    nodata = nullValues[0] if nullValues else None
+    if any(dtype.kind == "f" for dtype in dtypes):
+        return selectType(0, 0, False, all(dtype.itemsize <= 4 for dtype in dtypes), nodata)
+    return selectType(min(np.iinfo(dtype).min for dtype in dtypes), max(np.iinfo(dtype).max for dtype in dtypes),
+                      True, False, nodata)
@@ -0,0 +1,48 @@
+## Name: runPipeline.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Run the preparation scripts of the Rio Grande/Bravo basin (RGB) geodatabase
+##              1. Order the scripts of the task graph (pipelineTasks.py)
+##              2. Run the independent scripts in parallel and the dependent scripts in topological order
+##              3. Skip the scripts whose code, inputs and parameters are unchanged since the last run
+##                 (the manifest records why each script was executed)
+## Usage: python runPipeline.py [--processes N] [--list] [--force] [script ...]
+##        With a list of scripts, only these scripts and the scripts they depend on are run.
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import argparse
+import datetime
+import os
+
+import pipeline
+import pipelineTasks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the preparation scripts of the RGB geodatabase")
+    parser.add_argument("scripts", nargs="*", help="scripts to run (with the scripts they depend on)")
+    parser.add_argument("--processes", type=int, default=None, help="number of scripts run in parallel")
+    parser.add_argument("--list", action="store_true", help="print the waves of scripts without running them")
+    parser.add_argument("--force", action="store_true", help="run all the scripts, even when unchanged")
+    args = parser.parse_args()
+
+    tasks = pipelineTasks.TASKS
+    if args.scripts:
+        tasks = pipeline.withDependencies(tasks, [s.replace("\\", "/") for s in args.scripts])
+
+    waves = pipeline.topologicalOrder(tasks)
+    for i, wave in enumerate(waves):
+        print "Wave", i + 1, ":", len(wave), "scripts"
+        for name in wave:
+            print "   ", name
+    if args.list:
+        raise SystemExit(0)
+
+    print "Pipeline starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+    manifestFile = None if args.force else os.path.join(pipeline.GEODATABASE, "pipeline_manifest.json")
+    status = pipeline.run(tasks, args.processes, manifestFile=manifestFile)
+    for name in sorted(status):
+        print status[name], name
+    print "Pipeline completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
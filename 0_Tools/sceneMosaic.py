@@ -0,0 +1,102 @@
+## Name: sceneMosaic.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Mosaic of the scenes (tiles) of a categorical raster dataset for the Rio Grande/Bravo basin (RGB)
+##              (e.g. the NALCMS land-cover scenes)
+##              1. Mosaic, Set Null, Project and Extract by Mask the scenes in a single pass: any number of scenes,
+##                 only the cells inside the clip rectangle are read, the null values (e.g. 0 and 255) are set to
+##                 NoData as they are read, one output per mask and no intermediate raster
+##              2. Pixel conservation: number of pixels and area of each class in the scenes (inside the rectangle
+##                 and the mask) and in each output
+## Usage:
+##      sceneMosaic.mosaic(sceneList, rectangle, [0, 255], [["RGB_Ses_na_albers.shp", "lc10ses"],
+##                         ["RGB_Basin_na_albers.shp", "lc10bas"]], outCS, interFolder, interFolder)
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import numpy as np
+
+import maskCache
+import projection
+import rasterBlocks
+import rasterType
+import warpMap
+
+
+## ---------------------------------------------------------------------------
+## 1. Mosaic
+## Description: The scenes share their coordinate system and cell size. The output grid covers the first mask,
+## in outCS, with the cell size of the projected area of a scene cell (unless given). The outputs have the pixel
+## type of the scenes (rasterType.mosaicType) and the first null value as NoData. The masks are rasterized once
+## on the output grid and cached in cacheFolder. Where the scenes overlap, the last scene with data wins.
+## Returns the histogram of each output (see pixelCount.store).
+
+def mosaic(scenes, rectangle, nullValues, outputs, outCS, cacheFolder, scratchFolder, cellSize=None,
+           blockSize=2048, report=True):
+    sceneGrid = rasterBlocks.describeGrid(scenes[0])
+    outCrs = projection.getCrs(outCS)
+    if cellSize is None:
+        cellSize = warpMap.estimateCellSize(sceneGrid, outCrs)
+    edges = maskCache.maskEdges(outputs[0][0], outCrs)
+    grid = rasterBlocks.snapGrid(rasterBlocks.edgesExtent(edges), cellSize, outCrs)
+    masks = [[maskCache.getMask(shapefile, grid, cacheFolder), outRaster] for shapefile, outRaster in outputs]
+    dtype, nodata = rasterType.mosaicType(scenes, nullValues)
+    hists = rasterBlocks.mosaicMaskProject(scenes, nullValues, masks, grid, outCS, scratchFolder, blockSize,
+                                           nodata, dtype, rectangle)
+    if report:
+        sceneHists = sceneHistograms(scenes, rectangle, nullValues, [shapefile for shapefile, o in outputs],
+                                     cacheFolder, blockSize, dtype)
+        conservationReport(sceneHists, sceneGrid.cellSize, hists, cellSize,
+                           [outRaster for s, outRaster in outputs])
+    return hists
+
+
+## ---------------------------------------------------------------------------
+## 2. Pixel conservation
+## Description: The pixels of the scenes are counted on their own grid, inside the clip rectangle and inside
+## each mask (rasterized on the grid of the scenes), without the null values. The blocks of the scenes outside
+## the first mask are not read. The scenes are assumed not to overlap.
+
+def sceneHistograms(scenes, rectangle, nullValues, shapefiles, cacheFolder=None, blockSize=2048, dtype=np.uint8):
+    nulls = np.array(nullValues)
+    hists = [np.zeros(1, dtype=np.uint64) for shapefile in shapefiles]
+    for scene in scenes:
+        src = rasterBlocks.clipExtent(rasterBlocks.describeGrid(scene), rectangle)
+        if src is None:
+            print "WARNING:", scene, "is outside of the rectangle", rectangle
+            continue
+        masks = [maskCache.getMask(shapefile, src, cacheFolder) for shapefile in shapefiles]
+        for row0, col0, nrows, ncols in src.blocks(blockSize):
+            block = src.window(row0, col0, nrows, ncols)
+            if not masks[0].touches(block):
+                continue
+            values = rasterBlocks.readWindow(scene, src, row0, col0, nrows, ncols, 0, dtype)
+            valid = ~np.in1d(values, nulls).reshape(values.shape)
+            for i, mask in enumerate(masks):
+                hists[i] = rasterBlocks.addHistogram(hists[i], np.where(valid & mask.cells(block), values, 0))
+    return hists
+
+
+# Create a Function that prints the number of pixels and the area (km2) of each class in the scenes and in
+# the outputs. The projection changes the number of pixels, not the area (equal-area coordinate systems).
+def conservationReport(sceneHists, sceneCellSize, outHists, outCellSize, names):
+    sceneArea = sceneCellSize * sceneCellSize / 1e6
+    outArea = outCellSize * outCellSize / 1e6
+    report = []
+    for name, sceneHist, outHist in zip(names, sceneHists, outHists):
+        n = max(len(sceneHist), len(outHist))
+        scene = np.zeros(n, dtype=np.uint64)
+        out = np.zeros(n, dtype=np.uint64)
+        scene[:len(sceneHist)] = sceneHist
+        out[:len(outHist)] = outHist
+        scene[0] = out[0] = 0
+        total = (int(scene.sum()) * sceneArea, int(out.sum()) * outArea)
+        difference = 100.0 * (total[1] - total[0]) / total[0] if total[0] else 0.0
+        print name, ": scenes", int(scene.sum()), "pixels", round(total[0], 2), "km2 -", \
+            "output", int(out.sum()), "pixels", round(total[1], 2), "km2 -", "difference", round(difference, 3), "%"
+        for value in np.nonzero(scene + out)[0]:
+            print "   class", value, ":", round(int(scene[value]) * sceneArea, 2), "km2 ->", \
+                round(int(out[value]) * outArea, 2), "km2"
+        report.append((name, total[0], total[1]))
+    return report
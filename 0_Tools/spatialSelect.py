@@ -0,0 +1,414 @@
+## Name: spatialSelect.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Select By Location engine for the vector preparation scripts of the Rio Grande/Bravo basin (RGB)
+##              (relations INTERSECT and WITHIN_A_DISTANCE, e.g. features intersecting RGB_Ses, water-right points
+##              within 2 km of Mexico)
+##              1. STR-tree (Sort-Tile-Recursive packed R-tree) of the edges of the target polygons, queried with
+##                 batches of boxes (NumPy, all the queries of a batch descend the tree together)
+##              2. Prepared target: the target edges are indexed once, and the extent of the target is divided in
+##                 tiles x tiles cells (inside, outside or on the boundary of the target). The points in the
+##                 inside and outside cells are located without any edge test, the others by the crossings of a
+##                 short segment to the center of the nearest cell inside or outside (tree query)
+##              3. Distance test: distance from the boundary of the target (segment to segment), evaluated on the
+##                 candidate edges of the tree only (no buffer polygon)
+##              4. Select By Location: the input features are read once (points in vectorized batches), the
+##                 selected features are written with their fields (as Select Layer By Location + Copy Features)
+## Usage:
+##      spatialSelect.selectByLocation("MX_WaterRights.shp", "WITHIN_A_DISTANCE", "Nations.shp",
+##                                     "MX_WaterRights_distance", "2 Kilometers", "\"ADM0_ID\" = '484'")
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import os
+import numpy as np
+
+import rasterBlocks
+import studyArea
+
+
+## ---------------------------------------------------------------------------
+## 1. STR-tree
+## Description: The items (boxes xmin, ymin, xmax, ymax) are sorted by the x of their center in vertical slices,
+## each slice by the y of the center, and packed in nodes of nodeSize items; the nodes are packed the same way up
+## to the root. A query returns the pairs (query, item) whose boxes intersect.
+
+class STRtree(object):
+
+    def __init__(self, boxes, nodeSize=16):
+        self.nodeSize = nodeSize
+        order = self._strOrder(boxes)
+        self.items = order
+        self.levels = [(boxes[order], None, None)]
+        while len(self.levels[-1][0]) > nodeSize:
+            below = self.levels[-1][0]
+            starts = np.arange(0, len(below), nodeSize)
+            ends = np.minimum(starts + nodeSize, len(below))
+            nodes = np.column_stack([np.minimum.reduceat(below[:, 0], starts),
+                                     np.minimum.reduceat(below[:, 1], starts),
+                                     np.maximum.reduceat(below[:, 2], starts),
+                                     np.maximum.reduceat(below[:, 3], starts)])
+            order = self._strOrder(nodes)
+            self.levels.append((nodes[order], starts[order], ends[order]))
+
+    def _strOrder(self, boxes):
+        n = len(boxes)
+        cx = (boxes[:, 0] + boxes[:, 2]) / 2
+        cy = (boxes[:, 1] + boxes[:, 3]) / 2
+        slices = int(np.ceil(np.sqrt(np.ceil(n / float(self.nodeSize)))))
+        sliceSize = int(np.ceil(n / float(slices))) if n else 1
+        byX = np.argsort(cx, kind="mergesort")
+        column = np.empty(n, dtype=np.int64)
+        column[byX] = np.arange(n) // sliceSize
+        return np.lexsort((cy, column))
+
+    # Pairs (index of the query, item) of the boxes intersecting the queries (arrays)
+    def query(self, queries):
+        top = self.levels[-1][0]
+        q = np.repeat(np.arange(len(queries)), len(top))
+        nodes = np.tile(np.arange(len(top)), len(queries))
+        for level in range(len(self.levels) - 1, -1, -1):
+            boxes, starts, ends = self.levels[level]
+            b = boxes[nodes]
+            Q = queries[q]
+            hit = (b[:, 0] <= Q[:, 2]) & (b[:, 2] >= Q[:, 0]) & (b[:, 1] <= Q[:, 3]) & (b[:, 3] >= Q[:, 1])
+            q = q[hit]
+            nodes = nodes[hit]
+            if level == 0:
+                break
+            counts = ends[nodes] - starts[nodes]
+            offsets = np.repeat(np.cumsum(counts) - counts, counts)
+            q = np.repeat(q, counts)
+            nodes = np.arange(counts.sum()) - offsets + np.repeat(starts[nodes], counts)
+        return q, self.items[nodes]
+
+
+## ---------------------------------------------------------------------------
+## 2. Prepared target
+## Description: The target is the union of the polygons of a feature class (even-odd rule: the polygons are
+## assumed not to overlap, e.g. RGB_Ses, or one nation). A point on the boundary intersects the target.
+
+OUTSIDE = 0
+INSIDE = 1
+BOUNDARY = 2
+
+# Number of queries per batch of the tree (memory of the pairs)
+BATCH = 4096
+
+
+# Create a Function that returns the distance of points to segments (arrays)
+def pointSegmentDistance(px, py, x0, y0, x1, y1):
+    dx = x1 - x0
+    dy = y1 - y0
+    length2 = dx * dx + dy * dy
+    t = np.where(length2 > 0, ((px - x0) * dx + (py - y0) * dy) / np.where(length2 > 0, length2, 1), 0)
+    t = np.clip(t, 0, 1)
+    return np.hypot(px - (x0 + t * dx), py - (y0 + t * dy))
+
+
+# Create a Function that returns the distance between segments (arrays (n, 4), 0 when they cross)
+def segmentDistance(a, b):
+    def orient(x0, y0, x1, y1, px, py):
+        return (x1 - x0) * (py - y0) - (y1 - y0) * (px - x0)
+    d1 = orient(b[:, 0], b[:, 1], b[:, 2], b[:, 3], a[:, 0], a[:, 1])
+    d2 = orient(b[:, 0], b[:, 1], b[:, 2], b[:, 3], a[:, 2], a[:, 3])
+    d3 = orient(a[:, 0], a[:, 1], a[:, 2], a[:, 3], b[:, 0], b[:, 1])
+    d4 = orient(a[:, 0], a[:, 1], a[:, 2], a[:, 3], b[:, 2], b[:, 3])
+    crossing = (d1 * d2 < 0) & (d3 * d4 < 0)
+    distance = np.minimum(np.minimum(pointSegmentDistance(a[:, 0], a[:, 1], b[:, 0], b[:, 1], b[:, 2], b[:, 3]),
+                                     pointSegmentDistance(a[:, 2], a[:, 3], b[:, 0], b[:, 1], b[:, 2], b[:, 3])),
+                          np.minimum(pointSegmentDistance(b[:, 0], b[:, 1], a[:, 0], a[:, 1], a[:, 2], a[:, 3]),
+                                     pointSegmentDistance(b[:, 2], b[:, 3], a[:, 0], a[:, 1], a[:, 2], a[:, 3])))
+    return np.where(crossing, 0.0, distance)
+
+
+# Create a Function that returns the signed area of rings (shoelace formula, positive counterclockwise)
+def signedArea(rings):
+    return sum(0.5 * float(np.sum(ring[:, 0] * np.roll(ring[:, 1], -1) - np.roll(ring[:, 0], -1) * ring[:, 1]))
+               for ring in rings)
+
+
+# Create a Function that orients the rings of a polygon as arcpy (exterior rings clockwise, holes counterclockwise)
+def clockwise(rings):
+    if signedArea(rings) > 0:
+        return [ring[::-1] for ring in rings]
+    return rings
+
+
+# Create a Function that returns the edges of the parts of a shape (closed rings for the polygons)
+def shapeEdges(shape, closed):
+    parts = rasterBlocks.shapeRings(shape)
+    if not parts:
+        return np.zeros((0, 4))
+    if closed:
+        return rasterBlocks.ringEdges(parts)
+    return np.vstack([np.hstack([part[:-1], part[1:]]) if len(part) > 1 else np.hstack([part, part])
+                      for part in parts])
+
+
+class Target(object):
+
+    def __init__(self, rings, tiles=256):
+        self.rings = rings
+        self.edges = rasterBlocks.ringEdges(rings)
+        e = self.edges
+        self.boxes = np.column_stack([np.minimum(e[:, 0], e[:, 2]), np.minimum(e[:, 1], e[:, 3]),
+                                      np.maximum(e[:, 0], e[:, 2]), np.maximum(e[:, 1], e[:, 3])])
+        self.tree = STRtree(self.boxes)
+        self.xmin, self.ymin, self.xmax, self.ymax = rasterBlocks.edgesExtent(e)
+        self.tiles = tiles
+        self.dx = (self.xmax - self.xmin) / tiles or 1.0
+        self.dy = (self.ymax - self.ymin) / tiles or 1.0
+        self.near = {}
+
+        # State of the cells: the cells without edge are inside or outside (state of their center)
+        self.states = np.where(self.edgeCells(0.0), BOUNDARY, OUTSIDE)
+        free = np.nonzero(self.states != BOUNDARY)
+        cx = self.xmin + (free[1] + 0.5) * self.dx
+        cy = self.ymin + (free[0] + 0.5) * self.dy
+        refX = np.full(len(cx), self.xmax + self.dx)
+        self.states[free] = np.where(self._crossings(cx, cy, refX) % 2 == 1, INSIDE, OUTSIDE)
+
+        # Reference of each cell of the boundary: center of the nearest cell without edge on its right (state
+        # known), or a point on the right of the target (outside)
+        self.refX = np.full((tiles, tiles), self.xmax + self.dx)
+        self.refInside = np.zeros((tiles, tiles), dtype=bool)
+        for j in range(tiles):
+            nextX = self.xmax + self.dx
+            nextInside = False
+            for i in range(tiles - 1, -1, -1):
+                if self.states[j, i] == BOUNDARY:
+                    self.refX[j, i] = nextX
+                    self.refInside[j, i] = nextInside
+                else:
+                    nextX = self.xmin + (i + 0.5) * self.dx
+                    nextInside = self.states[j, i] == INSIDE
+
+    # Cells (rows from the bottom, columns) whose box extended by a distance intersects an edge (cached)
+    def edgeCells(self, distance):
+        if distance not in self.near:
+            cells = np.zeros((self.tiles, self.tiles), dtype=bool)
+            j, i = [index.ravel() for index in np.indices((self.tiles, self.tiles))]
+            boxes = np.column_stack([self.xmin + i * self.dx - distance, self.ymin + j * self.dy - distance,
+                                     self.xmin + (i + 1) * self.dx + distance,
+                                     self.ymin + (j + 1) * self.dy + distance])
+            for start in range(0, len(boxes), BATCH):
+                q, items = self.tree.query(boxes[start:start + BATCH])
+                q = np.unique(q) + start
+                cells[j[q], i[q]] = True
+            self.near[distance] = cells
+        return self.near[distance]
+
+    # Number of crossings of the edges by horizontal segments from (x, y) to (refX, y)
+    def _crossings(self, x, y, refX):
+        counts = np.zeros(len(x), dtype=np.int64)
+        for start in range(0, len(x), BATCH):
+            sx, sy, sr = x[start:start + BATCH], y[start:start + BATCH], refX[start:start + BATCH]
+            q, items = self.tree.query(np.column_stack([sx, sy, sr, sy]))
+            x0, y0, x1, y1 = [self.edges[items, k] for k in range(4)]
+            py = sy[q]
+            crossing = (y0 > py) != (y1 > py)
+            xi = x0 + (py - y0) * (x1 - x0) / np.where(y1 != y0, y1 - y0, 1)
+            crossing &= (xi > sx[q]) & (xi <= sr[q])
+            counts[start:start + len(sx)] = np.bincount(q[crossing], minlength=len(sx))
+        return counts
+
+    # Cells of points (-1 outside the extent)
+    def cellIndex(self, x, y):
+        i = np.floor((x - self.xmin) / self.dx).astype(np.int64)
+        j = np.floor((y - self.ymin) / self.dy).astype(np.int64)
+        outside = (i < 0) | (i >= self.tiles) | (j < 0) | (j >= self.tiles)
+        i[outside] = -1
+        j[outside] = -1
+        return j, i
+
+    # Create a Function that tells if points are inside the target (arrays)
+    def contains(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        j, i = self.cellIndex(x, y)
+        known = i >= 0
+        state = np.full(len(x), OUTSIDE)
+        state[known] = self.states[j[known], i[known]]
+        inside = state == INSIDE
+        test = np.nonzero(state == BOUNDARY)[0]
+        if len(test):
+            jt, it = j[test], i[test]
+            crossings = self._crossings(x[test], y[test], self.refX[jt, it])
+            inside[test] = self.refInside[jt, it] != (crossings % 2 == 1)
+        return inside
+
+    # Create a Function that tells if segments (array (n, 4), points: x0 = x1 and y0 = y1) are within a distance
+    # of the boundary of the target
+    def nearBoundary(self, segments, distance):
+        near = np.zeros(len(segments), dtype=bool)
+        lo = np.minimum(segments[:, :2], segments[:, 2:]) - distance
+        hi = np.maximum(segments[:, :2], segments[:, 2:]) + distance
+        queries = np.hstack([lo, hi])
+        for start in range(0, len(segments), BATCH):
+            q, items = self.tree.query(queries[start:start + BATCH])
+            close = segmentDistance(segments[start + q], self.edges[items]) <= distance
+            near[start + np.unique(q[close])] = True
+        return near
+
+    # Create a Function that tells if points are within a distance of the target (inside or near the boundary)
+    def selectPoints(self, x, y, distance=0.0):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        selected = self.contains(x, y)
+        j, i = self.cellIndex(x, y)
+        # Points that may be near the boundary: outside the extent of the cells, or in a cell near an edge
+        cells = self.edgeCells(distance)
+        test = np.nonzero(~selected & ((i < 0) | cells[j, i]))[0]
+        if len(test):
+            segments = np.column_stack([x[test], y[test], x[test], y[test]])
+            selected[test] = self.nearBoundary(segments, distance)
+        return selected
+
+    # Create a Function that tells if a line or a polygon (edges) is within a distance of the target
+    def selectShape(self, edges, polygon, distance=0.0):
+        if not len(edges):
+            return False
+        xmin, ymin, xmax, ymax = rasterBlocks.edgesExtent(edges)
+        if (xmin > self.xmax + distance or xmax < self.xmin - distance or
+                ymin > self.ymax + distance or ymax < self.ymin - distance):
+            return False
+        # Extent inside the cells of the target without edge: inside or outside without edge test
+        j0, i0 = self.cellIndex(np.array([xmin]), np.array([ymin]))
+        j1, i1 = self.cellIndex(np.array([xmax]), np.array([ymax]))
+        if i0[0] >= 0 and i1[0] >= 0:
+            window = np.s_[j0[0]:j1[0] + 1, i0[0]:i1[0] + 1]
+            if not self.edgeCells(distance)[window].any():
+                # No edge between the cells: they are all inside or all outside
+                return bool((self.states[window] == INSIDE).all())
+        # A vertex inside the target, or an edge near its boundary
+        if self.contains(edges[:1, 0], edges[:1, 1])[0]:
+            return True
+        if self.nearBoundary(edges, distance).any():
+            return True
+        # The target inside the polygon (one vertex of each ring of the target)
+        if polygon:
+            points = np.array([ring[0] for ring in self.rings])
+            return bool(pointsInEdges(points[:, 0], points[:, 1], edges).any())
+        return False
+
+
+# Create a Function that tells if points are inside the polygon of a few edges (even-odd rule, no index)
+def pointsInEdges(x, y, edges):
+    x0, y0, x1, y1 = [edges[:, k][np.newaxis, :] for k in range(4)]
+    px = x[:, np.newaxis]
+    py = y[:, np.newaxis]
+    crossing = (y0 > py) != (y1 > py)
+    xi = x0 + (py - y0) * (x1 - x0) / np.where(y1 != y0, y1 - y0, 1)
+    return (crossing & (xi > px)).sum(axis=1) % 2 == 1
+
+
+## ---------------------------------------------------------------------------
+## 3. Cache of the targets
+## Description: One Target per (feature class, where clause, coordinate system) and per process. The rings of each
+## polygon are oriented as arcpy (see overlayArea).
+
+_targets = {}
+
+
+def getTarget(targetFeatures, spatialReference, where=None):
+    key = (os.path.normcase(os.path.abspath(targetFeatures)), where, spatialReference.name)
+    if key not in _targets:
+        rings = []
+        with arcpy.da.SearchCursor(targetFeatures, ["SHAPE@"], where, spatial_reference=spatialReference) as rows:
+            for row in rows:
+                if row[0] is not None:
+                    rings.extend(clockwise(rasterBlocks.shapeRings(row[0])))
+        if not rings:
+            raise Exception("No polygon in {0} ({1})".format(targetFeatures, where))
+        _targets[key] = Target(rings)
+    return _targets[key]
+
+
+## ---------------------------------------------------------------------------
+## 4. Select By Location
+## Description: relation is INTERSECT or WITHIN_A_DISTANCE, the distance a linear unit ("2 Kilometers") or a
+## number of meters. The relation is evaluated in the coordinate system of the input features, or in North America
+## Albers Equal Area Conic for a distance when the input is in geographic coordinates. where and targetWhere are
+## where clauses of the input and of the target (e.g. one nation). The output has the fields and the coordinate
+## system of the input. Returns the number of selected features.
+
+# Meters of the linear units
+UNITS = {"meters": 1.0, "kilometers": 1000.0, "feet": 0.3048, "miles": 1609.344}
+
+
+# Create a Function that returns a distance in meters ("2 Kilometers", "500", 2000.0 or None)
+def linearUnit(distance):
+    if distance is None or distance == "":
+        return 0.0
+    if not isinstance(distance, basestring):
+        return float(distance)
+    parts = distance.split()
+    unit = parts[1].lower() if len(parts) > 1 else "meters"
+    for name, meters in UNITS.items():
+        if unit.startswith(name[:-1]):
+            return float(parts[0]) * meters
+    raise Exception("Linear unit {0} is not supported".format(distance))
+
+
+# Create a Function that returns the object ID of the selected features
+def selectIDs(inFeatures, relation, targetFeatures, distance=None, targetWhere=None, where=None):
+    desc = arcpy.Describe(inFeatures)
+    distance = linearUnit(distance) if relation == "WITHIN_A_DISTANCE" else 0.0
+    spatialReference = desc.spatialReference
+    if distance > 0 and spatialReference.type == "Geographic":
+        spatialReference = arcpy.SpatialReference(studyArea.ALBERS)
+    elif distance > 0:
+        distance = distance / spatialReference.metersPerUnit
+    target = getTarget(targetFeatures, spatialReference, targetWhere)
+
+    selected = []
+    if desc.shapeType == "Point":
+        ids = []
+        xs = []
+        ys = []
+        with arcpy.da.SearchCursor(inFeatures, ["OID@", "SHAPE@XY"], where, spatial_reference=spatialReference) as rows:
+            for oid, xy in rows:
+                if xy is not None and xy[0] is not None:
+                    ids.append(oid)
+                    xs.append(xy[0])
+                    ys.append(xy[1])
+        ids = np.array(ids, dtype=np.int64)
+        keep = target.selectPoints(np.array(xs, dtype=np.float64), np.array(ys, dtype=np.float64), distance)
+        return set(ids[keep].tolist())
+
+    polygon = desc.shapeType == "Polygon"
+    with arcpy.da.SearchCursor(inFeatures, ["OID@", "SHAPE@"], where, spatial_reference=spatialReference) as rows:
+        for oid, shape in rows:
+            if shape is None:
+                continue
+            if desc.shapeType == "Multipoint":
+                points = np.array([(pnt.X, pnt.Y) for pnt in shape])
+                if target.selectPoints(points[:, 0], points[:, 1], distance).any():
+                    selected.append(oid)
+            elif target.selectShape(shapeEdges(shape, polygon), polygon, distance):
+                selected.append(oid)
+    return set(selected)
+
+
+def selectByLocation(inFeatures, relation, targetFeatures, outFeatures, distance=None, targetWhere=None,
+                     where=None):
+    if relation not in ("INTERSECT", "WITHIN_A_DISTANCE"):
+        raise Exception("Relation {0} is not supported".format(relation))
+    selected = selectIDs(inFeatures, relation, targetFeatures, distance, targetWhere, where)
+    desc = arcpy.Describe(inFeatures)
+    inFields, outFields = studyArea.createOutput(outFeatures, inFeatures, desc.shapeType, desc.spatialReference)
+    count = 0
+    cursor = arcpy.da.InsertCursor(outFeatures, ["SHAPE@"] + outFields)
+    try:
+        with arcpy.da.SearchCursor(inFeatures, ["OID@", "SHAPE@"] + inFields) as rows:
+            for row in rows:
+                if row[0] in selected:
+                    cursor.insertRow(row[1:])
+                    count += 1
+    finally:
+        del cursor
+    print "Select by location", inFeatures, relation, targetFeatures, ":", count, "features selected"
+    return count
@@ -0,0 +1,258 @@
+## Name: studyArea.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Project-and-clip service for the vector preparation scripts of the Rio Grande/Bravo basin (RGB)
+##              1. Load the study area boundaries (RGB_Basin, RGB_Ses) once per process and per coordinate system
+##              2. Index each mask with a grid of tiles (outside, inside or on the boundary of the mask)
+##              3. Clip a geometry: the features in inside tiles are kept without any geometry operation,
+##                 the features in outside tiles are dropped, the others are intersected with the part of the
+##                 mask in their tiles only
+##              4. Project and clip a feature class: the input is read once (projected on read) and all the
+##                 outputs (_bas, _ses) are written from this single read
+##              5. Nested masks (RGB_Basin is inside RGB_Ses): each feature is clipped with the outer mask first,
+##                 only the features inside the outer mask are clipped with the inner mask (clipped part only)
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import os
+
+
+## ---------------------------------------------------------------------------
+## Study area boundaries
+
+FOLDER = "C:\\GIS_RGB\\Geodatabase\\rgb_bound\\"
+BASIN = os.path.join(FOLDER, "RGB_Basin_na_albers.shp")
+SES = os.path.join(FOLDER, "RGB_Ses_na_albers.shp")
+ALBERS = "North America Albers Equal Area Conic"
+
+# State of a tile of the spatial index
+OUTSIDE = 0
+INSIDE = 1
+BOUNDARY = 2
+
+# Dimension of the result of the intersection (arcpy Geometry.intersect)
+DIMENSIONS = {"Point": 1, "Multipoint": 1, "Polyline": 2, "Polygon": 4}
+
+
+## ---------------------------------------------------------------------------
+## 1. Mask
+## Description: Polygons of a boundary shapefile dissolved in a single geometry, in a given coordinate system.
+## The extent of the mask is divided in tiles x tiles cells: the state of each tile is computed once, and the
+## part of the mask inside each boundary tile is kept (smaller geometries than the whole mask).
+
+class Mask(object):
+
+    def __init__(self, shapefile, spatialReference=None, tiles=32):
+        geometry = None
+        with arcpy.da.SearchCursor(shapefile, ["SHAPE@"]) as rows:
+            for row in rows:
+                geometry = row[0] if geometry is None else geometry.union(row[0])
+        if geometry is None:
+            raise Exception("No polygon in {0}".format(shapefile))
+        if spatialReference is not None and spatialReference.name != geometry.spatialReference.name:
+            geometry = geometry.projectAs(spatialReference)
+        self.shapefile = shapefile
+        self.geometry = geometry
+        self.spatialReference = geometry.spatialReference
+        extent = geometry.extent
+        self.xmin, self.ymin, self.xmax, self.ymax = extent.XMin, extent.YMin, extent.XMax, extent.YMax
+        self.tiles = tiles
+        self.dx = (self.xmax - self.xmin) / tiles
+        self.dy = (self.ymax - self.ymin) / tiles
+        self.states = {}
+        self.parts = {}
+        self.local = {}
+        for i in range(tiles):
+            for j in range(tiles):
+                tile = self._rectangle(i, j, i, j)
+                if geometry.disjoint(tile):
+                    self.states[(i, j)] = OUTSIDE
+                elif geometry.contains(tile):
+                    self.states[(i, j)] = INSIDE
+                else:
+                    self.states[(i, j)] = BOUNDARY
+                    self.parts[(i, j)] = geometry.intersect(tile, 4)
+
+    # Polygon of the tiles from (i0, j0) to (i1, j1) (columns i, rows j from the bottom)
+    def _rectangle(self, i0, j0, i1, j1):
+        x0 = self.xmin + i0 * self.dx
+        x1 = self.xmin + (i1 + 1) * self.dx
+        y0 = self.ymin + j0 * self.dy
+        y1 = self.ymin + (j1 + 1) * self.dy
+        points = arcpy.Array([arcpy.Point(x0, y0), arcpy.Point(x0, y1), arcpy.Point(x1, y1),
+                              arcpy.Point(x1, y0), arcpy.Point(x0, y0)])
+        return arcpy.Polygon(points, self.spatialReference)
+
+    # Tiles covered by an extent (None when the extent is outside the mask extent)
+    def _tileRange(self, extent):
+        if extent.XMax < self.xmin or extent.XMin > self.xmax or extent.YMax < self.ymin or extent.YMin > self.ymax:
+            return None
+        last = self.tiles - 1
+        i0 = min(max(int((extent.XMin - self.xmin) / self.dx), 0), last)
+        i1 = min(max(int((extent.XMax - self.xmin) / self.dx), 0), last)
+        j0 = min(max(int((extent.YMin - self.ymin) / self.dy), 0), last)
+        j1 = min(max(int((extent.YMax - self.ymin) / self.dy), 0), last)
+        return i0, j0, i1, j1
+
+    # State of an extent: OUTSIDE, INSIDE or BOUNDARY, with the tile range
+    def locate(self, extent):
+        tileRange = self._tileRange(extent)
+        if tileRange is None:
+            return OUTSIDE, None
+        i0, j0, i1, j1 = tileRange
+        states = set(self.states[(i, j)] for i in range(i0, i1 + 1) for j in range(j0, j1 + 1))
+        beyond = (extent.XMin < self.xmin or extent.XMax > self.xmax or
+                  extent.YMin < self.ymin or extent.YMax > self.ymax)
+        if states == set([OUTSIDE]):
+            return OUTSIDE, tileRange
+        if states == set([INSIDE]) and not beyond:
+            return INSIDE, tileRange
+        return BOUNDARY, tileRange
+
+    # Part of the mask covering a tile range (cached, the whole mask for large ranges)
+    def localMask(self, tileRange):
+        i0, j0, i1, j1 = tileRange
+        if (i1 - i0 + 1) * (j1 - j0 + 1) * 4 > self.tiles * self.tiles:
+            return self.geometry
+        if tileRange not in self.local:
+            local = None
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    state = self.states[(i, j)]
+                    if state == OUTSIDE:
+                        continue
+                    part = self._rectangle(i, j, i, j) if state == INSIDE else self.parts[(i, j)]
+                    local = part if local is None else local.union(part)
+            self.local[tileRange] = local
+        return self.local[tileRange]
+
+    # Clip a geometry: returns the geometry, its intersection with the mask, or None (outside the mask)
+    def clip(self, shape, dimension):
+        state, tileRange = self.locate(shape.extent)
+        if state == OUTSIDE:
+            return None
+        if state == INSIDE:
+            return shape
+        local = self.localMask(tileRange)
+        if local is None:
+            return None
+        if isinstance(shape, arcpy.PointGeometry):
+            return None if local.disjoint(shape) else shape
+        clipped = shape.intersect(local, dimension)
+        if clipped is None or clipped.pointCount == 0:
+            return None
+        return clipped
+
+
+## ---------------------------------------------------------------------------
+## 2. Cache of the masks
+## Description: One Mask per (shapefile, coordinate system) and per process. The masks are projected to the
+## coordinate system of the data only once.
+
+_masks = {}
+
+
+def spatialReferenceOf(spatialReference):
+    if isinstance(spatialReference, basestring):
+        return arcpy.SpatialReference(spatialReference)
+    return spatialReference
+
+
+def getMask(shapefile, spatialReference=None):
+    spatialReference = spatialReferenceOf(spatialReference)
+    key = (os.path.normcase(os.path.abspath(shapefile)),
+           spatialReference.name if spatialReference is not None else None)
+    if key not in _masks:
+        _masks[key] = Mask(shapefile, spatialReference)
+    return _masks[key]
+
+
+## ---------------------------------------------------------------------------
+## 3. Project and clip
+## Description: outputs is a list of [mask shapefile, output feature class]. The output feature classes have
+## the fields of the input (as with Clip_analysis). The features are projected on read to spatialReference
+## (None keeps the coordinate system of the input). With nested=True, the masks are ordered from the outer
+## to the inner mask (each mask inside the previous one). Returns the number of features written in each output.
+
+# Create a Function that returns the attribute fields of a feature class (no OID, shape, length or area fields)
+def attributeFields(fc):
+    desc = arcpy.Describe(fc)
+    skip = [desc.OIDFieldName, desc.shapeFieldName,
+            getattr(desc, "lengthFieldName", ""), getattr(desc, "areaFieldName", "")]
+    skip = set(name.lower() for name in skip if name)
+    return [f.name for f in arcpy.ListFields(fc) if f.type not in ("OID", "Geometry") and f.name.lower() not in skip]
+
+
+# Create a Function that creates an empty output with the fields of the input
+def createOutput(output, inFeatures, shapeType, spatialReference):
+    if arcpy.Exists(output):
+        arcpy.Delete_management(output)
+    folder, name = os.path.split(output)
+    arcpy.CreateFeatureclass_management(folder, name, shapeType.upper(), inFeatures,
+                                        "SAME_AS_TEMPLATE", "SAME_AS_TEMPLATE", spatialReference)
+    inFields = attributeFields(inFeatures)
+    outFields = attributeFields(output)
+    # Length and area fields of a geodatabase template become plain fields in a shapefile
+    extra = [f for f in outFields if f.lower() in ("shape_leng", "shape_area", "shape_le_1")
+             and len(outFields) > len(inFields)]
+    if extra:
+        arcpy.DeleteField_management(output, extra)
+        outFields = [f for f in outFields if f not in extra]
+    if len(outFields) != len(inFields):
+        raise Exception("Fields of {0} do not match the fields of {1}".format(output, inFeatures))
+    return inFields, outFields
+
+
+# Create a Function that clips a geometry with nested masks (from the outer to the inner mask)
+def nestedClip(masks, shape, dimension):
+    clipped = []
+    for mask in masks:
+        shape = mask.clip(shape, dimension)
+        if shape is None:
+            # Outside this mask, and then outside all the masks it contains
+            break
+        clipped.append(shape)
+    return clipped + [None] * (len(masks) - len(clipped))
+
+
+def projectClip(inFeatures, outputs, spatialReference=ALBERS, nested=False):
+    desc = arcpy.Describe(inFeatures)
+    if spatialReference is None:
+        spatialReference = desc.spatialReference
+    spatialReference = spatialReferenceOf(spatialReference)
+    dimension = DIMENSIONS[desc.shapeType]
+    masks = [getMask(mask, spatialReference) for mask, output in outputs]
+
+    cursors = []
+    inFields = None
+    for mask, output in outputs:
+        inFields, outFields = createOutput(output, inFeatures, desc.shapeType, spatialReference)
+        cursors.append(arcpy.da.InsertCursor(output, ["SHAPE@"] + outFields))
+
+    counts = [0] * len(outputs)
+    try:
+        with arcpy.da.SearchCursor(inFeatures, ["SHAPE@"] + inFields, spatial_reference=spatialReference) as rows:
+            for row in rows:
+                if row[0] is None:
+                    continue
+                if nested:
+                    clipped = nestedClip(masks, row[0], dimension)
+                else:
+                    clipped = [mask.clip(row[0], dimension) for mask in masks]
+                for k, shape in enumerate(clipped):
+                    if shape is not None:
+                        cursors[k].insertRow((shape,) + tuple(row[1:]))
+                        counts[k] += 1
+    finally:
+        # Release the insert cursors (locks of the outputs)
+        del cursors[:]
+    return counts
+
+
+# Create a Function that returns the outputs _ses and _bas of a feature class (name without extension),
+# from the outer to the inner mask
+def studyAreaOutputs(folder, name, extension=".shp"):
+    return [[SES, os.path.join(folder, name + "_ses" + extension)],
+            [BASIN, os.path.join(folder, name + "_bas" + extension)]]
@@ -0,0 +1,225 @@
+## Name: tableJoin.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Hash join of attribute tables (e.g. the census tables of the counties and municipios) to the
+##              features of the Rio Grande/Bravo basin (RGB), instead of Make Feature Layer, Select Layer By
+##              Attribute, Add Join and Copy Features for each table and a Merge of the national outputs
+##              1. Read the features once (geometry and attributes) for all the outputs
+##              2. Read each table once into a dictionary {key: row} (first row of a key, as a one-to-one Add Join)
+##              3. Write each output with a single insert cursor: the features selected by a where clause with
+##                 the fields of the tables of the output (all the years, both countries)
+##              4. Report the keys of the tables without a feature and the features without a row
+## Usage:
+##      tableJoin.joinTables(counties, "ADM2_GEOID", [[out_fc, None, [[dbf_us, "ISO_GEOID"], [dbf_mx, "ISO_GEOID"]]],
+##                                                    [out_us, "\"ADM0_ID\" = '840'", [[dbf_us, "ISO_GEOID"]]]])
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import os
+
+import studyArea
+
+
+## ---------------------------------------------------------------------------
+## 1. Features
+## Description: The features are read once per process (cached by path and key field). The where clause of an
+## output only selects the OIDs of its features (no geometry read).
+
+_features = {}
+
+
+# Create a Function that returns the join value of a key (text, without spaces; 48.0 -> "48")
+def joinKey(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value == int(value):
+        value = int(value)
+    if not isinstance(value, basestring):
+        value = str(value)
+    return value.strip()
+
+
+class Features(object):
+
+    def __init__(self, inFeatures, keyField):
+        self.inFeatures = inFeatures
+        desc = arcpy.Describe(inFeatures)
+        self.shapeType = desc.shapeType
+        self.spatialReference = desc.spatialReference
+        self.fields = studyArea.attributeFields(inFeatures)
+        names = [name.lower() for name in self.fields]
+        if keyField.lower() not in names:
+            raise Exception("Field {0} not found in {1}".format(keyField, inFeatures))
+        keyIndex = names.index(keyField.lower())
+        self.rows = {}
+        self.keys = {}
+        with arcpy.da.SearchCursor(inFeatures, ["OID@", "SHAPE@"] + self.fields) as rows:
+            for row in rows:
+                self.rows[row[0]] = row[1:]
+                self.keys[row[0]] = joinKey(row[2 + keyIndex])
+
+    # OIDs of the features selected by a where clause (in the order of the features)
+    def select(self, where=None):
+        if where is None:
+            return sorted(self.rows)
+        with arcpy.da.SearchCursor(self.inFeatures, ["OID@"], where) as rows:
+            return sorted(row[0] for row in rows)
+
+
+def getFeatures(inFeatures, keyField):
+    key = (os.path.normcase(os.path.abspath(inFeatures)), keyField.lower())
+    if key not in _features:
+        _features[key] = Features(inFeatures, keyField)
+    return _features[key]
+
+
+## ---------------------------------------------------------------------------
+## 2. Tables
+## Description: All the fields of a table are joined (with its key field, as Add Join), except the OID and the
+## geometry. The rows without a key are ignored. The rows of a key after the first are counted as duplicates.
+
+FIELD_TYPES = {"String": "TEXT", "Integer": "LONG", "SmallInteger": "SHORT", "Single": "FLOAT",
+               "Double": "DOUBLE", "Date": "DATE"}
+NUMERIC_TYPES = ["SmallInteger", "Integer", "Single", "Double"]
+
+
+class JoinTable(object):
+
+    def __init__(self, table, keyField):
+        self.table = table
+        self.fields = [f for f in arcpy.ListFields(table) if f.type in FIELD_TYPES]
+        names = [f.name.lower() for f in self.fields]
+        if keyField.lower() not in names:
+            raise Exception("Field {0} not found in {1}".format(keyField, table))
+        keyIndex = names.index(keyField.lower())
+        self.rows = {}
+        self.duplicates = 0
+        with arcpy.da.SearchCursor(table, [f.name for f in self.fields]) as rows:
+            for row in rows:
+                key = joinKey(row[keyIndex])
+                if key is None:
+                    continue
+                if key in self.rows:
+                    self.duplicates += 1
+                    continue
+                self.rows[key] = row
+
+
+## ---------------------------------------------------------------------------
+## 3. Join
+## Description: outputs is a list of [output, where clause on the features (None for all), list of [table, key
+## field]]. The fields of the tables are added after the fields of the features. The fields with the same name
+## in several tables of an output are a single field (as Merge, e.g. the US and MX tables of a year) when they
+## are both numeric (widest type), text or date. The other fields with a name already used get a suffix (name_1,
+## as Add Join). Returns the number of features written in each output.
+
+# Create a Function that returns a field name not used yet (10 characters in a shapefile)
+def uniqueName(name, used, shapefile):
+    if shapefile:
+        name = name[:10]
+    i = 0
+    candidate = name
+    while candidate.lower() in used:
+        i += 1
+        suffix = "_{0}".format(i)
+        candidate = (name[:10 - len(suffix)] if shapefile else name) + suffix
+    return candidate
+
+
+# Create a Function that returns the group of a field type (the numeric fields of several tables are merged)
+def typeGroup(fieldType):
+    return "Number" if fieldType in NUMERIC_TYPES else fieldType
+
+
+# Create a Function that returns True when a field is wider than a column (the widest type and the longest text
+# of the tables are kept)
+def wider(f, column):
+    if f.type in NUMERIC_TYPES:
+        return NUMERIC_TYPES.index(f.type) > NUMERIC_TYPES.index(column[1])
+    return f.type == "String" and f.length > column[4]
+
+
+# Create a Function that adds the fields of the tables of an output, returns the output fields and, for each
+# table, the list of (output field index, table field index)
+def addTableFields(output, outFields, tables):
+    shapefile = output.lower().endswith(".shp")
+    used = set(name.lower() for name in outFields)
+    columns = []
+    shared = {}
+    mappings = []
+    for table in tables:
+        mapping = []
+        for i, f in enumerate(table.fields):
+            group = (f.name.lower(), typeGroup(f.type))
+            if group in shared:
+                column = columns[shared[group]]
+                if wider(f, column):
+                    columns[shared[group]] = [column[0], f.type, f.precision, f.scale, f.length]
+                mapping.append((shared[group], i))
+                continue
+            name = uniqueName(f.name, used, shapefile)
+            used.add(name.lower())
+            shared[group] = len(columns)
+            mapping.append((len(columns), i))
+            columns.append([name, f.type, f.precision, f.scale, f.length])
+        mappings.append(mapping)
+    for name, fieldType, precision, scale, length in columns:
+        arcpy.AddField_management(output, name, FIELD_TYPES[fieldType], precision, scale,
+                                  length if fieldType == "String" else "")
+    return [column[0] for column in columns], mappings
+
+
+# Create a Function that prints the features without a row and the keys of the tables without a feature
+def joinReport(output, features, oids, tables, joined, examples=10):
+    keys = set(features.keys[oid] for oid in oids)
+    print os.path.basename(output), ":", len(oids), "features,", joined, "joined"
+    missing = sorted(features.keys[oid] for oid in oids
+                     if not any(features.keys[oid] in table.rows for table in tables))
+    if missing:
+        print "   ", len(missing), "features without a row:", ", ".join(map(str, missing[:examples])), \
+            "..." if len(missing) > examples else ""
+    for table in tables:
+        unmatched = sorted(key for key in table.rows if key not in keys)
+        print "   ", os.path.basename(table.table), ":", len(table.rows), "keys,", len(unmatched), \
+            "without a feature", ", ".join(unmatched[:examples]), "..." if len(unmatched) > examples else ""
+        if table.duplicates:
+            print "   ", os.path.basename(table.table), ":", table.duplicates, "duplicate rows ignored"
+
+
+def joinTables(inFeatures, keyField, outputs):
+    features = getFeatures(inFeatures, keyField)
+    tables = {}
+    counts = []
+    for output, where, joins in outputs:
+        outTables = []
+        for table, tableKey in joins:
+            key = (os.path.normcase(os.path.abspath(table)), tableKey.lower())
+            if key not in tables:
+                tables[key] = JoinTable(table, tableKey)
+            outTables.append(tables[key])
+
+        inFields, outFields = studyArea.createOutput(output, inFeatures, features.shapeType,
+                                                     features.spatialReference)
+        fields, mappings = addTableFields(output, outFields, outTables)
+        oids = features.select(where)
+        joined = 0
+        with arcpy.da.InsertCursor(output, ["SHAPE@"] + outFields + fields) as cursor:
+            for oid in oids:
+                key = features.keys[oid]
+                values = [None] * len(fields)
+                matched = False
+                for table, mapping in zip(outTables, mappings):
+                    row = table.rows.get(key)
+                    if row is None:
+                        continue
+                    matched = True
+                    for column, i in mapping:
+                        if values[column] is None:
+                            values[column] = row[i]
+                cursor.insertRow(list(features.rows[oid]) + values)
+                joined += matched
+        joinReport(output, features, oids, outTables, joined)
+        counts.append(len(oids))
+    return counts
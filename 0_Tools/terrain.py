@@ -0,0 +1,129 @@
+## Name: terrain.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Tiled slope engine for the elevation rasters of the Rio Grande/Bravo basin (RGB)
+##              1. Read each block of the elevation raster once, with a halo of 1 cell (neighbors of the edge cells)
+##              2. Compute the gradient of the block (3 x 3 neighborhood of Horn, as the tool Slope)
+##              3. Compute the slope in degree and in percent rise from the same gradient
+##              4. Distribute the blocks of all the rasters over a pool of processes: each process saves its
+##                 blocks, the blocks of each output are assembled in the final raster (rasterBlocks.BlockWriter)
+## Usage:
+##      terrain.slope([["elev_bas", [["slopedegbas", "DEGREE"], ["slopepctbas", "PERCENT_RISE"]]]], scratchFolder)
+## On Windows, the processes of the pool import the main script again: the calling script must run its steps
+## under if __name__ == "__main__":
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import multiprocessing
+import numpy as np
+
+import rasterBlocks
+
+
+# NoData value of the slope rasters (a slope is never negative)
+NODATA = -9999.0
+
+# Units of the slope (as the tool Slope)
+UNITS = ("DEGREE", "PERCENT_RISE")
+
+
+## ---------------------------------------------------------------------------
+## 1. Gradient
+## Description: The block is read with a halo of 1 cell. As in the tool Slope, the NoData neighbors of a cell
+## (and the neighbors outside the raster) take the value of the cell, and the cells with NoData get NoData.
+##      a b c
+##      d e f      dz/dx = ((c + 2f + i) - (a + 2d + g)) / (8 * cell size)
+##      g h i      dz/dy = ((g + 2h + i) - (a + 2b + c)) / (8 * cell size)
+
+# Create a Function that computes the rise (tangent of the slope) of the cells of a block read with a halo
+# (float array, NaN = NoData). Returns an array of 2 rows and 2 columns less than the block.
+def rise(z, cellSize, zFactor=1.0):
+    nrows, ncols = z.shape[0] - 2, z.shape[1] - 2
+    e = z[1:-1, 1:-1]
+
+    def neighbor(dr, dc):
+        v = z[1 + dr:1 + dr + nrows, 1 + dc:1 + dc + ncols]
+        return np.where(np.isnan(v), e, v)
+
+    a, b, c = neighbor(-1, -1), neighbor(-1, 0), neighbor(-1, 1)
+    d, f = neighbor(0, -1), neighbor(0, 1)
+    g, h, i = neighbor(1, -1), neighbor(1, 0), neighbor(1, 1)
+    dzdx = ((c + 2 * f + i) - (a + 2 * d + g)) / (8.0 * cellSize)
+    dzdy = ((g + 2 * h + i) - (a + 2 * b + c)) / (8.0 * cellSize)
+    values = np.hypot(dzdx, dzdy) * zFactor
+    # The center cell is not in the formula
+    values[np.isnan(e)] = np.nan
+    return values
+
+
+# Create a Function that converts the rise to a slope unit (NoData where the rise is NaN)
+def slopeValues(riseValues, unit):
+    if unit == "DEGREE":
+        values = np.degrees(np.arctan(riseValues))
+    elif unit == "PERCENT_RISE":
+        values = riseValues * 100.0
+    else:
+        raise Exception("Unit {0} not in {1}".format(unit, UNITS))
+    values[np.isnan(values)] = NODATA
+    return values.astype(np.float32)
+
+
+## ---------------------------------------------------------------------------
+## 2. Tile
+## Description: A tile is (input raster, grid of the raster, block, outputs, NoData value of the input, scratch
+## folder, z factor). It is run in a process of the pool: the block is read once and the block of each output
+## is saved in the scratch folder. Returns the list of (index of the output, block file).
+
+def slopeTile(tile):
+    inRaster, grid, (row0, col0, nrows, ncols), outputs, nodata, scratchFolder, zFactor = tile
+    arcpy.env.overwriteOutput = True
+    array = rasterBlocks.readWindow(inRaster, grid, row0 - 1, col0 - 1, nrows + 2, ncols + 2, nodata)
+    z = array.astype(np.float64)
+    z[array == nodata] = np.nan
+    riseValues = rise(z, grid.cellSize, zFactor)
+    blocks = []
+    for k, (outRaster, unit) in enumerate(outputs):
+        blockFile = rasterBlocks.saveBlock(outRaster, grid, row0, col0, slopeValues(riseValues, unit),
+                                           NODATA, scratchFolder)
+        blocks.append((k, blockFile))
+    return blocks
+
+
+## ---------------------------------------------------------------------------
+## 3. Slope
+## Description: jobs is a list of [input raster, outputs], outputs a list of [output raster, unit] (DEGREE or
+## PERCENT_RISE). The outputs keep the grid and the coordinate system of their input (32-bit float).
+## With processes=1, the tiles are computed in the calling process.
+
+def slope(jobs, scratchFolder, blockSize=1024, processes=None, zFactor=1.0):
+    tiles = []
+    writers = []
+    for inRaster, outputs in jobs:
+        grid = rasterBlocks.describeGrid(inRaster)
+        raster = arcpy.Raster(inRaster)
+        # A value that is not an elevation, for the cells outside the raster when it has no NoData value
+        nodata = raster.noDataValue if raster.noDataValue is not None else -32768
+        jobWriters = [rasterBlocks.BlockWriter(outRaster, grid, raster.spatialReference, NODATA,
+                                               "32_BIT_FLOAT", scratchFolder) for outRaster, unit in outputs]
+        for block in grid.blocks(blockSize):
+            tiles.append((len(writers), (inRaster, grid, block, outputs, nodata, scratchFolder, zFactor)))
+        writers.append(jobWriters)
+
+    if processes == 1:
+        results = [(j, slopeTile(tile)) for j, tile in tiles]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = zip([j for j, tile in tiles], pool.map(slopeTile, [tile for j, tile in tiles]))
+        finally:
+            pool.close()
+            pool.join()
+
+    for j, blocks in results:
+        for k, blockFile in blocks:
+            writers[j][k].add(blockFile)
+    for jobWriters in writers:
+        for writer in jobWriters:
+            writer.close()
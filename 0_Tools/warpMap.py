@@ -0,0 +1,239 @@
+## Name: warpMap.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Reprojection of the rasters of the Rio Grande/Bravo basin (RGB) with reusable warp maps
+##              1. Target grid of a reprojection: extent of the projected boundary of the source grid, cell size with
+##                 the area of a source cell projected at the center of the grid (pixel-area-correct)
+##              2. Warp map of a (source grid, target grid) pair: index of the source cell of each target cell
+##                 (nearest neighbor, inverse transformation of the target cell centers), computed once and cached
+##                 on disk (.npy, uint32, memory-mapped)
+##              3. Warp a raster with a cached map: a gather of the source cells, block by block (no transformation
+##                 of coordinates), so the rasters sharing a grid are reprojected for the cost of a read
+##              4. Project Raster: the warp map engine, or the tool Project Raster when a coordinate system is not
+##                 supported by projection.py. The rasters cut from the same raster (e.g. the _ses and _bas outputs
+##                 of Extract by Mask) share the map of the grid they were cut from
+##              5. Warp map of a tile on a window of an output grid (e.g. the CDL state tiles on the grid of RGB_Ses),
+##                 used by rasterBlocks.mosaicMaskProject instead of transforming the coordinates of each block
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import hashlib
+import math
+import os
+import numpy as np
+
+import maskCache
+import projection
+import rasterBlocks
+
+
+## ---------------------------------------------------------------------------
+## 1. Target grid
+
+# Create a Function that returns the cell size of the target grid: side of the square with the area of the
+# source cell at the center of the source grid, projected to the target coordinate system
+def estimateCellSize(src, dstCrs):
+    transform = projection.getTransformer(src.crs, dstCrs)
+    x = src.xmin + (src.ncols // 2) * src.cellSize
+    y = src.ymax - (src.nrows // 2) * src.cellSize
+    tx, ty = transform(np.array([x, x + src.cellSize, x]), np.array([y, y, y - src.cellSize]))
+    dx = math.hypot(tx[1] - tx[0], ty[1] - ty[0])
+    dy = math.hypot(tx[2] - tx[0], ty[2] - ty[0])
+    return round(math.sqrt(dx * dy), 3)
+
+
+# Create a Function that returns the extent (xmin, ymin, xmax, ymax) of a source grid projected to the target
+# coordinate system (boundary densified with n points per side)
+def projectedExtent(src, dstCrs, n=256):
+    t = np.linspace(0.0, 1.0, n)
+    xs = np.concatenate([src.xmin + t * (src.xmax - src.xmin), np.full(n, src.xmax),
+                         src.xmax - t * (src.xmax - src.xmin), np.full(n, src.xmin)])
+    ys = np.concatenate([np.full(n, src.ymax), src.ymax - t * (src.ymax - src.ymin),
+                         np.full(n, src.ymin), src.ymin + t * (src.ymax - src.ymin)])
+    tx, ty = projection.getTransformer(src.crs, dstCrs)(xs, ys)
+    return tx.min(), ty.min(), tx.max(), ty.max()
+
+
+# Create a Function that returns the target grid of a source grid (cells aligned on multiples of the cell size)
+def targetGrid(src, dstCrs, cellSize=None):
+    if cellSize is None:
+        cellSize = estimateCellSize(src, dstCrs)
+    return rasterBlocks.snapGrid(projectedExtent(src, dstCrs), cellSize, dstCrs)
+
+
+# Create a Function that returns the window of a target grid covering a source grid (None when they do not
+# intersect)
+def coveringWindow(src, dst):
+    return maskCache.clipGrid(maskCache.coveringGrid(dst, projectedExtent(src, dst.crs)), dst)
+
+
+## ---------------------------------------------------------------------------
+## 2. Warp map
+## Description: The map is an array of the target grid: linear index (row x ncols + col) of the source cell
+## containing the center of each target cell, NONE outside the source grid. It is computed by blocks of rows,
+## in a temporary file renamed when complete.
+
+NONE = np.uint32(2 ** 32 - 1)
+
+
+class WarpMap(object):
+
+    def __init__(self, src, dst, index):
+        self.src = src
+        self.dst = dst
+        self.index = index
+
+    # Source cells (rows, cols) of a window of the target grid (-1 outside the source grid)
+    def window(self, row0, col0, nrows, ncols):
+        index = np.asarray(self.index[row0:row0 + nrows, col0:col0 + ncols]).astype(np.int64)
+        outside = index == NONE
+        rows = index // self.src.ncols
+        cols = index % self.src.ncols
+        rows[outside] = -1
+        cols[outside] = -1
+        return rows, cols
+
+    # Source cells (rows, cols) of cells (rows, cols) of a window of the target grid, which may extend beyond the
+    # target grid of the map (-1 outside the map or outside the source grid)
+    def cells(self, window, rows, cols):
+        row0, col0 = self.dst.offsetOf(window)
+        rows = rows + row0
+        cols = cols + col0
+        srcRows = np.full(len(rows), -1, dtype=np.int64)
+        srcCols = np.full(len(rows), -1, dtype=np.int64)
+        inside = (rows >= 0) & (rows < self.dst.nrows) & (cols >= 0) & (cols < self.dst.ncols)
+        if not inside.any():
+            return srcRows, srcCols
+        r0, r1 = rows[inside].min(), rows[inside].max() + 1
+        c0, c1 = cols[inside].min(), cols[inside].max() + 1
+        index = np.asarray(self.index[r0:r1, c0:c1])[rows[inside] - r0, cols[inside] - c0].astype(np.int64)
+        found = index != NONE
+        target = np.nonzero(inside)[0][found]
+        srcRows[target] = index[found] // self.src.ncols
+        srcCols[target] = index[found] % self.src.ncols
+        return srcRows, srcCols
+
+
+def buildIndex(src, dst, index, blockRows=512):
+    transform = projection.getTransformer(dst.crs, src.crs)
+    for row0 in range(0, dst.nrows, blockRows):
+        block = dst.window(row0, 0, min(blockRows, dst.nrows - row0), dst.ncols)
+        xs, ys = block.centers()
+        x, y = np.meshgrid(xs, ys)
+        rows, cols = src.cellIndex(*transform(x.ravel(), y.ravel()))
+        linear = np.where(rows >= 0, rows * src.ncols + cols, NONE).astype(np.uint32)
+        index[row0:row0 + block.nrows] = linear.reshape(block.nrows, block.ncols)
+
+
+# Create a Function that returns the warp map of a (source grid, target grid) pair, cached in a folder
+# (None keeps the map in memory only)
+def getWarpMap(src, dst, cacheFolder=None):
+    if src.nrows * src.ncols >= NONE:
+        raise Exception("Source grid too large for a uint32 warp map: {0}".format(src.key()))
+    if cacheFolder is None:
+        index = np.empty((dst.nrows, dst.ncols), dtype=np.uint32)
+        buildIndex(src, dst, index)
+        return WarpMap(src, dst, index)
+    key = hashlib.sha1(repr((src.key(), dst.key())).encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(cacheFolder, "warp_{0}.npy".format(key))
+    if not os.path.exists(path):
+        print "Compute the warp map", src.nrows, "x", src.ncols, "->", dst.nrows, "x", dst.ncols, "cells"
+        index = np.lib.format.open_memmap(path + ".tmp.npy", mode="w+", dtype=np.uint32,
+                                          shape=(dst.nrows, dst.ncols))
+        buildIndex(src, dst, index)
+        index.flush()
+        del index
+        os.rename(path + ".tmp.npy", path)
+    return WarpMap(src, dst, np.load(path, mmap_mode="r"))
+
+
+## ---------------------------------------------------------------------------
+## 3. Warp
+## Description: The input raster has the grid of the source of the map, or a window of it (same cell alignment).
+## For each block of the target grid, only the window of the input covering the source cells of the block is
+## read, and the cells are gathered. The cells without source get nodata (by default the NoData of the input).
+
+# Create a Function that gathers the cells of a raster (grid src) for a window of the target grid of a map
+# (None when no cell of the window has a source in the raster)
+def gather(inRaster, src, warpMap, row0, col0, nrows, ncols, nodata, dtype):
+    rowOffset, colOffset = warpMap.src.offsetOf(src)
+    rows, cols = warpMap.window(row0, col0, nrows, ncols)
+    rows = rows - rowOffset
+    cols = cols - colOffset
+    valid = (rows >= 0) & (rows < src.nrows) & (cols >= 0) & (cols < src.ncols)
+    if not valid.any():
+        return None
+    out = np.full((nrows, ncols), nodata, dtype=dtype)
+    r0, r1 = rows[valid].min(), rows[valid].max() + 1
+    c0, c1 = cols[valid].min(), cols[valid].max() + 1
+    window = rasterBlocks.readWindow(inRaster, src, r0, c0, r1 - r0, c1 - c0, nodata, dtype)
+    out[valid] = window[rows[valid] - r0, cols[valid] - c0]
+    return out
+
+
+# Create a Function that warps a raster on the target grid of a map, or on a window of it (outGrid)
+def warp(inRaster, warpMap, outRaster, spatialReference, scratchFolder, blockSize=2048, nodata=None, outGrid=None):
+    src = rasterBlocks.describeGrid(inRaster)
+    raster = arcpy.Raster(inRaster)
+    dtype = maskCache.DTYPES[raster.pixelType]
+    if nodata is None:
+        nodata = raster.noDataValue if raster.noDataValue is not None else 0
+    if outGrid is None:
+        outGrid = warpMap.dst
+    windowRow0, windowCol0 = warpMap.dst.offsetOf(outGrid)
+    writer = rasterBlocks.BlockWriter(outRaster, outGrid, spatialReference, nodata,
+                                      rasterBlocks.PIXEL_TYPES[np.dtype(dtype).name], scratchFolder)
+    for row0, col0, nrows, ncols in outGrid.blocks(blockSize):
+        out = gather(inRaster, src, warpMap, windowRow0 + row0, windowCol0 + col0, nrows, ncols, nodata, dtype)
+        if out is not None:
+            writer.write(row0, col0, out)
+    writer.close()
+
+
+## ---------------------------------------------------------------------------
+## 4. Project Raster
+## Description: Project a raster to outCS (nearest neighbor). The warp map is cached in cacheFolder and reused by
+## the rasters with the same grid and the same target grid. With sourceRaster, the map is the one of the grid of
+## sourceRaster (the input is a window of it, e.g. an output of Extract by Mask): all the rasters cut from
+## sourceRaster share one map and one target grid, and each one is written on the window of the target grid
+## covering it. When the coordinate system of the input or of the output is not supported by projection.py, the
+## tool Project Raster is used.
+
+# Create a Function that tells if a coordinate system is supported by projection.py
+def supported(spatialReference):
+    try:
+        projection.getCrs(spatialReference)
+        return True
+    except Exception:
+        return False
+
+
+def projectRaster(inRaster, outRaster, outCS, cacheFolder, scratchFolder, cellSize=None, sourceRaster=None):
+    outCS = arcpy.SpatialReference(outCS) if isinstance(outCS, basestring) else outCS
+    if not (supported(arcpy.Describe(inRaster).spatialReference) and supported(outCS)):
+        print "WARNING: coordinate system not supported by the warp maps, Project Raster is used for", inRaster
+        arcpy.ProjectRaster_management(inRaster, outRaster, outCS)
+        return None
+    src = rasterBlocks.describeGrid(sourceRaster or inRaster)
+    dst = targetGrid(src, outCS, cellSize)
+    outGrid = dst
+    if sourceRaster is not None:
+        outGrid = coveringWindow(rasterBlocks.describeGrid(inRaster), dst)
+    warp(inRaster, getWarpMap(src, dst, cacheFolder), outRaster, outCS, scratchFolder, outGrid=outGrid)
+    return outGrid
+
+
+## ---------------------------------------------------------------------------
+## 5. Warp map of a tile
+## Description: The map of a tile (e.g. a CDL state) covers only the window of the output grid where the tile
+## is (the map of the whole output grid would be several GB per tile). The tiles with the same grid (e.g. the
+## same state in all the years) share the map, cached in cacheFolder. Returns None when the tile is outside of
+## the output grid.
+
+def tileWarpMap(tile, grid, cacheFolder=None):
+    window = coveringWindow(tile, grid)
+    if window is None:
+        return None
+    return getWarpMap(tile, window, cacheFolder)
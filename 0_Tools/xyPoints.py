@@ -0,0 +1,147 @@
+## Name: xyPoints.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Point features from the coordinates of a table for the Rio Grande/Bravo basin (RGB) (e.g. gauges,
+##              dams, water rights), instead of Make XY Event Layer, Save To Layer File and Copy Features followed
+##              by Project
+##              1. Read the table once: the attributes and the coordinate columns as arrays
+##              2. Drop the rows with invalid coordinates (null, not a number, out of range, 0 used for a missing
+##                 coordinate) with a report
+##              3. Project all the coordinates in one vectorized transform (projection.getTransformer). The
+##                 coordinates are assumed to be decimal degrees on WGS 1984 unless inCS is given (Make XY Event
+##                 Layer without a spatial reference, as in the former scripts, also used WGS 1984)
+##              4. Write the projected points directly with a single insert cursor (no layer file)
+## Usage:
+##      xyPoints.tableToPoints(dbf_file, "LONGITUDE", "LATITUDE", os.path.join(out_gdb, "NM_dams_pr"))
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import os
+import numpy as np
+
+import excelCache
+import projection
+import studyArea
+import tableJoin
+
+
+## ---------------------------------------------------------------------------
+## 1. Coordinates
+## Description: The coordinates are read as float (numeric fields or text fields holding a number). The values
+## that are not numbers are NaN.
+
+GEOGRAPHIC = "GCS_WGS_1984"
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def coordinateArray(values):
+    return np.array([_float(value) for value in values], dtype=np.float64)
+
+
+## ---------------------------------------------------------------------------
+## 2. Invalid coordinates
+## Description: Returns the reason of each row (0 valid, 1 null or not a number, 2 out of range, 3 zero). The
+## range is tested for geographic coordinates only (longitude -180 to 180, latitude -90 to 90). A coordinate equal
+## to 0 is a missing coordinate in the tables of the RGB (no point of the study area is on the equator or on the
+## prime meridian).
+
+VALID = 0
+NULL = 1
+OUT_OF_RANGE = 2
+ZERO = 3
+REASONS = {NULL: "null or not a number", OUT_OF_RANGE: "out of range", ZERO: "zero"}
+
+
+def invalidCoordinates(x, y, geographic=True):
+    reason = np.zeros(len(x), dtype=np.uint8)
+    finite = np.isfinite(x) & np.isfinite(y)
+    reason[~finite] = NULL
+    if geographic:
+        with np.errstate(invalid="ignore"):
+            outside = finite & ((np.abs(x) > 180) | (np.abs(y) > 90))
+        reason[outside] = OUT_OF_RANGE
+    reason[(reason == VALID) & ((x == 0) | (y == 0))] = ZERO
+    return reason
+
+
+# Create a Function that prints the number of points written and the rows dropped (with their OIDs)
+def pointReport(table, output, oids, reason, examples=10):
+    print os.path.split(output)[1], ":", len(reason), "rows of", os.path.split(table)[1], "-", \
+        int((reason == VALID).sum()), "points written"
+    for code in sorted(REASONS):
+        dropped = oids[reason == code]
+        if len(dropped):
+            print "   ", len(dropped), "rows dropped (coordinates " + REASONS[code] + "), OID", \
+                ", ".join(str(oid) for oid in dropped[:examples]), "..." if len(dropped) > examples else ""
+
+
+## ---------------------------------------------------------------------------
+## 3. Output
+## Description: The output gets the fields of the table (except the OID), with the same names. The Id field that
+## Create Feature Class adds to a shapefile is removed.
+
+# Create a Function that adds a field of the table to the output and returns its name
+def addField(output, f, used, shapefile):
+    name = tableJoin.uniqueName(f.name, used, shapefile)
+    arcpy.AddField_management(output, name, tableJoin.FIELD_TYPES[f.type], f.precision, f.scale,
+                              f.length if f.type == "String" else "")
+    used.add(name.lower())
+    return name
+
+
+def createPointOutput(output, fields, spatialReference):
+    if arcpy.Exists(output):
+        arcpy.Delete_management(output)
+    folder, name = os.path.split(output)
+    arcpy.CreateFeatureclass_management(folder, name, "POINT", "", "DISABLED", "DISABLED", spatialReference)
+    shapefile = output.lower().endswith(".shp")
+    used = set(f.name.lower() for f in arcpy.ListFields(output))
+    # The Id field of the shapefile is deleted once the other fields exist, a field Id of the table is added after
+    last = [f for f in fields if shapefile and f.name.lower() == "id"]
+    names = dict((f.name, addField(output, f, used, shapefile)) for f in fields if f not in last)
+    if shapefile:
+        arcpy.DeleteField_management(output, "Id")
+        used.discard("id")
+    names.update((f.name, addField(output, f, used, shapefile)) for f in last)
+    return [names[f.name] for f in fields]
+
+
+## ---------------------------------------------------------------------------
+## 4. Table to points
+## Description: The coordinates of the table are in inCS (by default WGS 1984, as Make XY Event Layer; no datum
+## transformation to the output, see projection), the points are written in spatialReference (by default North
+## America Albers Equal Area Conic). The rows with invalid coordinates are not written. Returns the number of
+## points written.
+
+def tableToPoints(table, xField, yField, output, spatialReference=studyArea.ALBERS, inCS=GEOGRAPHIC):
+    table = excelCache.fullPath(table)
+    output = excelCache.fullPath(output)
+    fields = [f for f in arcpy.ListFields(table) if f.type in tableJoin.FIELD_TYPES]
+    names = [f.name.lower() for f in fields]
+    for field in (xField, yField):
+        if field.lower() not in names:
+            raise Exception("Field {0} not found in {1}".format(field, table))
+    with arcpy.da.SearchCursor(table, ["OID@"] + [f.name for f in fields]) as cursor:
+        rows = [row for row in cursor]
+    oids = np.array([row[0] for row in rows], dtype=np.int64)
+    x = coordinateArray([row[1 + names.index(xField.lower())] for row in rows])
+    y = coordinateArray([row[1 + names.index(yField.lower())] for row in rows])
+
+    reason = invalidCoordinates(x, y, projection.getCrs(inCS)[0] == "geographic")
+    valid = np.nonzero(reason == VALID)[0]
+    px, py = projection.getTransformer(inCS, spatialReference)(x[valid], y[valid])
+
+    outFields = createPointOutput(output, fields, studyArea.spatialReferenceOf(spatialReference))
+    with arcpy.da.InsertCursor(output, ["SHAPE@XY"] + outFields) as cursor:
+        for i, point in zip(valid, zip(px.tolist(), py.tolist())):
+            cursor.insertRow([point] + list(rows[i][1:]))
+    pointReport(table, output, oids, reason)
+    return len(valid)
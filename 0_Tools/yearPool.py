@@ -0,0 +1,166 @@
+## Name: yearPool.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Year-parallel Mosaic, Set Null, Extract by Mask and Project of a yearly dataset of the
+##              Rio Grande/Bravo basin (RGB) (e.g. the CDL 2008-2018)
+##              1. Each year is computed in a process of a pool (rasterBlocks.mosaicMaskProject): the process
+##                 reads and projects the tiles of its year and saves the blocks of the outputs
+##              2. The masks are rasterized once by the main process and cached (maskCache.getMask): the processes
+##                 open the cached files memory-mapped read-only, so the pages of the masks are shared by all the
+##                 processes instead of being copied in each of them
+##              3. The warp map of each distinct grid of the tiles (e.g. a state in all the years) is computed once
+##                 by the main process and cached the same way (warpMap.tileWarpMap): the processes reproject the
+##                 tiles by a lookup of the map instead of transforming the coordinates of each block
+##              4. The outputs of a year are assembled by the main process as soon as the year is completed, and
+##                 the year is recorded in a manifest (year_YYYY.json, temporary file renamed when complete): a year
+##                 with a valid manifest is not computed again when the script is run again (e.g. after a failure)
+## Usage:
+##      hists = yearPool.mosaicYears([["2008", tifList, [0], [["RGB_Ses.shp", "cdl2008ses"]]]], grid, outCS,
+##                                   scratchFolder, scratchFolder)
+## On Windows, the processes of the pool import the main script again: the calling script must run its steps
+## under if __name__ == "__main__":
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import json
+import multiprocessing
+import os
+import numpy as np
+
+import maskCache
+import pixelCount
+import rasterBlocks
+import rasterType
+import warpMap
+
+
+## ---------------------------------------------------------------------------
+## 1. Year
+## Description: A job is (year, input rasters, null values, outputs, grid, cache folder, scratch folder, block
+## size, NoData value, data type), outputs a list of [mask shapefile, output raster]. The input rasters are full
+## paths (the processes do not share the workspace of the main process). Returns the year, the histogram of each
+## output and the list of the block files of each output.
+
+def mosaicYear(job):
+    year, inRasters, nullValues, outputs, grid, cacheFolder, scratchFolder, blockSize, nodata, dtype = job
+    arcpy.env.overwriteOutput = True
+    masks = [[maskCache.getMask(shapefile, grid, cacheFolder), outRaster] for shapefile, outRaster in outputs]
+    warpMaps = [warpMap.tileWarpMap(rasterBlocks.describeGrid(raster), grid, cacheFolder) for raster in inRasters]
+    hists, blockLists = rasterBlocks.mosaicMaskProject(inRasters, nullValues, masks, grid, None, scratchFolder,
+                                                       blockSize, nodata, dtype, assemble=False, warpMaps=warpMaps)
+    return year, [hist.tolist() for hist in hists], blockLists
+
+
+## ---------------------------------------------------------------------------
+## 2. Manifest
+## Description: The manifest of a year lists its inputs (with their modification time), its outputs and their
+## histograms. It is valid while the inputs are not modified and the outputs exist.
+
+def manifestPath(folder, year):
+    return os.path.join(folder, "year_{0}.json".format(year))
+
+
+# Create a Function that returns the inputs of a year with their modification time
+def inputTimes(inRasters):
+    return [[raster, os.path.getmtime(raster) if os.path.exists(raster) else None] for raster in inRasters]
+
+
+# Create a Function that returns the histograms of a completed year (None when the year must be computed)
+def readManifest(folder, year, inRasters, outputs):
+    path = manifestPath(folder, year)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest["inputs"] != inputTimes(inRasters):
+        return None
+    if manifest["outputs"] != [outRaster for shapefile, outRaster in outputs]:
+        return None
+    if not all(arcpy.Exists(outRaster) for shapefile, outRaster in outputs):
+        return None
+    return manifest["hists"]
+
+
+def writeManifest(folder, year, inRasters, outputs, hists):
+    path = manifestPath(folder, year)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"year": year, "inputs": inputTimes(inRasters),
+                   "outputs": [outRaster for shapefile, outRaster in outputs], "hists": hists}, f)
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(path + ".tmp", path)
+
+
+## ---------------------------------------------------------------------------
+## 3. Years
+## Description: jobs is a list of [year, input rasters, null values, outputs]. The outputs of all the years are
+## on the same grid (the masks and the warp maps of the tiles are cached once for all the years). The pixel type
+## and the NoData value of each year are the ones of its inputs (rasterType.mosaicType). The manifests are written
+## in cacheFolder. The main process assembles the outputs (MosaicToNewRaster, one raster at a time in the output
+## workspace) and stores their histograms (pixelCount.store). With processes=1, the years are computed in the
+## calling process.
+## Returns {year: histograms}.
+
+def mosaicYears(jobs, grid, spatialReference, cacheFolder, scratchFolder, blockSize=2048, processes=None):
+    hists = {}
+    tasks = []
+    yearJobs = {}
+    for year, inRasters, nullValues, outputs in jobs:
+        done = readManifest(cacheFolder, year, inRasters, outputs)
+        if done is not None:
+            print "Year", year, "already completed:", manifestPath(cacheFolder, year)
+            hists[year] = done
+            continue
+        dtype, nodata = rasterType.mosaicType(inRasters, nullValues)
+        yearJobs[year] = (inRasters, outputs, nodata, dtype)
+        tasks.append((year, inRasters, nullValues, outputs, grid, cacheFolder, scratchFolder, blockSize,
+                      nodata, dtype))
+    if not tasks:
+        return hists
+
+    # The masks are rasterized by the main process before the pool starts. Each output is assembled on its own
+    # grid (the extent of its mask, as in rasterBlocks.mosaicMaskProject)
+    outGrids = {}
+    for task in tasks:
+        for shapefile, outRaster in task[3]:
+            if shapefile not in outGrids:
+                outGrids[shapefile] = rasterBlocks.outputGrid(maskCache.getMask(shapefile, grid, cacheFolder), grid)
+
+    # The warp maps of the grids of the tiles are computed by the main process before the pool starts
+    tileGrids = {}
+    for task in tasks:
+        for raster in task[1]:
+            tile = rasterBlocks.describeGrid(raster)
+            tileGrids[tile.key()] = tile
+    for key in sorted(tileGrids):
+        warpMap.tileWarpMap(tileGrids[key], grid, cacheFolder)
+
+    if processes is None:
+        processes = min(len(tasks), multiprocessing.cpu_count())
+    if processes == 1:
+        results = (mosaicYear(task) for task in tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap_unordered(mosaicYear, tasks)
+    try:
+        for year, yearHists, blockLists in results:
+            inRasters, outputs, nodata, dtype = yearJobs[year]
+            pixelType = rasterBlocks.PIXEL_TYPES[np.dtype(dtype).name]
+            for (shapefile, outRaster), hist, blockList in zip(outputs, yearHists, blockLists):
+                writer = rasterBlocks.BlockWriter(outRaster, outGrids[shapefile], spatialReference, nodata,
+                                                  pixelType, scratchFolder)
+                for blockFile in blockList:
+                    writer.add(blockFile)
+                writer.close()
+                pixelCount.store(outRaster, hist)
+            writeManifest(cacheFolder, year, inRasters, outputs, yearHists)
+            hists[year] = yearHists
+            print "Year", year, "completed"
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return hists
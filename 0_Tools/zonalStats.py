@@ -0,0 +1,149 @@
+## Name: zonalStats.py
+## Created on: 2026-10-18
+## By: Sophie Plassin
+## Description: Zonal statistics of the categorical rasters of the Rio Grande/Bravo basin (RGB)
+##              1. Rasterize the zone polygons (e.g. Counties_and_Municipios_rgb, irrigation districts) once on the
+##                 grid of the rasters: one zone index per cell, cached in a folder (.npy, memory-mapped)
+##              2. Count the cells of each (zone, year, class) of a multi-year cube (rasterCube) with one bincount
+##                 per year and block of the cube: all the years in one pass over the cube
+##              3. Write the area table of the zones: one row per (zone, class), one area column per year
+## Usage:
+##      zones = zonalStats.rasterizeZones("Counties_and_Municipios_rgb.shp", "ADM2_GEOID", cube.grid, cacheFolder)
+##      counts = zonalStats.zoneClassCounts(cube, zones)
+##      zonalStats.areaTable(counts, zones, cube, "cdl_counties_ses.dbf", catalog)
+## ---------------------------------------------------------------------------
+
+## Import packages
+
+import arcpy
+import hashlib
+import json
+import os
+import numpy as np
+
+import maskCache
+import rasterBlocks
+
+
+## ---------------------------------------------------------------------------
+## 1. Zones
+## Description: Zone 0 is the cells outside all the polygons, zone k (1, 2, ...) the cells whose center is inside
+## the k-th polygon (the polygons are assumed not to overlap; otherwise the last polygon wins). The zones are
+## rasterized polygon by polygon, on the window of the grid covering each polygon only.
+
+class Zones(object):
+
+    def __init__(self, grid, ids, names):
+        self.grid = grid
+        self.ids = ids
+        self.names = names
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _zoneKey(shapefile, field, grid):
+    stat = os.stat(shapefile)
+    key = "{0}|{1}|{2}|{3}|{4!r}".format(os.path.normcase(os.path.abspath(shapefile)), stat.st_size,
+                                        int(stat.st_mtime), field, grid.key())
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def buildZones(shapefile, field, grid, ids, blockRows=1024):
+    shapeCrs = arcpy.Describe(shapefile).spatialReference
+    names = []
+    with arcpy.da.SearchCursor(shapefile, [field, "SHAPE@"]) as rows:
+        for value, shape in rows:
+            if shape is None:
+                continue
+            names.append(value)
+            edges = maskCache.transformEdges(rasterBlocks.ringEdges(rasterBlocks.shapeRings(shape)),
+                                             shapeCrs, grid.crs)
+            window = maskCache.clipGrid(maskCache.coveringGrid(grid, rasterBlocks.edgesExtent(edges)), grid)
+            if window is None:
+                continue
+            row0, col0 = grid.offsetOf(window)
+            for r in range(0, window.nrows, blockRows):
+                nrows = min(blockRows, window.nrows - r)
+                cells = rasterBlocks.rasterize(edges, window.window(r, 0, nrows, window.ncols))
+                block = ids[row0 + r:row0 + r + nrows, col0:col0 + window.ncols]
+                block[cells] = len(names)
+    return names
+
+
+# Create a Function that rasterizes the zones of a shapefile (zone name = value of a field) on a grid,
+# cached in a folder (None keeps the zones in memory only)
+def rasterizeZones(shapefile, field, grid, cacheFolder=None):
+    if cacheFolder is None:
+        ids = np.zeros((grid.nrows, grid.ncols), dtype=np.uint16)
+        return Zones(grid, ids, buildZones(shapefile, field, grid, ids))
+
+    name = os.path.splitext(os.path.split(shapefile)[1])[0]
+    path = os.path.join(cacheFolder, "zones_{0}_{1}".format(name, _zoneKey(shapefile, field, grid)))
+    if not os.path.exists(path + ".npy"):
+        print "Rasterize the zones", shapefile, "on", grid.nrows, "x", grid.ncols, "cells"
+        ids = np.lib.format.open_memmap(path + ".tmp.npy", mode="w+", dtype=np.uint16,
+                                        shape=(grid.nrows, grid.ncols))
+        names = buildZones(shapefile, field, grid, ids)
+        ids.flush()
+        del ids
+        with open(path + ".json", "w") as f:
+            json.dump(names, f)
+        os.rename(path + ".tmp.npy", path + ".npy")
+    with open(path + ".json") as f:
+        names = json.load(f)
+    return Zones(grid, np.load(path + ".npy", mmap_mode="r"), names)
+
+
+## ---------------------------------------------------------------------------
+## 2. Counts
+## Description: The cube is read by blocks of chunks (all the years of the cells). The key of a cell in a year is
+## zone x 256 + class: one bincount per year of a block gives the counts of all the zones and classes. The keys
+## of a single year are int32 (about 16 MB for a block of 2048 x 2048 cells, instead of several int64 arrays of
+## all the years, which do not fit in the 2 GB of the 32-bit Python of ArcMap). Returns a uint64 array of
+## (zones + 1) x years x 256 (zone 0: outside the zones).
+
+def zoneClassCounts(cube, zones):
+    if zones.grid.key() != cube.grid.key():
+        raise Exception("The zones are not rasterized on the grid of the cube")
+    nyears = len(cube.years)
+    size = (len(zones) + 1) * 256
+    counts = np.zeros((nyears, size), dtype=np.uint64)
+    for row0, col0, chunks in cube.blocks():
+        cells = cube.blockCells(chunks)
+        # Zones of the cells of the block (zone 0 beyond the grid), x 256
+        ids = np.zeros(cells.shape[:2], dtype=np.int32)
+        nrows = max(min(cells.shape[0], cube.grid.nrows - row0), 0)
+        ncols = max(min(cells.shape[1], cube.grid.ncols - col0), 0)
+        ids[:nrows, :ncols] = zones.ids[row0:row0 + nrows, col0:col0 + ncols]
+        ids *= 256
+        for y in range(nyears):
+            keys = ids + cells[:, :, y]
+            counts[y] += np.bincount(keys.ravel(), minlength=size).astype(np.uint64)
+    counts = counts.reshape(nyears, len(zones) + 1, 256).transpose(1, 0, 2).copy()
+    counts[:, :, cube.nodata] = 0
+    return counts
+
+
+## ---------------------------------------------------------------------------
+## 3. Area table
+## Description: One row per zone and class with pixels in at least one year: ZONE, VALUE, NAME (catalog of the
+## classes) and one column of area (hectares) per year (HA2008, ...). The cells outside the zones are not written.
+
+def areaTable(counts, zones, cube, outTable, catalog=None):
+    hectares = cube.grid.cellSize * cube.grid.cellSize / 10000.0
+    zoneNames = [u"{0}".format(name).encode("utf-8") for name in zones.names]
+    zoneLength = max([len(name) for name in zoneNames] + [1])
+    fields = [("ZONE", "S{0}".format(zoneLength)), ("VALUE", np.int32), ("NAME", "S60")]
+    fields += [("HA" + str(year), np.float64) for year in cube.years]
+    rows = []
+    for k, name in enumerate(zoneNames):
+        zoneCounts = counts[k + 1]
+        for value in np.nonzero(zoneCounts.sum(axis=0))[0]:
+            className = catalog.get(int(value), "") if catalog else ""
+            rows.append(tuple([name, int(value), className] + (zoneCounts[:, value] * hectares).tolist()))
+    table = np.array(rows, dtype=fields)
+    if arcpy.Exists(outTable):
+        arcpy.Delete_management(outTable)
+    arcpy.da.NumPyArrayToTable(table, outTable)
+    return len(rows)
@@ -18,9 +18,14 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "0_Tools"))
+import excelCache
+
 # Set options
 arcpy.env.overwriteOutput = True
 arcpy.env.qualifiedFieldNames = False
@@ -102,7 +107,7 @@ print "\nStep 4 Join starts at", datetime.datetime.now().strftime("%A, %B %d %Y
 in_excel = "StatisticsApprehension.xlsx"
 dbf_file = os.path.splitext(in_excel)[0]
 joinTable = os.path.join(interFolder, dbf_file)
-arcpy.ExcelToTable_conversion(in_excel, joinTable, "stats_gis")
+excelCache.excelToTable(in_excel, joinTable, "stats_gis")
 
 # Fields to join
 joinFieldLayer = "SEC_NAME"
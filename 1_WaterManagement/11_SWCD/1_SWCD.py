@@ -18,10 +18,16 @@
 import datetime
 import arcpy
 import os
+import sys
 import glob
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "0_Tools"))
+import overlayArea
+import spatialSelect
+
 # Set options
 arcpy.env.overwriteOutput = True
 arcpy.env.qualifiedFieldNames = False
@@ -105,53 +111,17 @@ in_file = glob.glob(dirpath + "NM\\*.shp")[0] # select NM shapefile
 out_fc = os.path.join(out_gdb, "SWCD_NM")
 
 for clip in clip_features:
-    arcpy.MakeFeatureLayer_management(clip, "lyr_rgb")
-    arcpy.MakeFeatureLayer_management(in_file, "temp")
-    arcpy.SelectLayerByLocation_management("temp",
-                                           "INTERSECT",
-                                           "lyr_rgb",
-                                           "",
-                                           "NEW_SELECTION")
     temp = os.path.split(clip)[-1]
-    arcpy.CopyFeatures_management("temp", out_fc)
+    spatialSelect.selectByLocation(in_file, "INTERSECT", clip, out_fc)
      
 
 ## Remove mimatches of boundaries in NM
-## Run TabulateIntersection with restricted parameters
-    zoneFC = out_fc 
+## Tabulate intersection: area of each SWCD in the study area (AREA in km2, PERCENTAGE), written with the SWCD
+## in a single pass
+## Keep the SWCD with AREA > 15 km2
     zoneFld = "Abbr"
-    classFC = clip
-    outTab = "TabulateIntersect.dbf"
-    class_fields=""
-    sum_fields=""
-    xy_tolerance="-1 Unknown"
-    out_unit="SQUARE_KILOMETERS"
-
-    arcpy.TabulateIntersection_analysis(zoneFC,
-                                        zoneFld,
-                                        classFC,
-                                        outTab,
-                                        class_fields,
-                                        sum_fields,
-                                        xy_tolerance,
-                                        out_unit)
-
-
-    ## Spatial Join
-    joinField = "Abbr"
-    arcpy.MakeFeatureLayer_management(out_fc, "temp")
-    arcpy.AddJoin_management("temp", joinField, outTab, joinField, "KEEP_ALL")
-    ifc = os.path.join(out_gdb, "SWCD_NM_Join")
-    arcpy.CopyFeatures_management("temp", ifc)
-
-
-## Delete SWCD with small areas
-## Area < 15 km2
-    expression = "\"AREA\" > 15"
-    arcpy.MakeFeatureLayer_management(ifc, "temp")
-    arcpy.SelectLayerByAttribute_management("temp", "NEW_SELECTION", expression)
-    ifc2 = ifc.split("_Join")[0] + "_select"
-    arcpy.CopyFeatures_management("temp", ifc2)
+    ifc2 = os.path.join(out_gdb, "SWCD_NM_select")
+    overlayArea.tabulateIntersection(out_fc, zoneFld, clip, ifc2, 15, strict=True)
     # Add field for State
     arcpy.AddField_management(ifc2, fieldState, "TEXT", "", "", 30)
     arcpy.CalculateField_management(ifc2,
@@ -15,10 +15,15 @@
 import datetime
 import arcpy
 import os
+import sys
 import glob
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "0_Tools"))
+import spatialSelect
+
 # Set options
 arcpy.env.overwriteOutput = True
 arcpy.env.qualifiedFieldNames = False
@@ -96,23 +101,16 @@ selectList = []
 
 ## Execute select layer by location
 for clip in clip_features:
-    arcpy.MakeFeatureLayer_management(clip, "lyr_rgb")
     for fc in projList:
-        arcpy.MakeFeatureLayer_management(fc, "lyr_temp")
-        expression = arcpy.AddFieldDelimiters("lyr_temp", "area_names") + "= 'Unclassified'"
-        arcpy.SelectLayerByLocation_management("lyr_temp",
-                                               "INTERSECT",
-                                               "lyr_rgb",
-                                               "",
-                                               "NEW_SELECTION")
+        # The unclassified areas of the LCC are not selected
+        expression = None
         if "LCC" in fc:
-            arcpy.SelectLayerByAttribute_management("lyr_temp",
-                                                    "REMOVE_FROM_SELECTION",
-                                                    expression)
+            field = arcpy.AddFieldDelimiters(fc, "area_names")
+            expression = field + " <> 'Unclassified' OR " + field + " IS NULL"
         projName = os.path.split(fc)[1]
         outfc_name = projName.split('_pr')[0]
         outfc_file = os.path.join(out_gdb, outfc_name)
-        arcpy.CopyFeatures_management("lyr_temp", outfc_file)
+        spatialSelect.selectByLocation(fc, "INTERSECT", clip, outfc_file, where=expression)
         selectList.append(outfc_file)
 
 print "Step 3 Select by location ends at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
@@ -18,9 +18,15 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "0_Tools"))
+import overlayArea
+import spatialSelect
+
 # Workspace
 dirpath = "C:\\GIS_RGB\\Geodatabase\\Water_Governance\\1_political_jurisdictions\\original_input\\Census"
 interFolder = "C:\\GIS_RGB\\Geodatabase\\Water_Governance\\1_political_jurisdictions\\inter_output\\Census\\"
@@ -251,55 +257,16 @@ for clip in clip_features:
     name = os.path.split(root)[1]
     if temp.startswith("RGB_Ses"):
         output = os.path.join(out_gdb, name + "_intersect")
-    arcpy.MakeFeatureLayer_management(clip, "lyr_rgb")
-    arcpy.MakeFeatureLayer_management(in_fc, "lyr_infc")
-    arcpy.SelectLayerByLocation_management("lyr_infc",
-                                           "INTERSECT",
-                                           "lyr_rgb",
-                                           "",
-                                           "NEW_SELECTION")
-    arcpy.CopyFeatures_management("lyr_infc", output)
+    spatialSelect.selectByLocation(in_fc, "INTERSECT", clip, output)
     #projList.append(output)
     print "Select by location" , clip, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
-    ## Tabulate intersection with restricted parameters
-    zoneFC = output
+    ## Tabulate intersection: area of each county/municipio in the study area (AREA in km2, PERCENTAGE),
+    ## written with the counties in a single pass
+    ## Delete counties with small areas (Area < 15 km2) and the county 84048047
     zoneFld = "ADM2_GEOID"
-    classFC = clip
-    outTab = os.path.join(interFolder, "TabulateIntersect.dbf")
-    class_fields=""
-    sum_fields=""
-    xy_tolerance="-1 Unknown"
-    out_unit="SQUARE_KILOMETERS"
-
-    arcpy.TabulateIntersection_analysis(zoneFC,
-                                        zoneFld,
-                                        classFC,
-                                        outTab,
-                                        class_fields,
-                                        sum_fields,
-                                        xy_tolerance,
-                                        out_unit)
-
-    ## Spatial join
-    joinField = "ADM2_GEOID"
-    arcpy.MakeFeatureLayer_management(output, "temp")
-    arcpy.AddJoin_management("temp", joinField, outTab, joinField, "KEEP_ALL")
-    name = os.path.splitext(output)[0]
-    ifc = os.path.join(out_gdb, name + "_join")
-    arcpy.CopyFeatures_management("temp", ifc)
-
-
-    ## Delete counties with small areas
-    ## Area < 15 km2
-    expression = "\"AREA\" < 15"
-    expression2 = "\"ADM2_GEOID\" = '84048047'"
-    arcpy.MakeFeatureLayer_management(ifc, "temp")
-    arcpy.SelectLayerByAttribute_management("temp", "NEW_SELECTION", expression)
-    arcpy.SelectLayerByAttribute_management("temp", "SWITCH_SELECTION")
-    arcpy.SelectLayerByAttribute_management("temp", "REMOVE_FROM_SELECTION", expression2)
-    ifc2 = ifc.split("intersect_join")[0] + "rgb"
-    arcpy.CopyFeatures_management("temp", ifc2)
+    ifc2 = os.path.join(out_gdb, name + "_rgb")
+    overlayArea.tabulateIntersection(output, zoneFld, clip, ifc2, 15, ["84048047"])
     finalList.append(ifc2)
 
 
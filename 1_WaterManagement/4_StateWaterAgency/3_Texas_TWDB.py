@@ -16,9 +16,14 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "0_Tools"))
+import spatialSelect
+
 print "Geoprocess starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Workspace
@@ -142,15 +147,12 @@ print "\nStep 5 Select by Attribute starts at", datetime.datetime.now().strftime
 studyArea = "C:\\GIS_RGB\\Geodatabase\\rgb_bound\\RGB_Ses_na_albers.shp"
 
 for fc in projList:
-    arcpy.MakeFeatureLayer_management(fc, "temp")
-    arcpy.MakeFeatureLayer_management(studyArea, "lyr_rgb")
-    arcpy.SelectLayerByLocation_management("temp", 'INTERSECT', "lyr_rgb")
     root = os.path.splitext(fc)[0]
     name = os.path.split(root)[1]
     begin = name.find("_", 1)
     output = name[:begin] + name[begin:] + '_RG'
     output_fc = os.path.join(finalFolder, output)
-    arcpy.CopyFeatures_management("temp", output_fc)
+    spatialSelect.selectByLocation(fc, "INTERSECT", studyArea, output_fc)
 
 print "Step 5 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
@@ -33,9 +33,14 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "0_Tools"))
+import fieldCalculator
+
 print "Geoprocess starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 ### Workspace
@@ -132,8 +137,8 @@ out_feature = os.path.join(interFolder, "Costilla_Creek_Compact.shp")
 arcpy.MakeFeatureLayer_management(WBDHU10_pr, "temp")
 arcpy.SelectLayerByAttribute_management("temp", 'NEW_SELECTION', expression)
 arcpy.CopyFeatures_management("temp", out_feature)
-arcpy.CalculateField_management(out_feature, "NAME", '"' + "Costilla Creek Compact" + '"', "PYTHON_9.3")
-arcpy.CalculateField_management(out_feature, "STATES", '"' + "CO,NM" + '"', "PYTHON_9.3")
+fieldCalculator.calculate(out_feature, [["NAME", '"' + "Costilla Creek Compact" + '"'],
+                                        ["STATES", '"' + "CO,NM" + '"']])
 
 costilla = out_feature
 finalList.append(costilla)
@@ -202,8 +207,8 @@ for fd in fieldList:
     arcpy.AddField_management(output_diss, fd, fieldType, "", "", 50)
 
 # Populate new fields
-arcpy.CalculateField_management(output_diss, fieldName, '"' + "Rio Grande Compact" + '"', "PYTHON_9.3")
-arcpy.CalculateField_management(output_diss, fieldState, '"' + "CO,NM,TX" + '"', "PYTHON_9.3")
+fieldCalculator.calculate(output_diss, [[fieldName, '"' + "Rio Grande Compact" + '"'],
+                                        [fieldState, '"' + "CO,NM,TX" + '"']])
 
 finalList.append(output_diss)
 
@@ -245,8 +250,8 @@ for fd in fieldList:
     arcpy.AddField_management(out_feature_diss, fd, fieldType, "", "", 50)
 
 # Populate new fields
-arcpy.CalculateField_management(out_feature_diss, fieldName, '"' + "Pecos Compact" + '"', "PYTHON_9.3")
-arcpy.CalculateField_management(out_feature_diss, fieldState, '"' + "NM,TX" + '"', "PYTHON_9.3")
+fieldCalculator.calculate(out_feature_diss, [[fieldName, '"' + "Pecos Compact" + '"'],
+                                             [fieldState, '"' + "NM,TX" + '"']])
 finalList.append(out_feature_diss)
 
 print "Step 7 completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
@@ -18,9 +18,14 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "0_Tools"))
+import excelCache
+
 # Set options
 arcpy.env.overwriteOutput = True
 arcpy.env.qualifiedFieldNames = False
@@ -129,7 +134,7 @@ for xl in xlsfiles:
     if xl.startswith("RGWCD_unconfined"):
         dbf_file = "RGWCD_unconfined.gdb"
     out_file = os.path.join(interFolder, dbf_file)
-    arcpy.ExcelToTable_conversion(in_file, out_file)
+    excelCache.excelToTable(in_file, out_file)
 
 print "Step 5 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
@@ -15,9 +15,14 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "0_Tools"))
+import spatialSelect
+
 # Set overwrite option
 arcpy.env.overwriteOutput = True
 
@@ -156,9 +161,7 @@ for fc in outputList:
             output = finalFolder + name + "_bas.shp"
         else:
             output = finalFolder + name + "_ses.shp"
-        arcpy.MakeFeatureLayer_management(fc, "temp")
-        arcpy.SelectLayerByLocation_management("temp", 'INTERSECT', clip)
-        arcpy.CopyFeatures_management("temp", output)
+        spatialSelect.selectByLocation(fc, "INTERSECT", clip, output)
         print "Select by location" , fc, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
 print "Step 5 completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
@@ -17,9 +17,14 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "0_Tools"))
+import spatialSelect
+
 # Set options
 arcpy.env.overwriteOutput = True
 arcpy.env.qualifiedFieldNames = False
@@ -290,9 +295,7 @@ for fc in finalList:
             output = finalFolder + name + "_bas.shp"
         else:
             output = finalFolder + name + "_ses.shp"
-        arcpy.MakeFeatureLayer_management(fc, "temp")
-        arcpy.SelectLayerByLocation_management("temp", 'INTERSECT', clip)
-        arcpy.CopyFeatures_management("temp", output)
+        spatialSelect.selectByLocation(fc, "INTERSECT", clip, output)
         arcpy.DeleteField_management(output, fiedlDel)
         print "Select by location" , fc, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
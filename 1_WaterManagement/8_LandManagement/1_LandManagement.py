@@ -12,7 +12,7 @@
 ## For both datasets:
 ##              6. Edit attribute table
 ##              7. Project the datasets to North America Albers Equal Area Conic
-##              8. Clip the datasets
+##              8. Clip the datasets (Ses and Basin in one pass)
 ##              9. Merge US and MX feature class
 ##              10. Symmetrical difference
 ##              11. Merge Public and Private lands datasets
@@ -24,9 +24,14 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "0_Tools"))
+import studyArea
+
 # Set options
 arcpy.env.overwriteOutput = True
 arcpy.env.qualifiedFieldNames = False
@@ -208,28 +213,13 @@ print "Step 7 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%
 
 print "\nStep 8 Clip starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-# Create the select_features
-folderShapefiles = "C:\\GIS_RGB\\Geodatabase\\rgb_bound\\"
-listfc = ["RGB_Basin_na_albers.shp", "RGB_Ses_na_albers.shp"]
-xy_tolerance = ""
-clipped_features = []
-
-for fc in listfc:
-    out_shp = os.path.join(folderShapefiles, fc)
-    clipped_features.append(out_shp)
-
-# Execute Select by location and delete fields
+# Execute Clip: one read of each feature class for both outputs (RGB_Basin is inside RGB_Ses)
 for fc in projList:
     root = fc.split('_pr')[0]
     name = os.path.split(root)[1]
-    for clip in clipped_features:
-        temp = os.path.split(clip)[-1]
-        if temp.startswith("RGB_Basin"):
-            output = out_gdb + "\\" + name + "_bas"
-        else:
-            output = out_gdb + "\\" + name + "_ses"
-        arcpy.Clip_analysis(fc, clip, output, xy_tolerance)
-        print "Clip" , fc, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
+    outputs = studyArea.studyAreaOutputs(out_gdb, name, "")
+    studyArea.projectClip(fc, outputs, None, nested=True)
+    print "Clip" , fc, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
 print "Step 8 completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
 
@@ -15,9 +15,14 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import spatialSelect
+
 print "Geoprocess starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Set environment settings
@@ -61,24 +66,16 @@ print "\nStep 2 Select by Location starts at", datetime.datetime.now().strftime(
 
 arcpy.env.workspace = "C:\\GIS_RGB\\Geodatabase\\Hydrology\\5_aquifer\\inter_output\\"
 
-# Create a temp layer
+# Study area
 rgbShape = "C:\\GIS_RGB\\Geodatabase\\rgb_bound\\RGB_Ses_na_albers.shp"
 
-arcpy.MakeFeatureLayer_management(rgbShape, "lyr_rgb")
-
 for fc in projList:
-    arcpy.MakeFeatureLayer_management(fc, "temp")
     name = os.path.split(fc)[1]
     if name.startswith("aquif"):
         output = "Aquifer_US.shp"
     else:
         output = "Aquifer_MX.shp"
-    arcpy.SelectLayerByLocation_management("temp",
-                                           "INTERSECT",
-                                           "lyr_rgb",
-                                           "",
-                                           "NEW_SELECTION")
-    arcpy.CopyFeatures_management("temp", output)
+    spatialSelect.selectByLocation(fc, "INTERSECT", rgbShape, os.path.join(arcpy.env.workspace, output))
     selectList.append(output)
     print "Select by Location" , fc, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
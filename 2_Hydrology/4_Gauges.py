@@ -7,7 +7,7 @@
 
 ## For gauges of CONAGUA
 ##              2. Convert excel files to dbf
-##              3. Creates a new point feature layer based on x- and y-coordinates.
+##              3. Creates the projected points from the x- and y-coordinates.
 
 ## For gauges of USGS
 ##              4. Convert shapefile to gdb
@@ -18,7 +18,7 @@
 ## For all
 ##              6. Clean and homogeneize the attribute tables
 ##              7. Project the shapefiles to North America Albers Equal Area Conic
-##              8. Clip the gauges that overlay the RGB study area.
+##              8. Clip the gauges that overlay the RGB study area (Ses and Basin in one pass).
 ##              9. Convert to shapefiles
 ## ---------------------------------------------------------------------------
 
@@ -29,9 +29,16 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import excelCache
+import studyArea
+import xyPoints
+
 print "Geoprocess starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Set environment settings
@@ -74,35 +81,31 @@ xlsFile = "CONAGUA\\Gauges_conagua.xls"
 name = os.path.splitext(os.path.split(xlsFile)[-1])[0] + ".dbf"
 print name
 dbf_file = os.path.join(interFolder, name)
-arcpy.ExcelToTable_conversion(xlsFile, dbf_file)
+excelCache.excelToTable(xlsFile, dbf_file)
 
 print "Convert excel file to dbf", xlsFile, "completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 
 ## ---------------------------------------------------------------------------
-## 3. Make XY Event Layer
-## Description: Creates a new point feature layer based on x- and y-coordinates defined in a source table.
+## 3. Make XY points
+## Description: Creates the points from the x- and y-coordinates defined in a source table, projected to North
+## America Albers Equal Area Conic (the rows without valid coordinates are reported and dropped).
 
-print "\nStep 3 Project the polygons starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 3 Make XY points starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 x_coords = "DD_X"
 y_coords = "DD_Y"
+# The coordinates are in decimal degrees on WGS 1984 (the default coordinate system of Make XY Event Layer)
+inCS = arcpy.SpatialReference("WGS 1984")
 
-# Execute layer
-out_Layer = os.path.splitext(dbf_file)[0]
-print out_Layer
-arcpy.MakeXYEventLayer_management(dbf_file, x_coords, y_coords, out_Layer)
-# Save to a layer file
-saved_Layer = out_Layer + ".lyr"
-arcpy.SaveToLayerFile_management(out_Layer, saved_Layer)
-# Create Shapefile
-shape = os.path.splitext(os.path.split(saved_Layer)[-1])[0]
+# Execute
+shape = os.path.splitext(os.path.split(dbf_file)[-1])[0]
 output = os.path.join(gdb, shape)
-arcpy.CopyFeatures_management(saved_Layer, output)
+xyPoints.tableToPoints(dbf_file, x_coords, y_coords, output, inCS=inCS)
 tabList.append(output)
 
-print "Make XY Event Layer", dbf_file, "completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "Make XY points", dbf_file, "completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 
@@ -261,6 +264,10 @@ outCS = arcpy.SpatialReference("North America Albers Equal Area Conic")
 
 # Execute Project
 for fc in tabList:
+    # The CONAGUA gauges are already projected
+    if arcpy.Describe(fc).spatialReference.name == outCS.name:
+        projList.append(fc)
+        continue
     projFile = os.path.splitext(fc)[0] + "_pr"
     arcpy.Project_management(fc, projFile, outCS)
     projList.append(projFile)
@@ -275,30 +282,17 @@ print "Step 7 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%
 
 print "\nStep 8 starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-# Create the clip_features
-folderShapefiles = "C:\\GIS_RGB\\Geodatabase\\rgb_bound\\"
-listfc = ["RGB_Basin_na_albers.shp", "RGB_Ses_na_albers.shp"]
-xy_tolerance = ""
-clip_features = []
-
-for fc in listfc:
-    out_shp = os.path.join(folderShapefiles, fc)
-    clip_features.append(out_shp)
-
-# Execute Clip
+# Execute Clip: one read of each feature class for both outputs (RGB_Basin is inside RGB_Ses)
 for fc in projList:
-    for clip in clip_features:
-        # Create name
-        new_name = fc.split('_pr')[0]
-        temp = os.path.split(clip)[-1]
-        # Add Ses or Bas according to the clip feature name
-        if temp.startswith("RGB_Basin"):
-            output = new_name + "_bas"
-        else:
-            output = new_name + "_ses"
-        arcpy.Clip_analysis(fc, clip, output, xy_tolerance)
+    # Create name
+    new_name = fc.split('_pr')[0]
+    outputs = [[studyArea.SES, new_name + "_ses"],
+               [studyArea.BASIN, new_name + "_bas"]]
+    counts = studyArea.projectClip(fc, outputs, None, nested=True)
+    for (clip, output), count in zip(outputs, counts):
         clipList.append(output)
-        print "Clip" , fc, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
+        print output, ":", count, "gauges"
+    print "Clip" , fc, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
 print "Step 8 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
@@ -5,10 +5,9 @@
 ## Description: Preparation of the Irrigation dataset for the Rio Grande/Bravo basin (RGB)
 ##              1. Create a geodatabase
 ##              2. Convert excel to table for MX 
-##              3. Join table with MX counties feature
-##              4. Convert excel to table for US 
-##              5. Join table with US counties feature
-##              6. Export features to final folder and clean data
+##              3. Convert excel to table for US 
+##              4. Join tables with MX and US counties features
+##              5. Export features to final folder and clean data
 ## ---------------------------------------------------------------------------
 
 ## Import packages and define the path name of the directories
@@ -17,9 +16,15 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import excelCache
+import tableJoin
+
 # Set options
 arcpy.env.overwriteOutput = True
 arcpy.env.qualifiedFieldNames = False
@@ -67,51 +72,17 @@ xlsFiles = ["mxcensus2007.xlsx"]
 for xls in xlsFiles:
     dbf_file = os.path.splitext(xls)[0] + ".dbf"
     out_dbf_file = os.path.join(interFolder, dbf_file)
-    arcpy.ExcelToTable_conversion(xls, out_dbf_file, "Table")
-    arcpy.AddField_management(out_dbf_file, "ISO_GEOID", "TEXT", "", "", "8")
-    arcpy.CalculateField_management(out_dbf_file, "ISO_GEOID", "'484' + !GEOID!", "PYTHON_9.3")
+    excelCache.excelToTable(xls, out_dbf_file, "Table", ["ISO_GEOID", "484", "GEOID"], interFolder)
 
 print "Step 2 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 
 ## ---------------------------------------------------------------------------
-## 3. Join excel to shapefile
-## Description: Join excel to shapefile for US dataset
-
-print "\nStep 3 Join starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
-
-# Input
-input_folder = "C:\\GIS_RGB\\Geodatabase\\Water_Governance\\1_political_jurisdictions\\final_output\\Census\\"
-input_fc = "Counties_and_Municipios_rgb.shp"
-input_file = os.path.join(input_folder, input_fc)
-
-# Expression
-expression_us = "\"ADM0_ID\" = '484'"
-
-# Join fields
-joinFieldLayer = "ADM2_GEOID" 
-joinFieldTable = "ISO_GEOID"
-
-# Output
-outname = "Irrigation_MX"
-out_fc = os.path.join(out_gdb, outname)
-
-# Execute
-arcpy.MakeFeatureLayer_management(input_file, "temp")
-arcpy.SelectLayerByAttribute_management("temp", "NEW_SELECTION", expression_us)
-arcpy.AddJoin_management("temp", joinFieldLayer, out_dbf_file, joinFieldTable)
-arcpy.CopyFeatures_management("temp", out_fc)
-finalList.append(out_fc)
-
-print "Step 3 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
-
-
-## ---------------------------------------------------------------------------
-## 4. Convert excel to dbf
+## 3. Convert excel to dbf
 ## Description: Convert excel file to dbf for US dataset
 
-print "\nStep 4 Convert excel to dbf starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 3 Convert excel to dbf starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Input
 xlsFiles = ["usco2015Area.xlsx"]
@@ -119,20 +90,18 @@ xlsFiles = ["usco2015Area.xlsx"]
 # Execute Excel to Dbf table
 for xls in xlsFiles:
     name = os.path.splitext(xls)[0] 
-    dbf_file = os.path.join(interFolder, name)
-    arcpy.ExcelToTable_conversion(xls, out_dbf_file, "Hectares")
-    arcpy.AddField_management(out_dbf_file, "ISO_GEOID", "TEXT", "", "", "8")
-    arcpy.CalculateField_management(out_dbf_file, "ISO_GEOID", "'840' + !FIPS!", "PYTHON_9.3")
-    tableList.append(out_dbf_file)
+    dbf_file = os.path.join(interFolder, name + ".dbf")
+    excelCache.excelToTable(xls, dbf_file, "Hectares", ["ISO_GEOID", "840", "FIPS"], interFolder)
+    tableList.append(dbf_file)
 
-print "Step 4 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "Step 3 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 ## ---------------------------------------------------------------------------
-## 5. Join excel to shapefile
-## Description: Join excel to shapefile for US dataset
+## 4. Join excel to shapefile
+## Description: Join the MX and US tables to the counties shapefile (one read of the shapefile for all the outputs)
 
-print "\nStep 5 Join starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 4 Join starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Input
 input_folder = "C:\\GIS_RGB\\Geodatabase\\Water_Governance\\1_political_jurisdictions\\final_output\\Census\\"
@@ -140,6 +109,7 @@ input_fc = "Counties_and_Municipios_rgb.shp"
 input_file = os.path.join(input_folder, input_fc)
 
 # Expression
+expression_mx = "\"ADM0_ID\" = '484'"
 expression_us = "\"ADM0_ID\" = '840'"
 
 # Join fields
@@ -147,29 +117,31 @@ joinFieldLayer = "ADM2_GEOID"
 joinFieldTable = "ISO_GEOID"
 
 # Output
-outname = "Irrigation_US"
+outname_mx = "Irrigation_MX"
+outname_us = "Irrigation_US"
 
-# Execute
+# Outputs: MX dataset and one US dataset per table
+joins = [[os.path.join(out_gdb, outname_mx), expression_mx, [[out_dbf_file, joinFieldTable]]]]
 for tab in tableList:
-    arcpy.MakeFeatureLayer_management(input_file, "temp")
-    arcpy.SelectLayerByAttribute_management("temp", "NEW_SELECTION", expression_us)
-    arcpy.AddJoin_management("temp", joinFieldLayer, tab, joinFieldTable)
     name = os.path.split(tab)[1]
     begin = name.find("_")
     end = name.find(".")
     tail = name[begin : end]
-    out_fc = os.path.join(out_gdb, outname + tail)
-    arcpy.CopyFeatures_management("temp", out_fc)
-    finalList.append(out_fc)
+    out_fc = os.path.join(out_gdb, outname_us + tail)
+    joins.append([out_fc, expression_us, [[tab, joinFieldTable]]])
 
-print "Step 5 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+# Execute
+tableJoin.joinTables(input_file, joinFieldLayer, joins)
+finalList.extend([out_fc for out_fc, expression, tables in joins])
+
+print "Step 4 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 ## ---------------------------------------------------------------------------
-## 6. Export feature to final folder
+## 5. Export feature to final folder
 ## Description: Join excel to shapefile for US dataset
 
-print "\nStep 6 Export feature starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 5 Export feature starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Delete fields
 fieldDel = ["OID_", "STATE", "COUNTY", "STATEFIPS", "COUNTYFIPS", "GEOID", "ISO_GEOID", "FIPS",
@@ -180,7 +152,7 @@ for fc in finalList:
     arcpy.CopyFeatures_management(fc, output)
     arcpy.DeleteField_management(output, fieldDel)
 
-print "Step 6 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "Step 5 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 print "\nGeoprocess completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
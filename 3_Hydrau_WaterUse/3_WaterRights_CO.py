@@ -3,11 +3,10 @@
 ## By: Sophie Plassin
 ## Description: Preparation of the water right shapefile for the state of Colorado in the Rio Grande/Bravo basin (RGB)
 ##              1. Create a geodatabase 
-##              2. Make XY event layer to geolocate WR location
+##              2. Make the XY points to geolocate WR location, projected to North America Albers Equal Area Conic
 ##              3. Update names, add field WR_SOURCE and poulate with two values (SW for surface water or GW for groundwater)
-##              4. Project the shapefile to North America Albers Equal Area Conic
-##              5. Select by attribute WR location for Division 3 (RGB)
-##              6. Save output data to final folder
+##              4. Select by attribute WR location for Division 3 (RGB)
+##              5. Save output data to final folder
 ## ---------------------------------------------------------------------------
 
 ## Import packages and define the path name of the directories
@@ -16,9 +15,15 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import excelCache
+import xyPoints
+
 print "Geoprocess starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Workspace
@@ -50,32 +55,29 @@ print "Step 1 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%
 
 
 ## ---------------------------------------------------------------------------
-## 2. Generate XY Layer event 
-## Description: Creates a new point feature layer based on x- and y-coordinates defined in a source table.
+## 2. Generate XY points
+## Description: Creates the points from the x- and y-coordinates defined in a source table, projected to North
+## America Albers Equal Area Conic (the rows without valid coordinates are reported and dropped).
 
-print "\nStep 2 Generate XY Layer event starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 2 Generate XY points starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Set local variables
 xlsx = "DWR_Water_Right_-_Net_Amounts_import_astext.xlsx"
 table = "DWR_Water_Right_Net_Amounts.dbf"
 x_coords = "Longitude"
 y_coords = "Latitude"
+# The coordinates are in decimal degrees on WGS 1984 (the default coordinate system of Make XY Event Layer)
+inCS = arcpy.SpatialReference("WGS 1984")
 
 # Convert excel to dbf
 in_Table = os.path.join(interFolder, table)
-arcpy.ExcelToTable_conversion(xlsx, in_Table)
-
-# Make the XY event layer
-nameLayer = os.path.splitext(in_Table)[0] + '_prepared'
-outLayer = os.path.join(interFolder, nameLayer)
-arcpy.MakeXYEventLayer_management(in_Table, x_coords, y_coords, outLayer)
+excelCache.excelToTable(xlsx, in_Table)
 
-# Save to a layer file
-saved_Layer = outLayer + ".lyr"
-arcpy.SaveToLayerFile_management(outLayer, saved_Layer)
-    
-# Create Shapefile
-arcpy.FeatureClassToGeodatabase_conversion(saved_Layer, out_gdb)
+# Make the projected XY points
+name = "CO_WaterRights_pr"
+outCS = arcpy.SpatialReference("North America Albers Equal Area Conic")
+projFile = os.path.join(out_gdb, name)
+xyPoints.tableToPoints(in_Table, x_coords, y_coords, projFile, outCS, inCS)
 
 print "Step 2 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
@@ -86,9 +88,6 @@ print "Step 2 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%
 
 print "\nStep 3 Change Names starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-oRoot, fc = os.path.split(saved_Layer.split(".lyr")[0])
-fc_gdb = os.path.join(out_gdb, fc)
-
 # Alter fields
 alterFields = [['Structure', 'StructName', 'Structure Name'],
                ['Structur_1', 'StructType', 'Structure Type'],
@@ -114,14 +113,14 @@ alterFields = [['Structure', 'StructName', 'Structure Name'],
                ['More_Infor', 'MoreInfo', 'More Information']]
 
 for old, new, new_alias in alterFields:
-    arcpy.AlterField_management(fc_gdb, old, new, new_alias)
+    arcpy.AlterField_management(projFile, old, new, new_alias)
 
 # Add new field WR_Source and add the type of water source (Surface or groundwater)
 fieldSrce = "WR_Source"
-arcpy.AddField_management(fc_gdb, fieldSrce, "TEXT", "", "", "5")
+arcpy.AddField_management(projFile, fieldSrce, "TEXT", "", "", "5")
 
 # Populate field Source
-cur = arcpy.UpdateCursor(fc_gdb)
+cur = arcpy.UpdateCursor(projFile)
 for row in cur:
     value1 = row.getValue('StructType')
     if value1 == 'Well':
@@ -134,26 +133,10 @@ print "Step 3 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%
 
 
 ## ---------------------------------------------------------------------------
-## 4. Project
-## Description: Project to North America Albers Equal Area Conic
-
-print "\nStep 4 Project starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
-
-name = "CO_WaterRights_pr"
-outCS = arcpy.SpatialReference("North America Albers Equal Area Conic")
-
-projFile = os.path.join(out_gdb, name)
-arcpy.Project_management(fc_gdb, projFile, outCS)
-
-print "Step 4 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
-
-
-
-## ---------------------------------------------------------------------------
-## 5. Select By Attribute all Water Rights located in Division 3 with geographic coordinate
+## 4. Select By Attribute all Water Rights located in Division 3 with geographic coordinate
 ## Description: Select all points located in Division 3
 
-print "\nStep 5 Select By Attribute starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 4 Select By Attribute starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 expression = "\"DIV\" = '3' AND \"LAT_DD\" <> 0 AND \"LONG_DD\" <> 0"
 arcpy.MakeFeatureLayer_management(projFile, "temp")
@@ -161,21 +144,21 @@ arcpy.SelectLayerByAttribute_management("temp", "NEW_SELECTION", expression)
 selectFile = projFile.split("_pr")[0] + "_slct"
 arcpy.CopyFeatures_management("temp", selectFile)
 
-print "Step 5 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "Step 4 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 ## ---------------------------------------------------------------------------
-## 6. Copy and paste to final location
+## 5. Copy and paste to final location
 ## Description: Save shapefile into final folder
 
-print "\nStep 6 Save to final location starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 5 Save to final location starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 oRoot, oExt = os.path.split(selectFile)
 finalName = oExt.split('_slct')[0] + ".shp"
 out_feature = os.path.join(finalFolder, finalName)
 arcpy.CopyFeatures_management(selectFile, out_feature)
 
-print "Step 6 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "Step 5 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 
@@ -7,7 +7,7 @@
 ##              2. Project features to North America Albers Equal Area Conic
 ##              3. Clip features to the boundaries of the study area
 ##              4. Convert the clip files to csv
-##              5. Make XY event layer to geolocate WR location
+##              5. Make the projected XY points to geolocate WR location
 ##              6. Merge the state datasets
 ##              7. Standardize datasets
 ##              8. Select points within a distance
@@ -25,9 +25,18 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import attributeTable
+import excelCache
+import fieldCalculator
+import spatialSelect
+import xyPoints
+
 print "Geoprocess starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Workspace
@@ -129,10 +138,11 @@ print "Step 4 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%
 
 
 ## ---------------------------------------------------------------------------
-## 5. Generate XY Layer event 
-## Description: Creates a new point feature layer based on x- and y-coordinates defined in a source table.
+## 5. Generate XY points
+## Description: Creates the points from the x- and y-coordinates defined in a source table, projected to North
+## America Albers Equal Area Conic (the rows without valid coordinates are reported and dropped).
 
-print "\nStep 5 Generate XY Layer event starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 5 Generate XY points starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 arcpy.env.workspace = "C:\\GIS_RGB\\Geodatabase\\Hydrau_WaterUse\\3_waterRights\\inter_output\\MX\\"
 
@@ -141,36 +151,20 @@ outCS = arcpy.SpatialReference("North America Albers Equal Area Conic")
 xlsFiles = arcpy.ListFiles("*_prepared.xlsx")
 x_coords = "LONG_DD"
 y_coords = "LAT_DD"
+# The coordinates are in decimal degrees on WGS 1984 (the default coordinate system of Make XY Event Layer)
+inCS = arcpy.SpatialReference("WGS 1984")
 mergeList = []
 finalList = []
 
 # Execute Excel to Dbf table
 for xls in xlsFiles:
     dbf_file = os.path.splitext(xls)[0] + ".dbf"
-    arcpy.ExcelToTable_conversion(xls,
-                                  dbf_file)
+    excelCache.excelToTable(xls, dbf_file)
 
-# Make the XY event layer
+# Make the projected XY points
     nameLayer = os.path.splitext(dbf_file)[0]
-    outLayer = nameLayer.split("_prepared")[0] + "_points"
-    arcpy.MakeXYEventLayer_management(dbf_file,
-                                      x_coords,
-                                      y_coords,
-                                      outLayer)
-
-# Save to a layer file
-    saved_Layer = outLayer + ".lyr"
-    arcpy.SaveToLayerFile_management(outLayer,
-                                     saved_Layer)
-    
-# Create Shapefile
-    shape = saved_Layer.split("_points.lyr")[0] + ".shp"
-    arcpy.CopyFeatures_management(saved_Layer,
-                                  shape)
-
-# Project
-    projFile = os.path.splitext(shape)[0] + '_pr.shp'
-    arcpy.Project_management(shape, projFile, outCS)
+    projFile = nameLayer.split("_prepared")[0] + "_pr.shp"
+    xyPoints.tableToPoints(dbf_file, x_coords, y_coords, projFile, outCS, inCS)
     if ("SW_WaterRights") in projFile:
         finalList.append(projFile)
     else:
@@ -211,6 +205,7 @@ ABV = "ABV"
 fieldType = "TEXT"
 
 fieldsAdd = [stateID, municipioID, source, ABV]
+stateAbv = {5: "COA", 8: "CHI", 10: "DUR", 19: "NVL", 28: "TAM"}
 fieldsDel = ["STATE", "MUNICIP", "OID_"]
 
 ## Add new field State ID, Municipio, basin and aquifer ID WR_Source
@@ -230,42 +225,24 @@ for fc in finalList:
         arcpy.AddField_management(fc, basin_id, "LONG")
 
     # Use title format for values of "USE" and "AQUI_NAME"
-    arcpy.CalculateField_management(fc, "USE", "!USE!.title()", "PYTHON_9.3")
-    arcpy.CalculateField_management(fc, "AQUI_NAME", "!AQUI_NAME!.title()", "PYTHON_9.3")
-    cur = arcpy.UpdateCursor(fc)
-    
+    fieldCalculator.calculate(fc, [["USE", "!USE!.title()"],
+                                   ["AQUI_NAME", "!AQUI_NAME!.title()"]])
+
     # Update values in new fields
-    for row in cur:
-        value1 = row.getValue("STATE") # State
-        if value1 < 10:
-            row.setValue(stateID, '484' + '0' + str(value1))
-        else:
-            row.setValue(stateID, '484' + str(value1))
-        if value1 == 5:
-            row.setValue(ABV, "COA")
-        elif value1 == 8:
-            row.setValue(ABV, "CHI")
-        elif value1 == 10:
-            row.setValue(ABV, "DUR")
-        elif value1 == 19:
-            row.setValue(ABV, "NVL")
-        elif value1 == 28:
-            row.setValue(ABV, "TAM")
-        cur.updateRow(row)
-        value2 = row.getValue("MUNICIP") # Municipio
-        value3 = row.getValue(stateID)
-        if value2 < 10:
-            row.setValue(municipioID, value3 + '00' + str(value2))
-        elif value2 < 100:
-            row.setValue(municipioID, value3 + '0' + str(value2))
-        if "SW" in fc:
-            row.setValue(source, "SW") # Type of WR_SOURCE
-            row.setValue(aqui_id, -99)
-            row.setValue(aqui_nm, "NA")            
-        else:
-            row.setValue(source, "GW")
-            row.setValue(basin_id, -99)
-        cur.updateRow(row)
+    if "SW" in fc:
+        table = attributeTable.Table(fc, ["STATE", "MUNICIP", stateID, municipioID, source, ABV, aqui_id, aqui_nm])
+        table.apply([["compute", source, "SW"], # Type of WR_SOURCE
+                     ["compute", aqui_id, -99],
+                     ["compute", aqui_nm, "NA"]])
+    else:
+        table = attributeTable.Table(fc, ["STATE", "MUNICIP", stateID, municipioID, source, ABV, basin_id])
+        table.apply([["compute", source, "GW"],
+                     ["compute", basin_id, -99]])
+    # State ID: 484 + state code on 2 digits, municipio ID: state ID + municipio code on 3 digits (codes < 100)
+    table.apply([["pad", "STATE", stateID, 2, "484"],
+                 ["map", "STATE", ABV, stateAbv]])
+    table.pad("MUNICIP", municipioID, 3, table[stateID], where=table["MUNICIP"] < 100)
+    table.save()
     arcpy.DeleteField_management(fc,
                                  fieldsDel)
     
@@ -309,21 +286,6 @@ print "Step 9 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%
 
 print "\nStep 10 Select by location starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-def select_by_location(in_fc, target_fc, distance, out_fc):
-    arcpy.MakeFeatureLayer_management(in_fc, "temp")
-    arcpy.SelectLayerByLocation_management("temp",
-                                           "WITHIN_A_DISTANCE",
-                                           target_fc,
-                                           distance,
-                                           "NEW_SELECTION")
-    arcpy.CopyFeatures_management("temp", out_fc)
-    return out_fc
-
-def select_by_attribute(in_fc, expression):
-    arcpy.MakeFeatureLayer_management(in_fc, "temp_lyr")
-    arcpy.SelectLayerByAttribute_management("temp_lyr", 'NEW_SELECTION', expression)
-    return "temp_lyr"
-
 # Input
 Nation = "C:\\GIS_RGB\\Geodatabase\\Water_Governance\\1_political_jurisdictions\\final_output\\Census\\Nations.shp"
 
@@ -332,9 +294,9 @@ name = os.path.splitext(mergeFile)[0]
 output_name = os.path.split(name)[1] + "_distance"
 output = os.path.join(out_gdb, output_name)
 
-# Create a temp feature for Mexico
-mexico = select_by_attribute(Nation, "\"ADM0_ID\" = '484'")
-select_by_location(mergeFile, mexico, "2 Kilometers", output)
+# Points within 2 km of Mexico (the polygon of Mexico is indexed once, the points are tested in batches)
+spatialSelect.selectByLocation(mergeFile, "WITHIN_A_DISTANCE", Nation, output, "2 Kilometers",
+                               "\"ADM0_ID\" = '484'")
 
 print "Step 10 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
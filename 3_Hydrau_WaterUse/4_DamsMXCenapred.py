@@ -21,9 +21,14 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import excelCache
+
 print "Geoprocess starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Set environment settings
@@ -111,7 +116,7 @@ in_excel = "\\prepared\\Presas_prepared.xlsx"
 name = os.path.split(in_excel)[1] 
 dbf_file = os.path.splitext(name)[0]+ ".dbf"
 out_dbf_file = os.path.join(interFolder, dbf_file)
-arcpy.ExcelToTable_conversion(in_excel, out_dbf_file)
+excelCache.excelToTable(in_excel, out_dbf_file)
 
 
 # FIelds for join
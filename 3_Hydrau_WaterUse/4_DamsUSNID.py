@@ -3,13 +3,14 @@
 ## By: Sophie Plassin
 ## Description: Preparation of the NID Dams shapefile for the Rio Grande/Bravo basin (RGB)
 ##              1. Create a geodatabase
-##              2. Generate XY Layer for CO, NM, TX tables
-##              3. Project the features class to North America Albers Equal Area Conic
-##              4. Merge the State files into a single feature class
-##              5. Clip the area of the RGB
-##              6. Clean the dataset: change name fields, conversion of the U.S. standard units (feet, acre feet,
+##              2. Generate the XY points of the CO, NM, TX tables projected to North America Albers Equal Area Conic
+##              3. Merge the State files into a single feature class
+##              4. Clip the area of the RGB (Ses and Basin in one pass)
+##              5. Clean the dataset: change name fields, conversion of the U.S. standard units (feet, acre feet,
 ##              acres, square miles) to the metric system (m, cubic meters, hectares, square kilometers)
-##              7. Save output data to final folder
+##              6. Save output data to final folder
+##              Each step is executed only when its code, its parameters or its inputs changed since the last run,
+##              or when its outputs are missing (see the manifest Dams_NID_manifest.json in inter_output)
 ## ---------------------------------------------------------------------------
 
 ## Import packages and define the path name of the directories
@@ -18,9 +19,19 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import attributeTable
+import buildCache
+import excelCache
+import fieldCalculator
+import studyArea
+import xyPoints
+
 print "Geoprocess starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Set environment settings
@@ -35,8 +46,11 @@ arcpy.env.qualifiedFieldNames = False
 interFolder =  "C:\\GIS_RGB\\Geodatabase\\Hydrau_WaterUse\\4_dams\\inter_output\\"
 finalFolder = "C:\\GIS_RGB\\Geodatabase\\Hydrau_WaterUse\\4_dams\\final_output\\"
 
+# Manifest of the steps (fingerprints of the code, parameters and inputs of each step)
+manifest = buildCache.loadManifest(os.path.join(interFolder, "Dams_NID_manifest.json"))
+script = os.path.abspath(__file__)
+
 # Lists
-geoList = []
 projList = []
 clipList = []
 finalList = []
@@ -50,63 +64,59 @@ print "\nStep 1 Create a geodatabase starts at", datetime.datetime.now().strftim
 gdb_name = "Dams_NID.gdb"
 data_type = "FeatureClass"
 out_gdb = os.path.join(interFolder, gdb_name)
-arcpy.CreateFileGDB_management(interFolder, gdb_name)
+if not arcpy.Exists(out_gdb):
+    arcpy.CreateFileGDB_management(interFolder, gdb_name)
 
 print "Step 1 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 ## ---------------------------------------------------------------------------
-## 2. Generate XY Layer event 
-## Description: Creates a new point feature layer based on x- and y-coordinates defined in a source table.
+## 2. Generate XY points
+## Description: Creates the points from the x- and y-coordinates defined in a source table, projected to North
+## America Albers Equal Area Conic (the rows without valid coordinates are reported and dropped).
 
-print "\nStep 2 Generate XY Layer event starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 2 Generate XY points starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 xlsFiles = arcpy.ListFiles("*_join.xlsx")
 x_coords = "LONGITUDE"
 y_coords = "LATITUDE"
+# The coordinates are in decimal degrees on WGS 1984 (the default coordinate system of Make XY Event Layer)
+inCS = arcpy.SpatialReference("WGS 1984")
+stateCodes = {"CO": "08", "NM": "35", "TX": "48"}
+outCS = arcpy.SpatialReference("North America Albers Equal Area Conic")
 mergeList = []
 finalList = []
 
-# Execute Excel to Dbf table
+# Outputs
 for xls in xlsFiles:
-    name = os.path.splitext(xls)[0] 
-    dbf_file = os.path.join(interFolder, name + ".dbf")
-    arcpy.ExcelToTable_conversion(xls,
-                                  dbf_file)
-
-# Make the XY event layer
-    nameLayer = os.path.splitext(dbf_file)[0]
-    outLayer = nameLayer.split("_join")[0] + "_points"
-    arcpy.MakeXYEventLayer_management(dbf_file,
-                                      x_coords,
-                                      y_coords,
-                                      outLayer)
-
-# Save to a layer file
-    saved_Layer = outLayer + ".lyr"
-    arcpy.SaveToLayerFile_management(outLayer,
-                                     saved_Layer)
-    
-# Create Shapefile
-    root = os.path.split(saved_Layer)[1]
-    name = root.split("_points.lyr")[0] + "_dams"
-    output = os.path.join(out_gdb, name)
-    arcpy.CopyFeatures_management(saved_Layer,
-                                  output)
-
-# Add STATEID
-    cur = arcpy.UpdateCursor(output)
-    state_id = "STATEID"
-    for row in cur:
+    name = os.path.splitext(xls)[0].split("_join")[0] + "_dams_pr"
+    projList.append(os.path.join(out_gdb, name))
+
+step = buildCache.Step(manifest, "Step 2 Generate XY points",
+                       inputs=[os.path.join(dirpath, xls) for xls in xlsFiles],
+                       outputs=projList,
+                       params=[x_coords, y_coords, stateCodes, outCS.name],
+                       code=buildCache.stepSource(script, 2))
+if step.run:
+    # Execute Excel to Dbf table
+    for xls in xlsFiles:
+        name = os.path.splitext(xls)[0] 
+        dbf_file = os.path.join(interFolder, name + ".dbf")
+        excelCache.excelToTable(xls, dbf_file)
+
+    # Make the projected XY points
+        name = name.split("_join")[0] + "_dams_pr"
+        output = os.path.join(out_gdb, name)
+        xyPoints.tableToPoints(dbf_file, x_coords, y_coords, output, outCS, inCS)
+
+    # Add STATEID
+        state_id = "STATEID"
         state = name[0:2]
-        if state == 'CO':
-            row.setValue(state_id, '08')
-        if state == 'NM':
-            row.setValue(state_id, '35')
-        if state == 'TX':
-            row.setValue(state_id, '48')
-        cur.updateRow(row)
-    geoList.append(output)
+        if state in stateCodes:
+            table = attributeTable.Table(output, [state_id])
+            table.compute(state_id, stateCodes[state])
+            table.save()
+    step.done()
 
  
 print "Step 2 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
@@ -114,75 +124,58 @@ print "Step 2 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%
 
 
 ## ---------------------------------------------------------------------------
-## 3. Project
-## Description: Project to North America Albers Equal Area Conic
+## 3. Merge features
+## Description: Merge three states
 
-print "\nStep 3 Project starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 3 starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-outCS = arcpy.SpatialReference("North America Albers Equal Area Conic")
+# Output
+mergeFile = os.path.join(out_gdb, "Dams_us")
 
-for fc in geoList:
-    projFile = os.path.splitext(fc)[0] + '_pr'
-    arcpy.Project_management(fc, projFile, outCS)
-    projList.append(projFile)
+step = buildCache.Step(manifest, "Step 3 Merge",
+                       inputs=projList,
+                       outputs=[mergeFile],
+                       code=buildCache.stepSource(script, 3))
+if step.run:
+    arcpy.Merge_management(projList,
+                           mergeFile)
+    step.done()
 
 print "Step 3 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-
 ## ---------------------------------------------------------------------------
-## 4. Merge features
-## Description: Merge three states
+## 4. Clip
+## Description: Clip to the boundaries of the study area
 
-print "\nStep 4 starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 4 Clip the features starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-# Output
-mergeFile = os.path.join(out_gdb, "Dams_us")
+# Outputs: RGB_Basin is inside RGB_Ses, both outputs are written from one read of the merged dams
+outputs = studyArea.studyAreaOutputs(out_gdb, "Dams_us", "")
+clipList.extend(output for clip, output in outputs)
 
-arcpy.Merge_management(projList,
-                       mergeFile)
+step = buildCache.Step(manifest, "Step 4 Clip",
+                       inputs=[mergeFile, studyArea.SES, studyArea.BASIN],
+                       outputs=clipList,
+                       code=buildCache.stepSource(script, 4))
 
-print "Step 4 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+# Create a Function to execute Clip
+def clipFeatures():
+    studyArea.projectClip(mergeFile, outputs, None, nested=True)
+    print "Clip" , mergeFile, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
-## ---------------------------------------------------------------------------
-## 5. Clip
-## Description: Clip to the boundaries of the study area
+clipped = step.run
+if step.run:
+    clipFeatures()
+    step.done()
 
-print "\nStep 5 Clip the features starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
-
-# Create the clip_features
-folderShapefiles = "C:\\GIS_RGB\\Geodatabase\\rgb_bound\\"
-listfc = ["RGB_Basin_na_albers.shp",
-          "RGB_Ses_na_albers.shp"]
-xy_tolerance = ""
-clip_features = []
-
-for fc in listfc:
-    out_shp = os.path.join(folderShapefiles, fc)
-    clip_features.append(out_shp)
-
-# Execute Clip
-for clip in clip_features:
-    fc = mergeFile
-    # Create name
-    new_name = fc
-    temp = os.path.split(clip)[-1]
-    # Add Ses or Bas according to the clip feature name
-    if temp.startswith("RGB_Basin"):
-        output = new_name + "_bas"
-    else:
-        output = new_name + "_ses"
-    arcpy.Clip_analysis(fc, clip, output, xy_tolerance)
-    clipList.append(output)
-    print "Clip" , fc, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
-
-print "Step 5 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "Step 4 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 ## ---------------------------------------------------------------------------
-## 6. Clean the dataset
+## 5. Clean the dataset
 ## Description: Rename fields, Add new fields (units in U.S. system)
 
-print "\nStep 6 Clean the dataset starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 5 Clean the dataset starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # New fields International Units
 fieldHgtM =         "DAM_HGT_m"
@@ -193,6 +186,19 @@ fieldSurHa =        "SURFACE_ha"
 fieldDrainSqk =     "DRAIN_SqKm"
 newFields = [fieldHgtM, fieldLgtM, fieldCapMM, fieldCapMNo, fieldSurHa, fieldDrainSqk]
 
+# Fields with 0 for no data (U.S. units, NIDSTO_af keeps its 0 values)
+zeroFields = ["DAM_HGT_f", "DAM_LGTH_f", "MAXSTO_af", "NORSTO_af", "SURFACE_ac", "DRAIN_SqMi", "NID_HGT_f", "MAX_DISCHA"]
+
+# Expressions of the clean dataset
+cleanExpressions = [[fd, "where(!{0}! == 0, -99, !{0}!)".format(fd)] for fd in zeroFields]
+cleanExpressions += [[fieldHgtM, "!DAM_HGT_f! * 0.3048"], # Height in m
+                     [fieldLgtM, "!DAM_LGTH_f! * 0.3048"], # Length in m
+                     [fieldCapMM, "!MAXSTO_af! * 0.00123348"], # Max storage in mcm
+                     [fieldCapMNo, "!NORSTO_af! * 0.00123348"], # Normal storage in mcm
+                     [fieldSurHa, "!SURFACE_ac! * 0.404686"], # Surface in ha
+                     [fieldDrainSqk, "!Drain_SqMi! * 2.58999"]] # drainage area in sqkm.
+cleanExpressions += [[fd, "where(isnull(!{0}!) | (!{0}! < 0), -99, !{0}!)".format(fd)] for fd in newFields]
+
 # Fields to altere (lentgh <= 10 characters)
 alterFields= [["OTHER_DAM_",            "OTHER_NAME"],
               ["DAM_FORMER",            "FORMER_NAME"],
@@ -239,99 +245,62 @@ alterFields= [["OTHER_DAM_",            "OTHER_NAME"],
               ["JURISDICTI",            "JURISD_DAM"],
               ["EAP_LAST_R",            "EAP_DATE"]]    
 
-# Alter fields
-for fc in clipList:
-    for old, new in alterFields:
-        tmpName = ("{0}_tmp".format(old))
-        arcpy.AlterField_management(fc, old, tmpName)
-        arcpy.AlterField_management(fc, tmpName, new)
-
-# Set local variables
-fieldType = "FLOAT"
-fieldPrecision = 12
+# The fields of the clipped feature classes are updated in place
+step = buildCache.Step(manifest, "Step 5 Clean the dataset",
+                       inputs=clipList,
+                       outputs=clipList,
+                       params=[alterFields, newFields, cleanExpressions],
+                       code=buildCache.stepSource(script, 5))
+if step.run:
+    # The fields are renamed from the original names: start again from the clipped features
+    if not clipped:
+        clipFeatures()
+    # Alter fields
+    for fc in clipList:
+        for old, new in alterFields:
+            tmpName = ("{0}_tmp".format(old))
+            arcpy.AlterField_management(fc, old, tmpName)
+            arcpy.AlterField_management(fc, tmpName, new)
+
+    # Set local variables
+    fieldType = "FLOAT"
+    fieldPrecision = 12
     
-# Add fields
-for fc in clipList:
-    for fd in newFields:
-        arcpy.AddField_management(fc, fd, fieldType, fieldPrecision)
-    cur = arcpy.UpdateCursor(fc)
-    for row in cur:
-        value1 = row.getValue("DAM_HGT_f")
-        if value1 == 0:
-            row.setValue("DAM_HGT_f", "-99")
-        value2 = row.getValue("DAM_LGTH_f")
-        if value2 == 0:
-            row.setValue("DAM_LGTH_f", "-99")
-        value3 = row.getValue("MAXSTO_af")
-        if value3 == 0:
-            row.setValue("MAXSTO_af", "-99")
-        value4 = row.getValue("NORSTO_af")
-        if value4 == 0:
-            row.setValue("NORSTO_af", "-99")
-        value5 = row.getValue("SURFACE_ac")
-        if value5 == 0:
-            row.setValue("SURFACE_ac", "-99")
-        value6 = row.getValue("DRAIN_SqMi")
-        if value6 == 0:
-            row.setValue("DRAIN_SqMi", "-99")
-        value7 = row.getValue("NID_HGT_f")
-        if value7 == 0:
-            row.setValue("NID_HGT_f", "-99")
-        value8 = row.getValue("Max_Discha")
-        if value8 == 0:
-            row.setValue("MAX_DISCHA", "-99")
-        value9 = row.getValue("MAX_DISCHA")
-        if value9 == 0:
-            row.setValue("NIDSTO_af", "-99")
-        cur.updateRow(row)
-
-# Calculate Dams capacity, height and lenthg in international units
-    arcpy.CalculateField_management(fc, fieldHgtM, "!DAM_HGT_f! * 0.3048", "PYTHON_9.3") # Height in m
-    arcpy.CalculateField_management(fc, fieldLgtM, "!DAM_LGTH_f! * 0.3048", "PYTHON_9.3") # Length in m
-    arcpy.CalculateField_management(fc, fieldCapMM, "!MAXSTO_af! * 0.00123348", "PYTHON_9.3") # Max storage in mcm
-    arcpy.CalculateField_management(fc, fieldCapMNo, "!NORSTO_af! * 0.00123348 ", "PYTHON_9.3") # Normal storage in mcm
-    arcpy.CalculateField_management(fc, fieldSurHa, "!SURFACE_ac! * 0.404686", "PYTHON_9.3") # Surface in ha
-    arcpy.CalculateField_management(fc, fieldDrainSqk, "!Drain_SqMi! * 2.58999", "PYTHON_9.3") # drainage area in sqkm.
-
-    cur = arcpy.UpdateCursor(fc)
-    for row in cur:
-        value11 = row.getValue(fieldHgtM)
-        if value11 < 0:
-            row.setValue(fieldHgtM, "-99")
-        value12 = row.getValue(fieldLgtM)
-        if value12 < 0:
-            row.setValue(fieldLgtM, "-99")
-        value13 = row.getValue(fieldCapMM)
-        if value13 < 0:
-            row.setValue(fieldCapMM, "-99")
-        value14 = row.getValue(fieldCapMNo)
-        if value14 < 0:
-            row.setValue(fieldCapMNo, "-99")
-        value15 = row.getValue(fieldSurHa)
-        if value15 < 0:
-            row.setValue(fieldSurHa, "-99")
-        value16 = row.getValue(fieldDrainSqk)
-        if value16 < 0:
-            row.setValue(fieldDrainSqk, "-99")
-        cur.updateRow(row)
+    # Add fields
+    for fc in clipList:
+        for fd in newFields:
+            arcpy.AddField_management(fc, fd, fieldType, fieldPrecision)
 
+    # No data (0 => -99), conversion to international units, no data (negative values => -99):
+    # all the expressions are evaluated in a single pass on the table
+        fieldCalculator.calculate(fc, cleanExpressions)
+    step.done()
 
-print "Step 6 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+
+print "Step 5 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 ## ---------------------------------------------------------------------------
-## 7. Export the feature class
+## 6. Export the feature class
 ## Description: Rename fields, Add new fields (units in U.S. system)
 
-print "\nStep 7 Export starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 6 Export starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 for fc in clipList:
     name = os.path.split(fc)[1]
-    out_feature = os.path.join(finalFolder, name + ".shp")
-    arcpy.CopyFeatures_management(fc, out_feature)
-    arcpy.DeleteField_management(out_feature, "OID_")
+    finalList.append(os.path.join(finalFolder, name + ".shp"))
+
+step = buildCache.Step(manifest, "Step 6 Export",
+                       inputs=clipList,
+                       outputs=finalList,
+                       code=buildCache.stepSource(script, 6))
+if step.run:
+    for fc, out_feature in zip(clipList, finalList):
+        arcpy.CopyFeatures_management(fc, out_feature)
+        arcpy.DeleteField_management(out_feature, "OID_")
+    step.done()
 
-print "Step 7 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "Step 6 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 print "Geoprocess Dams completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
@@ -2,8 +2,10 @@
 ## Created on: 2019-08-01
 ## By: Sophie Plassin
 ## Description: Preparation of the population density raster for the Rio Grande/Bravo basin (RGB)
-##              1. Convert TIF to GRID
-##              2. Extract by Mask (using GCS: WGS 1984)
+##              1. Convert TIF to GRID (smallest lossless pixel type, selected from the block statistics)
+##              2. Extract by Mask (using GCS: WGS 1984, masks rasterized once and cached)
+##              3. Gridded population: census population of the counties and municipios redistributed on the cells
+##                 of the density raster (dasymetric), water and snow excluded with the land-cover raster
 ## ---------------------------------------------------------------------------
 
 
@@ -13,9 +15,16 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import dasymetric
+import maskCache
+import rasterType
+
 
 # Extension
 arcpy.CheckOutExtension("Spatial")
@@ -32,6 +41,8 @@ arcpy.env.workspace = dirpath
 ## ---------------------------------------------------------------------------
 ## 1. Convert TIFF to GRID
 ## Description: We convert the raw raster data (.TIF) in grid and save the grid in the folder "inter_output" 
+## The pixel type is the smallest type holding all the densities (first pass on the block statistics), so the
+## densities above 255 are not truncated as with 8_BIT_UNSIGNED. The copy is streamed block by block.
 
 print "\nStep 1 starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
@@ -45,7 +56,7 @@ for i in range(len(tifList)):
     year = tifList[i] [-13:-11]
     oName = "popdens" + year
     outRaster = os.path.join(interFolder, oName)
-    arcpy.CopyRaster_management(tifList[i], outRaster, "","","","NONE","NONE","8_BIT_UNSIGNED","NONE","NONE")
+    rasterType.convert(tifList[i], outRaster, interFolder)
     print "Export tif to grid" , tifList[i] , "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
     gridList.append(outRaster)
 print "Step 1 Tif to Grid completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
@@ -55,22 +66,23 @@ print "Step 1 Tif to Grid completed at", datetime.datetime.now().strftime("%I:%M
 ## ---------------------------------------------------------------------------
 ## 2. Extract by Mask
 ## Description: Extracts the cells of the population density raster dataset that correspond to the study area (mask).
+## The masks are rasterized once on the grid of the rasters and cached in inter_output (bit-packed): the rasters of
+## all the years share the same grid and reuse the cached masks. The blocks outside RGB_Ses are not read.
 
 print "\nStep 2 starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-# Mask
+# Mask (from the outer to the inner mask)
 folderShapefiles = "C:\\GIS_RGB\\Geodatabase\\rgb_bound\\"
-listfc = ["RGB_Basin.shp", "RGB_Ses.shp"]
+listfc = ["RGB_Ses.shp", "RGB_Basin.shp"]
 maskList = []
 
 for fc in listfc:
     out_shp = os.path.join(folderShapefiles, fc)
     maskList.append(out_shp)
 
-outputList =[]
-
 # Execute Extract By Mask
 for raster in gridList:
+    outputs = []
     for mask in maskList:
         temp = os.path.split(mask)[-1]
         name = os.path.split(raster)[1]
@@ -78,16 +90,38 @@ for raster in gridList:
             output = os.path.join(finalFolder, name + "_bas")
         else:
             output = os.path.join(finalFolder, name + "_ses")
-        # Execute ExtractByMask
-        outExtractByMask = ExtractByMask(raster, mask)
-        # Save the output 
-        outExtractByMask.save(output)
-        print "Extract By Mask" , raster, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
+        outputs.append([mask, output])
+    maskCache.extractByMask(raster, outputs, interFolder, interFolder)
+    print "Extract By Mask" , raster, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
 print "Step 2 Extract By Mask completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
 
 
 
+## ---------------------------------------------------------------------------
+## 3. Gridded population
+## Description: The census population of each county and municipio (Population.shp, field Pop_<year>) is
+## redistributed on the cells of the density raster of the same year, in proportion to density x cell area.
+## The cells of water and snow and ice (NALCMS classes 18 and 19, 6_LandCover.py) get no population. The sum of the
+## cells of each county or municipio is its census population (see the report). The census polygons and the
+## land-cover sampling (warp map) are rasterized once and cached in inter_output.
 
+print "\nStep 3 starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
+popShapefile = "C:\\GIS_RGB\\Geodatabase\\Socio_Economics\\1_Population\\final_output\\Census\\Population.shp"
+landCover = "C:\\GIS_RGB\\Geodatabase\\Biophysical\\6_landcover\\final_output\\lc10ses"
+excludedClasses = [18, 19]
+popFields = [field.name for field in arcpy.ListFields(popShapefile)]
 
+for raster in gridList:
+    year = os.path.split(raster)[1][-2:]
+    popField = "Pop_" + year
+    if popField not in popFields:
+        print "No census population", popField, "for", raster
+        continue
+    output = os.path.join(finalFolder, "pop" + year)
+    dasymetric.populationGrid(raster, popShapefile, "ADM2_GEOID", popField, output, interFolder, interFolder,
+                              landCover, excludedClasses)
+    print "Gridded population" , output, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
+
+print "Step 3 Gridded population completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
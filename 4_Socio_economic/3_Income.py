@@ -4,10 +4,9 @@
 ## Description: Preparation of the population shapefile for the Rio Grande/Bravo basin (RGB)
 ##              1. Create a geodatabase
 ##              2. Convert excel to table for US 
-##              3. Join excel to shapefile for US
-##              4. Convert shapefile to table for MX
-##              5. Join dbf to shapefile for MX
-##              6. Export files to final folder
+##              3. Convert shapefile to table for MX
+##              4. Join the US and MX tables to the shapefile
+##              5. Export files to final folder
 ## ---------------------------------------------------------------------------
 
 
@@ -17,9 +16,15 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import excelCache
+import tableJoin
+
 
 # Set options
 env.overwriteOutput = True
@@ -66,9 +71,7 @@ print "\nStep 2 Excel To Table starts at", datetime.datetime.now().strftime("%A,
 # Input
 in_excel = "US\\CA1_1969_2015_personalIncome.xlsx"
 output = os.path.join(interFolder, "Income_US.dbf")
-arcpy.ExcelToTable_conversion(in_excel, output)
-arcpy.AddField_management(output, "ISO_GEOID", "TEXT", "", "", "8")
-arcpy.CalculateField_management(output, "ISO_GEOID", "'840' + !GeoFIPS!", "PYTHON_9.3")
+excelCache.excelToTable(in_excel, output, None, ["ISO_GEOID", "840", "GeoFIPS"], interFolder)
 dbfList_US.append(output)
 
 print "Step 2 completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
@@ -76,45 +79,10 @@ print "Step 2 completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
 
 
 ## ---------------------------------------------------------------------------
-## 3. Join excel to shapefile
-## Description: Join excel to shapefile for US dataset
-
-print "\nStep 3 Join starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
-
-# Input
-input_folder = "C:\\GIS_RGB\\Geodatabase\\Water_Governance\\1_political_jurisdictions\\final_output\\Census\\"
-input_fc = "Counties_and_Municipios_rgb.shp"
-input_file = os.path.join(input_folder, input_fc)
-
-# Expression
-expression_us = "\"ADM0_ID\" = '840'"
-
-# Join fields
-joinFieldLayer = "ADM2_GEOID" 
-joinFieldTable = "ISO_GEOID"
-
-# Output
-outname = "Income_US"
-
-# Execute
-for dbf in dbfList_US:
-    arcpy.MakeFeatureLayer_management(input_file, "temp")
-    arcpy.SelectLayerByAttribute_management("temp", "NEW_SELECTION", expression_us)
-    arcpy.AddJoin_management("temp", joinFieldLayer, dbf, joinFieldTable)
-    name = os.path.split(dbf)[1]
-    out_fc = os.path.join(out_gdb, outname)
-    arcpy.CopyFeatures_management("temp", out_fc)
-    outputList.append(out_fc)
-
-print "Step 3 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
-
-
-
-## ---------------------------------------------------------------------------
-## 4. Shapefile To Table
+## 3. Shapefile To Table
 ## Description: Convert shapefile to dbf files for MX.
 
-print "\nStep 4 Shapefile To Table starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 3 Shapefile To Table starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 yearList = ["90", "00", "10"]
 fcList = ["ingmun90gw.dbf", "ingmun00gw.dbf", "ingmun10gw.dbf"]
@@ -135,16 +103,16 @@ for year in yearList:
                 arcpy.CalculateField_management(out_data, "ISO_GEOID", "'484' + !MUN_OFICIA!", "PYTHON_9.3")
             dbfList_MX.append(out_data)
 
-print "Step 4 completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
+print "Step 3 completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
 
 
 
 
 ## ---------------------------------------------------------------------------
-## 5. Join dbf to shapefile
-## Description: Join dbf to shapefile for US dataset
+## 4. Join dbf to shapefile
+## Description: Join the US table and the MX tables to the shapefile (one read of the shapefile for all the outputs)
 
-print "\nStep 5 Join starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 4 Join starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Input
 input_folder = "C:\\GIS_RGB\\Geodatabase\\Water_Governance\\1_political_jurisdictions\\final_output\\Census\\"
@@ -152,6 +120,7 @@ input_fc = "Counties_and_Municipios_rgb.shp"
 input_file = os.path.join(input_folder, input_fc)
 
 # Expression
+expression_us = "\"ADM0_ID\" = '840'"
 expression_mx = "\"ADM0_ID\" = '484'"
 
 # Join fields
@@ -166,19 +135,27 @@ alterFields_10 = [["POTO10", "Pop_10"]]
 alterFields = [alterFields_90, alterFields_00, alterFields_10]
 
 # Output
-outname = "DistributionIncome_MX"
+outname_us = "Income_US"
+outname_mx = "DistributionIncome_MX"
 
-# Execute
-for i in range(len(dbfList_MX)):
-    arcpy.MakeFeatureLayer_management(input_file, "temp")
-    arcpy.SelectLayerByAttribute_management("temp", "NEW_SELECTION", expression_mx)
-    arcpy.AddJoin_management("temp", joinFieldLayer, dbfList_MX[i], joinFieldTable)
-    name = os.path.split(dbfList_MX[i])[1]
+# Outputs: US dataset and one MX dataset per year
+joins = [[os.path.join(out_gdb, outname_us), expression_us, [[dbf, joinFieldTable]]] for dbf in dbfList_US]
+mxList = []
+for dbf in dbfList_MX:
+    name = os.path.split(dbf)[1]
     begin = name.find("_")
     end = name.find(".")
     tail = name[begin + 1 : end]
-    out_fc = os.path.join(out_gdb, outname + tail)
-    arcpy.CopyFeatures_management("temp", out_fc)   
+    out_fc = os.path.join(out_gdb, outname_mx + tail)
+    joins.append([out_fc, expression_mx, [[dbf, joinFieldTable]]])
+    mxList.append(out_fc)
+
+# Execute
+tableJoin.joinTables(input_file, joinFieldLayer, joins)
+outputList.extend([out_fc for out_fc, expression, tables in joins])
+
+for i in range(len(mxList)):
+    out_fc = mxList[i]
     # Alter fields
     for old, new in alterFields[i]:
         tmpName = ("{0}_tmp".format(old))
@@ -190,16 +167,15 @@ for i in range(len(dbfList_MX)):
                  "NOM_MUN", "DISTRITO", "NOM_DIST", "ISO_GEOID",
                  "COUNTRYISO", "STATEFP", "COUNTY", "COUNTYID"]
     arcpy.DeleteField_management(out_fc, fieldsDel)
-    outputList.append(out_fc)
 
-print "Step 5 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "Step 4 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
 ## ---------------------------------------------------------------------------
-## 6. Export to final folder
+## 5. Export to final folder
 ## Description: Export to final folder
 
-print "\nStep 6 Export to final folder  completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "\nStep 5 Export to final folder  completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Fields to delete
 fieldDel = ["GID_0", "GID_1", "GID_2", "TYPE_2", "ENGTYPE_2", "HASC_2",
@@ -214,7 +190,7 @@ for fc in outputList:
     arcpy.CopyFeatures_management(fc, output)
     arcpy.DeleteField_management(output, fieldDel)
 
-print "Step 6 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+print "Step 5 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 print "\nGeoprocess completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
@@ -14,9 +14,15 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import excelCache
+import tableJoin
+
 # Set options
 arcpy.env.overwriteOutput = True
 arcpy.env.qualifiedFieldNames = False
@@ -50,13 +56,11 @@ for xl in xlsFiles:
     root = os.path.splitext(xl)[0]
     name = os.path.split(root)[1]
     dbf_file = os.path.join(interFolder, name + ".dbf")
-    arcpy.ExcelToTable_conversion(xl, dbf_file)
-    arcpy.AddField_management(dbf_file, "ISO_GEOID", "TEXT", "", "", "8")
     if name.startswith("Farms_US"):
-        expression = "'840' + !GEOID!"
+        prefix = "840"
     else:
-        expression = "'484' + !GEOID!"
-    arcpy.CalculateField_management(dbf_file, "ISO_GEOID", expression, "PYTHON_9.3")
+        prefix = "484"
+    excelCache.excelToTable(xl, dbf_file, None, ["ISO_GEOID", prefix, "GEOID"], interFolder)
     tabList.append(dbf_file)
     print "Conversion" , xl, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
@@ -85,27 +89,25 @@ fieldDelJoin = ["County", "GEOID", "GEOID_1", "OID_", "MUNICIPIO", "ISO_GEOID",
                 "Shape_Area", "Shape_Leng"]
 
 
-# Create a feature layer from the featureclass
+# Expression
+expression_us = "\"ADM0_ID\" = '840'"
+expression_mx = "\"ADM0_ID\" = '484'"
+
+# One output per table (one read of the shapefile for all the outputs)
+joins = []
 for dbf in tabList:
-    arcpy.MakeFeatureLayer_management(input_file, "temp")
-    name = os.path.split(dbf)[1]
+    root = os.path.splitext(dbf)[0]
+    name = os.path.split(root)[1]
     if name.startswith ("Farms_US"):
-        expression = "\"ADM0_ID\" = '840'"
-        arcpy.SelectLayerByAttribute_management("temp", "NEW_SELECTION", expression)
-        arcpy.AddJoin_management("temp", joinFieldLayer, dbf, joinFieldTable)
-        out_fc = os.path.join(finalFolder, name)
-        arcpy.CopyFeatures_management("temp", out_fc)
-        print "Join" , name, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
-        finalList.append(out_fc)
+        expression = expression_us
     else:
-        expression = "\"ADM0_ID\" = '484'"
-        arcpy.SelectLayerByAttribute_management("temp", "NEW_SELECTION", expression)
-        arcpy.AddJoin_management("temp", joinFieldLayer, dbf, joinFieldTable)       
-        name = os.path.split(dbf)[1]
-        out_fc = os.path.join(finalFolder, name)
-        arcpy.CopyFeatures_management("temp", out_fc)
-        print "Join" , name, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
-        finalList.append (out_fc)
+        expression = expression_mx
+    out_fc = os.path.join(finalFolder, name + ".shp")
+    joins.append([out_fc, expression, [[dbf, joinFieldTable]]])
+    finalList.append(out_fc)
+
+tableJoin.joinTables(input_file, joinFieldLayer, joins)
+print "Join completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
 for fc in finalList:
     arcpy.DeleteField_management(fc, fieldDelJoin)
@@ -2,9 +2,10 @@
 ## Created on: 2019-04-10
 ## By: Sophie Plassin
 ## Description: Preparation of the elevation raster dataset for the Rio Grande/Bravo basin (RGB)
-##              1. ASCII to Raster
-##              2. Extract by Mask (using GCS: WGS 1984)
+##              1. ASCII to Raster (only the window of the study area is read)
+##              2. Extract by Mask (using GCS: WGS 1984, cached masks, blocks outside the study area skipped)
 ##              3. Project the raster to North America Albers Equal Area Conic
+##              4. Export the final rasters as tiled, compressed GeoTIFFs with overviews
 ## ---------------------------------------------------------------------------
 
 ## Import packages and define the path name of the directories
@@ -13,11 +14,19 @@
 import datetime
 import arcpy
 import os
+import sys
 import glob
 import itertools
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import asciiGrid
+import maskCache
+import rasterOutput
+import warpMap
+
 # Extension
 arcpy.CheckOutExtension("Spatial")
 env.overwriteOutput = True
@@ -32,6 +41,8 @@ dirpath = arcpy.env.workspace
 ## ---------------------------------------------------------------------------
 ## 1. ASCII to Raster
 ## Description: Converts an ASCII file representing raster data to a raster dataset.
+## Only the rows and columns of the global grid covering the study area (extent of RGB_Ses) are parsed: the rows
+## above are skipped without parsing, and the clipped raster is written directly (GCS: WGS 1984).
 
 print "\nStep 1 ASCII to Raster starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
@@ -39,9 +50,12 @@ print "\nStep 1 ASCII to Raster starts at", datetime.datetime.now().strftime("%A
 inASCII = os.path.join(dirpath, "GloElev_30as.asc")
 outRaster = "elev"
 outFolder = "C:\\GIS_RGB\\Geodatabase\\Biophysical\\4_elevation\\inter_output\\"
+studyArea = arcpy.Describe("C:\\GIS_RGB\\Geodatabase\\rgb_bound\\RGB_Ses.shp").extent
 
-# Execute ASCIIToRaster
-arcpy.ASCIIToRaster_conversion(inASCII, outFolder + outRaster)
+# Execute ASCII to Raster on the extent of the study area
+window = asciiGrid.clipToRaster(inASCII, (studyArea.XMin, studyArea.YMin, studyArea.XMax, studyArea.YMax),
+                                outFolder + outRaster, arcpy.SpatialReference(4326))
+print "Clipped grid:", window.nrows, "rows x", window.ncols, "columns"
 
 print "\nStep 1 ASCII to Raster completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
@@ -49,12 +63,15 @@ print "\nStep 1 ASCII to Raster completed at", datetime.datetime.now().strftime(
 ## ---------------------------------------------------------------------------
 ## 2. Extract by Mask
 ## Description: Extracts the cells of the elevation raster dataset that correspond to the study area (mask).
+## The masks are rasterized once on the grid of the elevation raster and cached in inter_output (bit-packed).
+## The raster is read block by block: the blocks outside RGB_Ses are skipped, each other block is read once
+## for both outputs (_ses, _bas).
 
 print "\nStep 2 starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-# Mask
+# Mask (from the outer to the inner mask)
 folderShapefiles = "C:\\GIS_RGB\\Geodatabase\\rgb_bound\\"
-listfc = ["RGB_Basin.shp", "RGB_Ses.shp"]
+listfc = ["RGB_Ses.shp", "RGB_Basin.shp"]
 maskList = []
 
 for fc in listfc:
@@ -62,21 +79,21 @@ for fc in listfc:
         maskList.append(out_shp)
 
 outputList =[]
+outputs = []
 
-# Execute Extract By Mask
 for mask in maskList:
     temp = os.path.split(mask)[-1]
     if temp.startswith("RGB_Basin"):
         output = outFolder + outRaster + "_bas"
     else:
         output = outFolder + outRaster + "_ses"
-    # Execute ExtractByMask
-    inRaster = outFolder + outRaster
-    outExtractByMask = ExtractByMask(inRaster, mask)
-    # Save the output 
-    outExtractByMask.save(output)
+    outputs.append([mask, output])
     outputList.append(output)
-    print "Extract By Mask" , outRaster, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
+
+# Execute Extract By Mask
+inRaster = outFolder + outRaster
+maskCache.extractByMask(inRaster, outputs, outFolder, outFolder)
+print "Extract By Mask" , outRaster, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
 print "Step 2 Extract By Mask completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
 
@@ -84,6 +101,10 @@ print "Step 2 Extract By Mask completed at", datetime.datetime.now().strftime("%
 ## ---------------------------------------------------------------------------
 ## 3. Project rasters
 ## Description: Project RGB elevation raster dataset to North America Albers Equal Area Conic
+## The map of the source cell of each Albers cell is computed once for the grid of the elevation raster (the
+## outputs of Extract by Mask are windows of it) and cached in inter_output (warp map, loaded by the next runs),
+## then each raster is projected by a gather of its cells (nearest neighbor) on the window of the Albers grid
+## covering it. Both rasters get the cell size of the projected area of an elevation cell.
 
 print "\nStep 3 starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 finalFolder = "C:\\GIS_RGB\\Geodatabase\\Biophysical\\4_elevation\\final_output\\"
@@ -95,9 +116,20 @@ for i in range(len(outputList)):
     name = os.path.split(outputList[i])[1]
     projFile = os.path.join(finalFolder, name)
     print projFile
-    arcpy.ProjectRaster_management(outputList[i], projFile, outCS)
+    warpMap.projectRaster(outputList[i], projFile, outCS, outFolder, outFolder, sourceRaster=inRaster)
+    projList.append(projFile)
     print "Projection" , outputList[i], "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
 print "Step 3 Projection completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
 
 
+## ---------------------------------------------------------------------------
+## 4. Export tiled GeoTIFFs
+## Description: Write the final rasters as tiled, compressed GeoTIFFs with overviews (final_output\tiff),
+## so that windows and low resolution views are read without decoding the whole raster.
+
+print "\nStep 4 Export GeoTIFF starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+
+rasterOutput.exportTiffs(projList, os.path.join(finalFolder, "tiff"))
+
+print "Step 4 Export GeoTIFF completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
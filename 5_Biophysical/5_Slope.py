@@ -2,8 +2,10 @@
 ## Created on: 2019-04-11
 ## By: Sophie Plassin
 ## Description: Compute the slope from each cell of the elevation raster for the Rio Grande/Bravo basin (RGB)
-##              1. Slope in degree
-##              2. Slope in percent
+##              1. Slope in degree and in percent in a single tiled pass: each block of the elevation rasters is read
+##                 once (with a halo of 1 cell), both slopes are computed from the same gradient and the blocks
+##                 are distributed over a pool of processes
+##              2. Export the final rasters as tiled, compressed GeoTIFFs with overviews
 ## ---------------------------------------------------------------------------
 
 ## Import packages and define the path name of the directories
@@ -12,63 +14,70 @@
 import datetime
 import arcpy
 import os
+import sys
 import glob
 import itertools
 from arcpy import env
 from arcpy.sa import *
 
-# Check out the ArcGIS extension
-arcpy.CheckOutExtension("Spatial")
-env.overwriteOutput = True
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import terrain
+import rasterOutput
 
-print "Geoprocess starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+# The processes of the pool import this script again: the steps run only in the main process
+if __name__ == "__main__":
 
-### Workspace
-env.workspace = "C:\\GIS_RGB\\Geodatabase\\Biophysical\\4_elevation\\final_output\\"
-dirpath = env.workspace
+    env.overwriteOutput = True
 
-## Set local variables
-inRasterList = arcpy.ListRasters()
-outRaster = "slope"
-outFolder = "C:\\GIS_RGB\\Geodatabase\\Biophysical\\5_slope\\final_output\\"
+    print "Geoprocess starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
+    ### Workspace
+    env.workspace = "C:\\GIS_RGB\\Geodatabase\\Biophysical\\4_elevation\\final_output\\"
+    dirpath = env.workspace
 
-## ---------------------------------------------------------------------------
-## 1. Slope in Degree
-## Description: Compute the slope in degree
+    ## Set local variables
+    inRasterList = arcpy.ListRasters()
+    outRaster = "slope"
+    outFolder = "C:\\GIS_RGB\\Geodatabase\\Biophysical\\5_slope\\final_output\\"
+    scratchFolder = "C:\\GIS_RGB\\Geodatabase\\Biophysical\\5_slope\\inter_output\\"
+    if not os.path.exists(scratchFolder):
+        os.makedirs(scratchFolder)
 
-print "\nStep 1 Slope in Degree starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-# Execute Slope in Degree
-for raster in inRasterList:
-    outSlope = Slope(raster, "DEGREE")
-# Save the output
-    if raster.endswith("bas"):
-        name = outRaster + "deg" + "bas"
-    else:
-        name = outRaster + "deg" + "ses"
-    outSlope.save(outFolder + name)
-    print "Slope in degree" , raster, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
+    ## ---------------------------------------------------------------------------
+    ## 1. Slope in Degree and in Percent
+    ## Description: Compute the slope in degree and in percent (Horn's method, as the tool Slope).
+    ## The blocks of _bas and _ses are computed in parallel, each block is read once for both units.
 
-print "\nStep 1 Slope in Degree completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+    print "\nStep 1 Slope in Degree and in Percent starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
+    jobs = []
+    for raster in inRasterList:
+        if raster.endswith("bas"):
+            suffix = "bas"
+        else:
+            suffix = "ses"
+        outputs = [[outFolder + outRaster + "deg" + suffix, "DEGREE"],
+                   [outFolder + outRaster + "pct" + suffix, "PERCENT_RISE"]]
+        jobs.append([os.path.join(dirpath, raster), outputs])
+
+    # Execute Slope
+    terrain.slope(jobs, scratchFolder)
+    for raster, outputs in jobs:
+        print "Slope in degree and in percent" , raster, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
+
+    print "\nStep 1 Slope in Degree and in Percent completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-## ---------------------------------------------------------------------------
-## 2. Slope in percent
-## Description: Compute the slope in percent
 
-print "\nStep 2 Slope in Percent starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+    ## ---------------------------------------------------------------------------
+    ## 2. Export tiled GeoTIFFs
+    ## Description: Write the final rasters as tiled, compressed GeoTIFFs with overviews (final_output\tiff),
+    ## so that windows and low resolution views are read without decoding the whole raster.
 
-# Execute Slope in Percent
-for raster in inRasterList:
-    outSlope = Slope(raster, "PERCENT_RISE")
-# Save the output
-    if raster.endswith("bas"):
-        name = outRaster + "pct" + "bas"
-    else:
-        name = outRaster + "pct" + "ses"
-    outSlope.save(outFolder + name)
-    print "Slope in Percent" , raster, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
+    print "\nStep 2 Export GeoTIFF starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
-print "\nStep 2 Slope in Percent completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
+    slopeList = [output for raster, outputs in jobs for output, unit in outputs]
+    rasterOutput.exportTiffs(slopeList, os.path.join(outFolder, "tiff"))
 
+    print "Step 2 Export GeoTIFF completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
@@ -17,9 +17,15 @@
 import datetime
 import arcpy
 import os
+import sys
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import excelCache
+import tableJoin
+
 
 # Set options
 env.overwriteOutput = True
@@ -65,16 +71,11 @@ print "\nStep 2 Excel To Table starts at", datetime.datetime.now().strftime("%A,
 in_excels = ["percrop\\prepared\\percrop.xlsx",
              "ancrop\\prepared\\ancrop_winter.xlsx",
              "ancrop\\prepared\\ancrop_spring.xlsx"]
-# Expression
-expression = "'484' + !GEOID!"
-
 for xl in in_excels:
     root = os.path.splitext(xl)[0]
     name = os.path.split(root)[1]
     dbf_file = os.path.join(interFolder, name + ".dbf")
-    arcpy.ExcelToTable_conversion(xl, dbf_file, "Area_Planted")
-    arcpy.AddField_management(dbf_file, "ISO_GEOID", "TEXT", "", "", "8")
-    arcpy.CalculateField_management(dbf_file, "ISO_GEOID", expression, "PYTHON_9.3")
+    excelCache.excelToTable(xl, dbf_file, "Area_Planted", ["ISO_GEOID", "484", "GEOID"], interFolder)
     tabList.append(dbf_file)
     print "Conversion" , xl, "completed at" , datetime.datetime.now().strftime("%I:%M:%S%p")
 
@@ -100,17 +101,18 @@ expression = "\"ADM0_ID\" = '484'"
 joinFieldLayer = "ADM2_GEOID" 
 joinFieldTable = "ISO_GEOID"
 
-# Execute
+# One output per table (one read of the shapefile for all the outputs)
+joins = []
 for dbf in tabList:
-    arcpy.MakeFeatureLayer_management(input_file, "temp")
-    arcpy.SelectLayerByAttribute_management("temp", "NEW_SELECTION", expression)
-    arcpy.AddJoin_management("temp", joinFieldLayer, dbf, joinFieldTable)
     root = os.path.splitext(dbf)[0]
     name = os.path.split(root)[1]
     out_fc = os.path.join(out_gdb, "MX_" + name + "07")
-    arcpy.CopyFeatures_management("temp", out_fc)
+    joins.append([out_fc, expression, [[dbf, joinFieldTable]]])
     outputList.append(out_fc)
 
+# Execute
+tableJoin.joinTables(input_file, joinFieldLayer, joins)
+
 print "Step 3 completed at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 
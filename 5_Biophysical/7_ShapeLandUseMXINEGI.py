@@ -16,11 +16,16 @@
 import datetime
 import arcpy
 import os
+import sys
 import glob
 import itertools
 from arcpy import env
 from arcpy.sa import *
 
+# Import the shared tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "0_Tools"))
+import classCatalog
+
 print "Geoprocess starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Workspace
@@ -116,9 +121,9 @@ print "Step 3 Clip completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
 print "\nStep 4 starts at", datetime.datetime.now().strftime("%A, %B %d %Y %I:%M:%S%p")
 
 # Set local variables
-fieldType = "TEXT"
 fieldNameEN = "NAME"
 fieldCode = "CVE_UNION"
+catalog = classCatalog.getCatalog("INEGI", "serie5-6")
 
 # Field to delete
 fieldDel = ["AREA"]
@@ -132,158 +137,8 @@ for fc in clippedList:
 # Remove field
     arcpy.DeleteField_management(fc, fieldDel)
 
-# Add field NAME 
-    arcpy.AddField_management(fc, fieldNameEN, fieldType)
-
-# Add translation from Spanish to English in NAME
-    cur = arcpy.UpdateCursor(fc)
-    for row in cur:
-        value1 = row.getValue(fieldCode)
-        if value1 == "ADV":
-            row.setValue(fieldNameEN, "Unvegetated Land")
-        if value1 == "AH":
-            row.setValue(fieldNameEN, "Human Settlements")
-        if value1 == "BA":
-            row.setValue(fieldNameEN, "Boreal Forest")
-        if value1 == "BG":
-            row.setValue(fieldNameEN, "Gallery Forest")         
-        if value1 == "BJ":
-            row.setValue(fieldNameEN, "Juniperus Forest")
-        if value1 == "BP":
-            row.setValue(fieldNameEN, "Pine Forest")  
-        if value1 == "BPQ":
-            row.setValue(fieldNameEN, "Pine-Oak Forest")
-        if value1 == "BQ":
-            row.setValue(fieldNameEN, "Oak Forest")
-        if value1 == "BQP":
-            row.setValue(fieldNameEN, "Oak-Pine Forest")
-        if value1 == "BS":
-            row.setValue(fieldNameEN, "Douglas-Fir and Spruce Forest")
-        if value1 == "DV":
-            row.setValue(fieldNameEN, "Without Vegetation")
-        if value1 == "H2O":
-            row.setValue(fieldNameEN, "Water Body")
-        if value1 == "HA":
-            row.setValue(fieldNameEN, "Wetland Agriculture")
-        if value1 == "MC":
-            row.setValue(fieldNameEN, "Pachycaulous Shrubland/Pachycaulous Scrub")
-        if value1 == "MDM":
-            row.setValue(fieldNameEN, "Desertic Microphyllous Shrubland/Desertic Microphyllous Scrub")
-        if value1 == "MDR":
-            row.setValue(fieldNameEN, "Desertic Rosetophyllous Shrubland/Desertic Rosetophyllous Scrub")
-        if value1 == "MET":
-            row.setValue(fieldNameEN, "Tamaulipan Thorn Shrubland/Tamaulipan Thorn Scrub")
-        if value1 == "MK":
-            row.setValue(fieldNameEN, "Thorn Forest")
-        if value1 == "MKX":
-            row.setValue(fieldNameEN, "Desertic Thorn Forest")
-        if value1 == "ML":
-            row.setValue(fieldNameEN, "Chaparral")
-        if value1 == "MSM":
-            row.setValue(fieldNameEN, "Piedmont Shrubland/Piedmont Scrub")
-        if value1 == "PC":
-            row.setValue(fieldNameEN, "Cultivated Grassland")
-        if value1 == "PH":
-            row.setValue(fieldNameEN, "Halophilous Grassland")
-        if value1 == "PI":
-            row.setValue(fieldNameEN, "Induced Grassland")
-        if value1 == "PN":
-            row.setValue(fieldNameEN, "Natural Grassland")
-        if value1 == "RA":
-            row.setValue(fieldNameEN, "Annual Irrigated Crop")
-        if value1 == "RAP":
-            row.setValue(fieldNameEN, "Annual and Perennial Irrigated Crop")
-        if value1 == "RAS":
-            row.setValue(fieldNameEN, "Annual and Semi-Perennial Irrigated Crop")
-        if value1 == "RP":
-            row.setValue(fieldNameEN, "Perennial Irrigated Crop")
-        if value1 == "RS":
-            row.setValue(fieldNameEN, "Semi-Perennial Irrigated Crop")
-        if value1 == "RSP":
-            row.setValue(fieldNameEN, "Perennial and Semi-Perennial Irrigated Crop")
-        if value1 == "TA":
-            row.setValue(fieldNameEN, "Annual Rainfed Crop")
-        if value1 == "TAP":
-            row.setValue(fieldNameEN, "Annual and Perennial Rainfed Crop")
-        if value1 == "TAS":
-            row.setValue(fieldNameEN, "Annual and Semi-Perennial Rainfed Crop")
-        if value1 == "TP":
-            row.setValue(fieldNameEN, "Perennial Rainfed Crop")
-        if value1 == "VD":
-            row.setValue(fieldNameEN, "Sand Desertic Vegetation")
-        if value1 == "VG":
-            row.setValue(fieldNameEN, "Gallery Vegetation")
-        if value1 == "VH":
-            row.setValue(fieldNameEN, "Halophilous Vegetation")
-        if value1 == "VHH":
-            row.setValue(fieldNameEN, "Halophilous Hydrophilous Vegetation")
-        if value1 == "VPI":
-            row.setValue(fieldNameEN, "Induced Palms")
-        if value1 == "VSa/BA":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Boreal Forest")
-        if value1 == "VSa/BB":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Cypressus Forest")
-        if value1 == "VSa/BG":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Galley Forest")
-        if value1 == "VSa/BJ":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Juniperus Forest")
-        if value1 == "VSA/BP":
-            row.setValue(fieldNameEN, "Secondary Arboreal Vegetation derived from Pine Forest")
-        if value1 == "VSa/BP":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Pine Forest")
-        if value1 == "VSA/BPQ":
-            row.setValue(fieldNameEN, "Secondary Arboreal Vegetation derived from Pine-Oak Forest")
-        if value1 == "VSa/BPQ":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Pine-Oak Forest")
-        if value1 == "VSA/BQ":
-            row.setValue(fieldNameEN, "Secondary Arboreal Vegetation derived from Oak Forest")
-        if value1 == "VSa/BQ":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Oak Forest")
-        if value1 == "VSA/BQP":
-            row.setValue(fieldNameEN, "Secondary Arboreal Vegetation derived from Oak-Pine Forest")
-        if value1 == "VSa/BQP":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Oak-Pine Forest")
-        if value1 == "VSa/BS":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Douglas-Fir and Spruce Forest")
-        if value1 == "VSa/MDM":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Desertic Microphyllous Scrub")
-        if value1 == "VSa/MDR":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Desertic Rosetophyllous Scrub")
-        if value1 == "VSa/MET":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Tamaulipan Thorn Scrub")
-        if value1 == "VSA/MK":
-            row.setValue(fieldNameEN, "Secondary Arboreal Vegetation derived from Thorn Forest")
-        if value1 == "VSa/MK":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Thorn Forest")
-        if value1 == "VSa/MKX":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Desertic Thorn Forest")
-        if value1 == "VSa/ML":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Chaparral")
-        if value1 == "VSa/MSM":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Piedmont Scrub")
-        if value1 == "VSa/PH":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Halophilous Grassland")
-        if value1 == "VSa/PN":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Natural Grassland")
-        if value1 == "VSa/VG":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Gallery Vegetation")
-        if value1 == "VSa/VH":
-            row.setValue(fieldNameEN, "Secondary Shrub Vegetation derived from Halophilous Xerophilous Vegetation")
-        if value1 == "VSh/BP":
-            row.setValue(fieldNameEN, "Secondary Herbaceous Vegetation derived from Pine Forest")
-        if value1 == "VSh/MET":
-            row.setValue(fieldNameEN, "Secondary Herbaceous Vegetation derived from Tamaulipan Thorn Scrub")
-        if value1 == "VSh/PN":
-            row.setValue(fieldNameEN, "Secondary Herbaceous Vegetation derived from Natural Grassland")
-        if value1 == "VT":
-            row.setValue(fieldNameEN, "Marsh Grasses")
-        if value1 == "VU":
-            row.setValue(fieldNameEN, "Coastal Dune Vegetation")
-        if value1 == "VY":
-            row.setValue(fieldNameEN, "Gypsophilous Vegetation")
-        if value1 == "ZU":
-            row.setValue(fieldNameEN, "Urban Area")
-        cur.updateRow(row)
+# Add field NAME with the translation from Spanish to English (one pass on each table)
+    classCatalog.addNames(fc, catalog, fieldCode, fieldNameEN)
     
 print "Step 4 Fields translated completed at", datetime.datetime.now().strftime("%I:%M:%S%p")
 